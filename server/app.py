@@ -3,20 +3,25 @@ Main Flask Application
 
 This is the main entry point for the Auto Commit App backend.
 """
-from flask import Flask, request, redirect, session, jsonify
+from flask import Flask, Response, request, redirect, session, jsonify, stream_with_context
 from flask_cors import CORS
 import os
 import json
 import requests
 import datetime
 from dotenv import load_dotenv
+
+# Load environment variables before modules read their settings
+load_dotenv()
+
 import database as db
-from github_client import GitHubClient
+import planner
+from github_client import GitHubClient, get_pool_stats, GITHUB_CONNECT_TIMEOUT, GITHUB_READ_TIMEOUT
 from scheduler import commit_scheduler
 from webhook_handler import WebhookHandler
-
-# Load environment variables
-load_dotenv()
+from etag_cache import etag_cache
+from repo_cache import repo_cache
+from resilience import circuit_breaker
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -33,7 +38,7 @@ CORS(app,
      supports_credentials=True, 
      origins=ALLOWED_ORIGINS, 
      allow_headers=["Content-Type", "Authorization", "X-Requested-With"], 
-     expose_headers=["Content-Type"], 
+     expose_headers=["Content-Type", "X-Next-Cursor"], 
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev_secret_key")
 
@@ -71,14 +76,17 @@ GITHUB_TOKEN_URL = "https://github.com/login/oauth/access_token"
 GITHUB_WEBHOOK_SECRET = os.environ.get("GITHUB_WEBHOOK_SECRET")
 WEBHOOK_URL = os.environ.get("WEBHOOK_URL")
 
-# Scheduler is initialized in scheduler.py
+# Commit history page size when none is requested, and the largest page allowed
+COMMITS_PAGE_SIZE = int(os.environ.get("COMMITS_PAGE_SIZE", "10"))
+COMMITS_PAGE_MAX = int(os.environ.get("COMMITS_PAGE_MAX", "100"))
+
+# Planning and dispatch run in scheduler_worker.py; the web app only reads
+# schedule state unless the scheduler is explicitly run in-process
+RUN_SCHEDULER_IN_WEB = os.environ.get("RUN_SCHEDULER_IN_WEB", "false").lower() == "true"
 
 # Initialize webhook handler
 webhook_handler = WebhookHandler(GITHUB_WEBHOOK_SECRET)
 
-# Initialize database on startup
-db.init_db()
-
 @app.route("/api/github/login")
 def github_login():
     """Redirect to GitHub OAuth login"""
@@ -102,7 +110,8 @@ def github_callback():
                 "code": code,
                 "redirect_uri": GITHUB_REDIRECT_URI
             },
-            headers={"Accept": "application/json"}
+            headers={"Accept": "application/json"},
+            timeout=(GITHUB_CONNECT_TIMEOUT, GITHUB_READ_TIMEOUT)
         )
 
         data = response.json()
@@ -161,6 +170,39 @@ def get_user():
         "repositoryName": platform_repo
     })
 
+@app.route("/api/user/business-hours", methods=["GET", "POST"])
+def business_hours():
+    """Get or set the time zone and hours the user's commits are spread across"""
+    if "github_username" not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    username = session["github_username"]
+
+    if request.method == "POST":
+        data = request.json
+        if not data:
+            return jsonify({"error": "Missing business hours data"}), 400
+
+        timezone = data.get("timezone") or None
+        start_hour = data.get("startHour", planner.BUSINESS_START_HOUR)
+        end_hour = data.get("endHour", planner.BUSINESS_END_HOUR)
+
+        if timezone and not planner.is_valid_timezone(timezone):
+            return jsonify({"error": f"Unknown time zone: {timezone}"}), 400
+        if not planner.is_valid_hours(start_hour, end_hour):
+            return jsonify({"error": "startHour and endHour must be whole hours with 0 <= startHour < endHour <= 24"}), 400
+
+        # The scheduler leader re-plans the user on its next sync
+        if not db.update_business_hours(username, timezone, start_hour, end_hour):
+            return jsonify({"error": "User not found"}), 404
+
+    timezone, start_hour, end_hour = planner.user_hours(db.get_user(username) or {})
+    return jsonify({
+        "timezone": timezone,
+        "startHour": start_hour,
+        "endHour": end_hour
+    })
+
 @app.route("/api/create-repository", methods=["POST"])
 def create_repository():
     """Create a new GitHub repository"""
@@ -286,13 +328,35 @@ def github_webhook():
         if webhook_handler.handle_push_event(request.json):
             return jsonify({"success": True})
         else:
+            # GitHub doesn't retry failed deliveries; pushes that couldn't be
+            # recorded are saved for `python webhook_handler.py replay`
             return jsonify({"error": "Failed to process push event"}), 500
 
     return jsonify({"success": True})
 
+def parse_commits_cursor(cursor: str):
+    """
+    Parse a commit history cursor of the form "<timestamp>,<id>"
+
+    Returns:
+        (timestamp, id) tuple, or None if the cursor is malformed
+    """
+    timestamp, _, commit_id = cursor.rpartition(",")
+    if not timestamp or not commit_id.isdigit():
+        return None
+    return timestamp, int(commit_id)
+
 @app.route("/api/commits")
 def get_commits():
-    """Get commit history for the user's repository"""
+    """
+    Get commit history for the user's repository, newest first
+
+    Query parameters:
+        limit: Page size (default COMMITS_PAGE_SIZE, at most COMMITS_PAGE_MAX)
+        before: Cursor from the previous page's X-Next-Cursor header
+
+    When more commits may follow, the response carries an X-Next-Cursor header.
+    """
     if "github_username" not in session:
         return jsonify({"error": "Not authenticated"}), 401
 
@@ -302,10 +366,44 @@ def get_commits():
     if not user_data or not user_data["repo_name"]:
         return jsonify({"error": "No repository found"}), 404
 
+    limit = request.args.get("limit", COMMITS_PAGE_SIZE, type=int)
+    if limit is None or not 1 <= limit <= COMMITS_PAGE_MAX:
+        return jsonify({"error": f"limit must be between 1 and {COMMITS_PAGE_MAX}"}), 400
+
+    before = None
+    if request.args.get("before"):
+        before = parse_commits_cursor(request.args["before"])
+        if before is None:
+            return jsonify({"error": "before must be a cursor of the form <timestamp>,<id>"}), 400
+
     repo_name = user_data["repo_name"]
-    commits = db.get_user_commits(username, repo_name)
+    commits = db.get_commits_page(username, repo_name, limit, before)
+
+    response = jsonify(commits)
+    if len(commits) == limit:
+        response.headers["X-Next-Cursor"] = f"{commits[-1]['timestamp']},{commits[-1]['id']}"
+    return response
+
+@app.route("/api/commits/export")
+def export_commits():
+    """Stream the user's whole commit history as newline-delimited JSON, newest first"""
+    if "github_username" not in session:
+        return jsonify({"error": "Not authenticated"}), 401
 
-    return jsonify(commits)
+    username = session["github_username"]
+    user_data = db.get_user_token(username)
+
+    if not user_data or not user_data["repo_name"]:
+        return jsonify({"error": "No repository found"}), 404
+
+    repo_name = user_data["repo_name"]
+
+    def generate():
+        for commit in db.iter_user_commits(username, repo_name):
+            yield json.dumps(commit) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson",
+                    headers={"Content-Disposition": f"attachment; filename={repo_name}-commits.ndjson"})
 
 @app.route("/api/github/status")
 def get_status():
@@ -339,11 +437,11 @@ def get_status():
         commit_scheduler.setup_midnight_scheduler(username, user_data["token"], platform_repo)
         scheduled_commits = commit_scheduler.get_scheduled_commits_count(username)
 
-    # Get total commits
-    total_commits = len(db.get_user_commits(username, platform_repo, limit=None))
+    # Get total commits (kept up to date as commits are recorded)
+    total_commits = db.get_commit_count(username, platform_repo)
 
     # Get next commit time information
-    next_commit_info = commit_scheduler.get_next_commit_time(username)
+    next_commit_info = commit_scheduler.get_next_commit_time(username, platform_repo)
 
     print(f"Next commit info for {username}: {next_commit_info}")
 
@@ -380,37 +478,46 @@ def debug_session():
         "has_token": "github_token" in session
     })
 
+@app.route("/api/debug/github-pool")
+def debug_github_pool():
+    """Debug endpoint to check GitHub connection pool and circuit breaker state"""
+    stats = get_pool_stats()
+    stats["circuit_breakers"] = circuit_breaker.get_stats()
+    # Commits go out from the scheduler worker, which publishes its own counters
+    stats["scheduler_workers"] = commit_scheduler.get_published_stats("github_pool")
+    return jsonify(stats)
+
+@app.route("/api/debug/github-cache")
+def debug_github_cache():
+    """Debug endpoint to check GitHub response and repository cache counters"""
+    return jsonify({
+        "conditional_requests": etag_cache.get_stats(),
+        "repository_metadata": repo_cache.get_stats(),
+        "scheduler_workers": commit_scheduler.get_published_stats("github_cache")
+    })
+
+@app.route("/api/debug/planning")
+def debug_planning():
+    """Debug endpoint to check progress of the nightly planning pass (as published by the leader)"""
+    return jsonify(commit_scheduler.get_planning_status())
+
+@app.route("/api/debug/scheduler-leader")
+def debug_scheduler_leader():
+    """Debug endpoint to check which process holds the scheduler lease"""
+    return jsonify(commit_scheduler.elector.get_status())
+
 def initialize_app():
     """Initialize the application"""
     # Initialize database
     try:
         db.init_db()
-
-        # Verify database is working by checking if we can query it
-        users = db.get_users_with_repositories()
     except Exception as e:
         print(f"ERROR initializing database: {str(e)}")
         # We continue anyway to allow debugging
 
-    # Restore schedulers for all users
-    try:
-        # Try to restore schedulers
-        commit_scheduler.restore_schedulers()
-    except Exception as e:
-        print(f"Error restoring schedulers: {str(e)}")
-        try:
-            # Import the clear_job_store function
-            from scheduler import clear_job_store
-
-            # Clear the job store
-            if clear_job_store():
-                # Try to restore schedulers again
-                commit_scheduler.restore_schedulers()
-            else:
-                print("Failed to clear job store")
-        except Exception as e2:
-            print(f"Error during recovery attempt: {str(e2)}")
-            # Continue despite errors
+    # Single-process setups can still run the scheduler here
+    if RUN_SCHEDULER_IN_WEB:
+        commit_scheduler.start()
 
 # Initialize the app when this module is imported
 initialize_app()
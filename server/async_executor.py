@@ -0,0 +1,137 @@
+"""
+Async Commit Executor Module
+
+This module runs scheduled commits on a dedicated asyncio event loop so a
+single thread can keep many commits in flight at once.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+from async_github_client import AsyncGitHubClient, create_async_session
+
+# Maximum number of commits in flight on the event loop
+ASYNC_COMMIT_CONCURRENCY = int(os.environ.get("ASYNC_COMMIT_CONCURRENCY", "200"))
+
+class AsyncCommitExecutor:
+    """Runs commits on a background event loop with bounded concurrency"""
+
+    def __init__(self, concurrency: int = ASYNC_COMMIT_CONCURRENCY):
+        """
+        Initialize the executor (the loop starts on first use)
+
+        Args:
+            concurrency: Maximum number of commits in flight
+        """
+        self.concurrency = concurrency
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self.in_flight = 0
+        self.completed = 0
+
+    def start(self) -> None:
+        """Start the event loop thread if it isn't running"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run_loop, name="async-commit-executor", daemon=True)
+            self._thread.start()
+
+        self._ready.wait()
+        print(f"Async commit executor started (concurrency={self.concurrency})")
+
+    def _run_loop(self) -> None:
+        """Thread body: own the event loop and the HTTP session"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        async def setup():
+            self._session = create_async_session()
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        self.loop.run_until_complete(setup())
+        self._ready.set()
+        self.loop.run_forever()
+
+        self.loop.run_until_complete(self._session.close())
+        self.loop.close()
+
+    def stop(self) -> None:
+        """Stop the event loop after in-flight callbacks"""
+        with self._lock:
+            if self.loop is not None and self._thread is not None:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self._thread.join(timeout=10)
+                self._thread = None
+
+    def submit(self, token: str, username: str, repo_name: str, commit_message: str,
+               job: Optional[Dict[str, Any]] = None) -> Future:
+        """
+        Queue a commit on the event loop (safe to call from any thread)
+
+        Args:
+            token: GitHub token
+            username: GitHub username
+            repo_name: Repository name
+            commit_message: Commit message
+            job: Claimed outbox job the commit belongs to, if any
+
+        Returns:
+            concurrent.futures.Future resolving to (commit_data, success, commit_sha)
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(
+            self._commit(token, username, repo_name, commit_message, job), self.loop)
+
+    async def _commit(self, token: str, username: str, repo_name: str, commit_message: str,
+                      job: Optional[Dict[str, Any]]):
+        """Make one commit and hand the result back to the scheduler"""
+        from scheduler import handle_commit_result, commit_scheduler, commit_key, COMMIT_BACKEND
+
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                github_client = AsyncGitHubClient(token, self._session)
+                result = await github_client.make_commit(
+                    username, repo_name, commit_message, backend=COMMIT_BACKEND,
+                    idempotency_key=commit_key(job) if job else None,
+                    check_existing=bool(job) and job["attempts"] > 1)
+            except Exception as e:
+                print(f"✗ Exception during async commit for {username}: {str(e)}")
+                result = ({"error": str(e)}, False, "")
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
+
+        # Recording touches SQLite and the scheduler, so keep it off the loop
+        commit_data, success, commit_sha = result
+        await self.loop.run_in_executor(
+            None, handle_commit_result, token, username, repo_name, commit_message,
+            commit_data, success, commit_sha, job)
+        await self.loop.run_in_executor(None, commit_scheduler.update_next_commit_info, username)
+        return result
+
+    def get_stats(self) -> dict:
+        """
+        Get executor statistics
+
+        Returns:
+            Dictionary with concurrency limit, in-flight and completed counts
+        """
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "completed": self.completed
+        }
+
+# Create a global instance of the executor
+async_commit_executor = AsyncCommitExecutor()
@@ -0,0 +1,224 @@
+"""
+Async GitHub API Client Module
+
+This module provides an asyncio version of GitHubClient. It runs the same
+request flows as the blocking client, so commit behaviour, caching, rate
+limiting and retries are identical; only the I/O is awaited.
+"""
+import asyncio
+import json
+from typing import Dict, Any, Optional, Tuple, Generator
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from github_client import (GitHubClient, COMMIT_BACKEND_REST, GITHUB_CONNECT_TIMEOUT,
+                           GITHUB_READ_TIMEOUT, GITHUB_POOL_MAXSIZE, _count)
+from rate_limiter import rate_limit_governor, RateLimitExceeded
+from resilience import circuit_breaker, CircuitOpenError, backoff_delay, GITHUB_MAX_RETRIES
+
+def create_async_session(limit: int = GITHUB_POOL_MAXSIZE) -> "aiohttp.ClientSession":
+    """
+    Create a keep-alive aiohttp session for GitHub API calls
+
+    Must be called from inside the event loop that will use the session.
+
+    Args:
+        limit: Maximum number of simultaneous connections
+
+    Returns:
+        New aiohttp.ClientSession
+    """
+    if aiohttp is None:
+        raise RuntimeError("aiohttp is not installed; install it to use the async GitHub client")
+
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=limit),
+        timeout=aiohttp.ClientTimeout(sock_connect=GITHUB_CONNECT_TIMEOUT, sock_read=GITHUB_READ_TIMEOUT)
+    )
+
+class AsyncGitHubClient(GitHubClient):
+    """Awaitable client for interacting with GitHub API"""
+
+    def __init__(self, token: str, session: "aiohttp.ClientSession"):
+        """
+        Initialize with GitHub token and a shared aiohttp session
+
+        Args:
+            token: GitHub token
+            session: Session from create_async_session
+        """
+        super().__init__(token)
+        self.session = session
+
+    async def _run_async(self, flow: Generator) -> Any:
+        """
+        Drive a flow to completion with awaited requests
+
+        Args:
+            flow: Generator yielding API calls
+
+        Returns:
+            The flow's return value
+        """
+        try:
+            call = next(flow)
+            while True:
+                call = flow.send(await self._make_request_async(*call))
+        except StopIteration as done:
+            return done.value
+
+    async def _make_request_async(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                                  retry: Optional[bool] = None) -> Tuple[Dict, int]:
+        """
+        Make a request to GitHub API, retrying idempotent calls with backoff
+
+        Args:
+            method: HTTP method (GET, POST, PATCH, etc.)
+            endpoint: API endpoint (without base URL)
+            data: Request data for POST/PATCH requests
+            retry: Whether the request is safe to retry (defaults to GET only)
+
+        Returns:
+            Tuple of (response_data, status_code)
+        """
+        if retry is None:
+            retry = method == "GET"
+        attempts = GITHUB_MAX_RETRIES + 1 if retry else 1
+
+        for attempt in range(attempts):
+            if attempt > 0:
+                delay = backoff_delay(attempt)
+                print(f"Retrying {method} {endpoint} in {delay:.2f}s (attempt {attempt + 1}/{attempts})")
+                await asyncio.sleep(delay)
+
+            response_data, status_code = await self._send_async(method, endpoint, data)
+            if not self._should_retry(response_data, status_code):
+                break
+
+        return response_data, status_code
+
+    async def _fetch(self, method: str, url: str, headers: Dict[str, str],
+                     data: Optional[Dict]) -> Tuple[int, Dict[str, str], Any]:
+        """Send one HTTP request and read the whole response"""
+        async with self.session.request(method, url, headers=headers, json=data) as response:
+            text = await response.text()
+            try:
+                body = json.loads(text)
+            except ValueError:
+                body = {"text": text}
+            return response.status, response.headers, body
+
+    async def _send_async(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                          conditional: bool = True) -> Tuple[Dict, int]:
+        """
+        Send a single request through the rate limit governor and circuit breaker
+
+        Args:
+            method: HTTP method (GET, POST, PATCH, etc.)
+            endpoint: API endpoint (without base URL)
+            data: Request data for POST/PATCH requests
+            conditional: Whether to revalidate a cached GET response
+
+        Returns:
+            Tuple of (response_data, status_code)
+        """
+        request = self._prepare(method, endpoint, data, conditional)
+
+        try:
+            await rate_limit_governor.acquire_async(self.token, request["governed_method"], request["resource"])
+            circuit_breaker.before_call(request["host"])
+        except (RateLimitExceeded, CircuitOpenError) as e:
+            return self._deferred(request, e)
+
+        try:
+            _count("requests")
+            status_code, headers, response_data = await self._fetch(
+                method, request["url"], request["headers"], data)
+
+            if status_code == 304 and request["conditional"]:
+                cached_data = self._not_modified(request, headers)
+                if cached_data is not None:
+                    return cached_data, 200
+
+                # Entry was evicted in the meantime; fetch the full response
+                return await self._send_async(method, endpoint, data, conditional=False)
+
+            return self._complete(request, status_code, headers, response_data)
+
+        except Exception as e:
+            return self._failed(request, e)
+
+    async def get_user_info(self) -> Dict:
+        """Get authenticated user information"""
+        data, status_code = await self._make_request_async("GET", "/user")
+        return data
+
+    async def create_repository(self, name: str, description: str = "", private: bool = False) -> Tuple[Dict, int]:
+        """
+        Create a new GitHub repository
+
+        Args:
+            name: Repository name
+            description: Repository description
+            private: Whether the repository is private
+
+        Returns:
+            Tuple of (repository_data, status_code)
+        """
+        return await self._run_async(self._create_repository_flow(name, description, private))
+
+    async def setup_webhook(self, username: str, repo_name: str, webhook_url: str,
+                            secret: Optional[str] = None) -> Tuple[Dict, int]:
+        """
+        Set up a webhook for a repository
+
+        Args:
+            username: GitHub username
+            repo_name: Repository name
+            webhook_url: URL to receive webhook events
+            secret: Secret for webhook signature verification
+
+        Returns:
+            Tuple of (webhook_data, status_code)
+        """
+        return await self._make_request_async(
+            "POST",
+            f"/repos/{username}/{repo_name}/hooks",
+            self._webhook_payload(webhook_url, secret)
+        )
+
+    async def make_commit(self, username: str, repo_name: str, commit_message: str,
+                          backend: str = COMMIT_BACKEND_REST, idempotency_key: Optional[str] = None,
+                          check_existing: bool = False) -> Tuple[Dict, bool, str]:
+        """
+        Make a commit to update README.md in a repository
+
+        Args:
+            username: GitHub username
+            repo_name: Repository name
+            commit_message: Commit message
+            backend: Commit backend to use ("rest" or "graphql")
+            idempotency_key: Key added to the message as a KCommit-Id trailer
+            check_existing: Look for a recent commit with the same key first
+
+        Returns:
+            Tuple of (commit_data, success, commit_sha)
+        """
+        return await self._run_async(self._commit_flow(username, repo_name, commit_message, backend,
+                                                       idempotency_key, check_existing))
+
+    async def find_commit_by_key(self, username: str, repo_name: str,
+                                 idempotency_key: str) -> Tuple[Optional[str], bool]:
+        """Look for a recent commit carrying an idempotency key"""
+        return await self._run_async(self._find_commit_by_key_flow(username, repo_name, idempotency_key))
+
+    async def make_commit_graphql(self, username: str, repo_name: str, commit_message: str) -> Tuple[Dict, bool, str]:
+        """Make a README.md commit with a single createCommitOnBranch mutation"""
+        return await self._run_async(self._commit_graphql_flow(username, repo_name, commit_message))
+
+    async def make_commit_rest(self, username: str, repo_name: str, commit_message: str) -> Tuple[Dict, bool, str]:
+        """Make a README.md commit through the REST git data API"""
+        return await self._run_async(self._commit_rest_flow(username, repo_name, commit_message))
@@ -0,0 +1,224 @@
+"""
+Batch Planner Module
+
+This module computes the daily commit plans of many users in one NumPy
+pass. It produces exactly the same times as planner.plan_times, but as
+flat (user_index, epoch_seconds) arrays that the dispatcher can load in
+one call.
+"""
+import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+import planner
+
+def available() -> bool:
+    """Whether NumPy is installed so batch planning can be used"""
+    return np is not None
+
+def _require_numpy() -> None:
+    """Fail clearly when NumPy is missing"""
+    if np is None:
+        raise RuntimeError("numpy is not installed; install it to use the batch planner")
+
+def _splitmix64(values: "np.ndarray") -> "np.ndarray":
+    """Vectorized planner.splitmix64 (uint64 arithmetic wraps like the masked original)"""
+    z = values + np.uint64(planner._GOLDEN_GAMMA)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+def _random_values(seeds: "np.ndarray", indexes: "np.ndarray") -> "np.ndarray":
+    """Vectorized planner.random_value"""
+    return _splitmix64(seeds + indexes.astype(np.uint64) * np.uint64(planner._GOLDEN_GAMMA))
+
+def user_keys(users: Sequence[Tuple[str, str]]) -> "np.ndarray":
+    """
+    Compute the plan keys for a list of users
+
+    Keys don't depend on the date, so callers planning the same users on
+    several days can compute them once.
+
+    Args:
+        users: Sequence of (username, repo_name)
+
+    Returns:
+        uint64 array of keys, one per user
+    """
+    _require_numpy()
+    return np.fromiter((planner.user_key(username, repo_name) for username, repo_name in users),
+                       dtype=np.uint64, count=len(users))
+
+def day_seeds(keys: "np.ndarray", day) -> "np.ndarray":
+    """
+    Vectorized planner.day_seed
+
+    Args:
+        keys: uint64 array of user keys
+        day: Plan date, or an array of date ordinals (one per key)
+
+    Returns:
+        uint64 array of seeds
+    """
+    _require_numpy()
+    if isinstance(day, datetime.date):
+        offset = np.uint64((day.toordinal() * planner._GOLDEN_GAMMA) & planner._MASK64)
+    else:
+        offset = np.asarray(day, dtype=np.int64).astype(np.uint64) * np.uint64(planner._GOLDEN_GAMMA)
+    return _splitmix64(keys + offset)
+
+def _windows(day_ordinals: Sequence[int], hours: Sequence[planner.BusinessHours]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Per-user business windows, looked up once per distinct (day, hours)"""
+    cache: Dict[Tuple[int, planner.BusinessHours], Tuple[float, float]] = {}
+    windows = np.empty((len(hours), 2), dtype=np.float64)
+    for index, (ordinal, user_hours) in enumerate(zip(day_ordinals, hours)):
+        window = cache.get((ordinal, user_hours))
+        if window is None:
+            window = planner.business_window(datetime.date.fromordinal(ordinal), user_hours)
+            cache[(ordinal, user_hours)] = window
+        windows[index] = window
+    return windows[:, 0], windows[:, 1]
+
+def plan_batch(seeds: "np.ndarray", window_start, window_end) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Plan commits for every seed at once
+
+    Args:
+        seeds: uint64 array of day seeds, one per user
+        window_start: Window start in epoch seconds (scalar or per-user array)
+        window_end: Window end in epoch seconds (scalar or per-user array)
+
+    Returns:
+        Tuple of (user_index int32 array, epoch_seconds float64 array),
+        grouped by user and sorted by time within each user
+    """
+    _require_numpy()
+    user_count = len(seeds)
+    window_start = np.broadcast_to(np.asarray(window_start, dtype=np.float64), (user_count,))
+    window_end = np.broadcast_to(np.asarray(window_end, dtype=np.float64), (user_count,))
+    available_seconds = window_end - window_start
+
+    # Commit count per user, capped so commits can be a minute apart
+    span = planner.MAX_COMMITS_PER_DAY - planner.MIN_COMMITS_PER_DAY + 1
+    counts = planner.MIN_COMMITS_PER_DAY + (_random_values(seeds, np.zeros(user_count, dtype=np.uint64))
+                                            % np.uint64(span)).astype(np.int64)
+    fits = np.floor_divide(np.maximum(available_seconds, 0), planner.MIN_COMMIT_SPACING).astype(np.int64)
+    counts = np.maximum(1, np.minimum(counts, fits))
+    counts[available_seconds <= 0] = 0
+
+    # One row per commit: owning user and position within the user's day
+    user_index = np.repeat(np.arange(user_count, dtype=np.int32), counts)
+    firsts = np.cumsum(counts) - counts
+    position = np.arange(len(user_index), dtype=np.int64) - np.repeat(firsts, counts)
+
+    segment_seconds = available_seconds[user_index] / counts[user_index]
+    min_seconds = np.minimum(planner.MIN_COMMIT_SPACING, (segment_seconds * 0.1).astype(np.int64))
+    max_seconds = np.maximum(min_seconds, (segment_seconds * 0.9).astype(np.int64))
+
+    draws = _random_values(seeds[user_index], position + 1)
+    offsets = min_seconds + (draws % (max_seconds - min_seconds + 1).astype(np.uint64)).astype(np.int64)
+
+    starts = window_start[user_index]
+    ends = window_end[user_index]
+    commit_times = starts + position * segment_seconds + offsets
+
+    # Keep every commit inside the window
+    commit_times = np.where(commit_times > ends, ends - planner.MIN_COMMIT_SPACING, commit_times)
+    return user_index, np.trunc(commit_times)
+
+def plan_users(users: Sequence[Tuple[str, str]], day: datetime.date,
+               keys: "np.ndarray" = None,
+               hours: Optional[Sequence[planner.BusinessHours]] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Plan one day for many users over their business windows
+
+    Args:
+        users: Sequence of (username, repo_name)
+        day: Plan date in each user's time zone
+        keys: Precomputed user_keys(users), if available
+        hours: Business hours of each user, in the same order (defaults for everyone if omitted)
+
+    Returns:
+        Tuple of (user_index, epoch_seconds) arrays; user_index points into users
+    """
+    if keys is None:
+        keys = user_keys(users)
+    if hours is None:
+        window_start, window_end = planner.business_window(day)
+    else:
+        window_start, window_end = _windows([day.toordinal()] * len(users), hours)
+    return plan_batch(day_seeds(keys, day), window_start, window_end)
+
+def plan_users_between(users: Sequence[Tuple[str, str]], start: float, end: float,
+                       keys: "np.ndarray" = None,
+                       hours: Optional[Sequence[planner.BusinessHours]] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Vectorized planner.bulk_plans_between
+
+    Each user's span covers one to three of their local days; every pass
+    plans the n-th of those days for all users at once.
+
+    Args:
+        users: Sequence of (username, repo_name)
+        start: Epoch seconds (inclusive)
+        end: Epoch seconds (exclusive)
+        keys: Precomputed user_keys(users), if available
+        hours: Business hours of each user, in the same order (defaults for everyone if omitted)
+
+    Returns:
+        Tuple of (user_index, epoch_seconds) arrays, grouped by user and
+        sorted by time within each user
+    """
+    _require_numpy()
+    if keys is None:
+        keys = user_keys(users)
+    if hours is None:
+        hours = [planner.DEFAULT_HOURS] * len(users)
+    if end <= start or not len(users):
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+
+    # First and last local day of the span for each distinct setting
+    spans = {user_hours: (planner.local_date(start, user_hours).toordinal(),
+                          planner.local_date(end - 1, user_hours).toordinal())
+             for user_hours in set(hours)}
+    first_days = np.fromiter((spans[user_hours][0] for user_hours in hours), dtype=np.int64, count=len(users))
+    last_days = np.fromiter((spans[user_hours][1] for user_hours in hours), dtype=np.int64, count=len(users))
+
+    indexes, times = [], []
+    for offset in range(int((last_days - first_days).max()) + 1):
+        selected = np.flatnonzero(first_days + offset <= last_days)
+        ordinals = first_days[selected] + offset
+        window_start, window_end = _windows(ordinals.tolist(), [hours[index] for index in selected.tolist()])
+        user_index, commit_times = plan_batch(day_seeds(keys[selected], ordinals), window_start, window_end)
+
+        inside = (commit_times >= start) & (commit_times < end)
+        indexes.append(selected[user_index[inside]].astype(np.int32))
+        times.append(commit_times[inside])
+
+    user_index = np.concatenate(indexes)
+    commit_times = np.concatenate(times)
+    order = np.lexsort((commit_times, user_index))
+    return user_index[order], commit_times[order]
+
+def to_plans(usernames: Sequence[str], user_index: "np.ndarray",
+             epoch_seconds: "np.ndarray") -> List[Tuple[str, List[float]]]:
+    """
+    Convert batch output back to per-user lists (mainly for comparison with planner)
+
+    Args:
+        usernames: Usernames user_index points into
+        user_index: User index array from plan_batch
+        epoch_seconds: Commit time array from plan_batch
+
+    Returns:
+        List of (username, commit times) for users with at least one commit
+    """
+    _require_numpy()
+    boundaries = np.flatnonzero(np.diff(user_index)) + 1
+    return [(usernames[int(indexes[0])], times.tolist())
+            for indexes, times in zip(np.split(user_index, boundaries), np.split(epoch_seconds, boundaries))
+            if len(indexes)]
@@ -0,0 +1,154 @@
+"""
+Commit Pipeline Benchmark
+
+Runs the full make_commit pipeline against the local fake GitHub server and
+reports throughput, latency percentiles and API calls per commit.
+
+Usage:
+    python bench_commits.py --users 50 --commits 500 --backend rest --mode thread
+    python bench_commits.py --users 50 --commits 500 --backend graphql --mode async --latency-ms 40
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the commit pipeline offline")
+    parser.add_argument("--users", type=int, default=20, help="Number of synthetic users (tokens/repos)")
+    parser.add_argument("--commits", type=int, default=200, help="Total commits to make")
+    parser.add_argument("--backend", choices=["rest", "graphql"], default="rest")
+    parser.add_argument("--mode", choices=["thread", "async"], default="thread")
+    parser.add_argument("--concurrency", type=int, default=16, help="Worker threads or in-flight commits")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Mean latency added by the fake server")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 5xx")
+    parser.add_argument("--pace-writes", action="store_true",
+                        help="Keep GitHub's secondary-limit pacing (1s between writes per token)")
+    return parser.parse_args()
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def run_threaded(chains, backend, concurrency):
+    """Make the commits on a thread pool with the blocking client"""
+    from concurrent.futures import ThreadPoolExecutor
+    from github_client import GitHubClient
+
+    def chain(jobs):
+        results = []
+        for token, repo_name in jobs:
+            started = time.perf_counter()
+            _, success, _ = GitHubClient(token).make_commit(token, repo_name, "Benchmark commit", backend=backend)
+            results.append((success, time.perf_counter() - started))
+        return results
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return [result for results in pool.map(chain, chains) for result in results]
+
+def run_async(chains, backend, concurrency):
+    """Make the commits on one event loop with the async client"""
+    import asyncio
+    from async_github_client import AsyncGitHubClient, create_async_session
+
+    async def main():
+        session = create_async_session(limit=concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def chain(jobs):
+            results = []
+            for token, repo_name in jobs:
+                async with semaphore:
+                    started = time.perf_counter()
+                    _, success, _ = await AsyncGitHubClient(token, session).make_commit(
+                        token, repo_name, "Benchmark commit", backend=backend)
+                    results.append((success, time.perf_counter() - started))
+            return results
+
+        try:
+            results = await asyncio.gather(*[chain(jobs) for jobs in chains])
+            return [result for chain_results in results for result in chain_results]
+        finally:
+            await session.close()
+
+    return asyncio.run(main())
+
+def main():
+    """Run the benchmark and print a report"""
+    args = parse_args()
+
+    from fake_github import FakeGitHubServer
+    server = FakeGitHubServer(latency_ms=args.latency_ms, error_rate=args.error_rate,
+                              rate_limit=10 ** 9).start()
+
+    # Configure the client modules before they are imported
+    os.environ["GITHUB_API_URL"] = server.url
+    if not args.pace_writes:
+        os.environ["GITHUB_WRITE_MIN_INTERVAL"] = "0"
+        os.environ["GITHUB_WRITES_PER_MINUTE"] = str(10 ** 9)
+    os.environ.setdefault("GITHUB_POOL_MAXSIZE", str(max(args.concurrency, 4)))
+
+    # The repository cache reads pushed heads from SQLite; use a scratch database
+    import database as db
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="commit-bench-"), "bench.db")
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        db.init_db()
+
+    from github_client import get_pool_stats
+    from etag_cache import etag_cache
+    from repo_cache import repo_cache
+
+    users = [f"bench-user-{index}" for index in range(args.users)]
+    for user in users:
+        server.state.create_repo(user, "bench-repo")
+
+    # Commits for one repository run one after another, as they do in production;
+    # concurrency comes from running many repositories at once
+    chains = [[] for _ in users]
+    for index in range(args.commits):
+        chains[index % len(users)].append((users[index % len(users)], "bench-repo"))
+
+    print(f"Benchmarking {args.commits} commits for {args.users} users "
+          f"(backend={args.backend}, mode={args.mode}, concurrency={args.concurrency}, "
+          f"latency={args.latency_ms}ms, error_rate={args.error_rate})")
+
+    requests_before = server.state.request_count
+    started = time.perf_counter()
+    if args.mode == "async":
+        results = run_async(chains, args.backend, args.concurrency)
+    else:
+        results = run_threaded(chains, args.backend, args.concurrency)
+    elapsed = time.perf_counter() - started
+    api_requests = server.state.request_count - requests_before
+
+    latencies = [latency * 1000 for _, latency in results]
+    succeeded = sum(1 for success, _ in results if success)
+
+    print(f"\nSucceeded:        {succeeded}/{len(results)}")
+    print(f"Wall time:        {elapsed:.2f}s")
+    print(f"Throughput:       {len(results) / elapsed:.1f} commits/s")
+    print(f"Latency p50:      {percentile(latencies, 50):.1f} ms")
+    print(f"Latency p95:      {percentile(latencies, 95):.1f} ms")
+    print(f"Latency p99:      {percentile(latencies, 99):.1f} ms")
+    print(f"Latency mean:     {statistics.mean(latencies):.1f} ms")
+    print(f"API calls/commit: {api_requests / max(1, len(results)):.2f}")
+    print(f"ETag cache:       {etag_cache.get_stats()}")
+    print(f"Repo cache:       {repo_cache.get_stats()}")
+    if args.mode == "thread":
+        hosts = get_pool_stats()["hosts"]
+        opened = sum(host["connections_opened"] for host in hosts)
+        print(f"Connections:      {opened} opened for {api_requests} requests")
+
+    server.stop()
+    return 0 if succeeded == len(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Commit History Benchmark
+
+Grows the commits table in a scratch database and times the dashboard's
+history query (get_user_commits) at each size, with and without the
+commits indexes, to show whether it stays flat as history piles up.
+
+Usage:
+    python bench_history.py --sizes 10000,100000,1000000
+    python bench_history.py --sizes 100000,1000000 --users 5000 --queries 500
+"""
+import argparse
+import contextlib
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark commit history queries as the table grows")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated table sizes to measure at")
+    parser.add_argument("--users", type=int, default=1000, help="Number of users the commits are spread over")
+    parser.add_argument("--queries", type=int, default=200, help="History queries timed at each size")
+    parser.add_argument("--limit", type=int, default=10, help="Commits per history query")
+    parser.add_argument("--skip-unindexed", action="store_true", help="Only measure with the indexes")
+    return parser.parse_args()
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def grow(conn, start, end, users):
+    """Add commits start..end-1, spread round-robin over users in time order"""
+    base = datetime.datetime(2024, 1, 1)
+    rows = ((f"bench-user-{index % users}", "bench-repo", f"{index:040x}", "Benchmark commit",
+             f"https://github.com/bench/commit/{index:040x}",
+             (base + datetime.timedelta(seconds=index * 7)).isoformat())
+            for index in range(start, end))
+    conn.executemany('''INSERT INTO commits (username, repo_name, commit_sha, commit_message, commit_url, timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?)''', rows)
+    conn.commit()
+
+def time_queries(db, users, queries, limit):
+    """Time get_user_commits for a spread of users; returns latencies in ms"""
+    latencies = []
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for index in range(queries):
+            username = f"bench-user-{(index * 7919) % users}"
+            started = time.perf_counter()
+            db.get_user_commits(username, "bench-repo", limit)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+def query_plan(conn, limit):
+    """SQLite's plan for the history query"""
+    rows = conn.execute('''EXPLAIN QUERY PLAN SELECT * FROM commits
+                           WHERE username = ? AND repo_name = ? ORDER BY timestamp DESC LIMIT ?''',
+                        ("bench-user-0", "bench-repo", limit)).fetchall()
+    return "; ".join(row[-1] for row in rows)
+
+def run(db, sizes, args, indexed):
+    """Measure at each size with a fresh database"""
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="commit-history-"), "history.db")
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        db.init_db()
+    conn = db.get_connection()
+    if not indexed:
+        conn.execute('DROP INDEX IF EXISTS idx_commits_user_repo_time')
+        conn.execute('DROP INDEX IF EXISTS idx_commits_sha')
+        conn.commit()
+
+    print(f"\n{'indexed' if indexed else 'no indexes'}: {query_plan(conn, args.limit)}")
+    print(f"{'rows':>10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}{'grow s':>10}")
+    rows = 0
+    for size in sizes:
+        started = time.perf_counter()
+        grow(conn, rows, size, args.users)
+        grown = time.perf_counter() - started
+        rows = size
+
+        latencies = time_queries(db, args.users, args.queries, args.limit)
+        print(f"{rows:>10}{percentile(latencies, 50):>10.3f}{percentile(latencies, 95):>10.3f}"
+              f"{statistics.mean(latencies):>10.3f}{grown:>10.1f}")
+
+def main():
+    """Run the benchmark and print a report"""
+    args = parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(",") if size.strip())
+
+    import database as db
+
+    print(f"History query (limit {args.limit}) over {args.users} users, {args.queries} queries per size")
+    run(db, sizes, args, indexed=True)
+    if not args.skip_unindexed:
+        run(db, sizes, args, indexed=False)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Catch-up Module
+
+This module decides what happens to commits whose slot passed while no
+scheduler was running. Depending on the policy they are run now in
+rate-limited batches, squeezed into what is left of the business window,
+or skipped.
+"""
+import datetime
+import os
+import zlib
+from typing import Dict, List, Optional, Tuple, Hashable
+
+import planner
+
+# What to do with missed commits: run_now, compress or skip
+CATCHUP_RUN_NOW = "run_now"
+CATCHUP_COMPRESS = "compress"
+CATCHUP_SKIP = "skip"
+CATCHUP_POLICY = os.environ.get("CATCHUP_POLICY", CATCHUP_RUN_NOW)
+
+# Slots older than this are never caught up
+CATCHUP_MAX_AGE = float(os.environ.get("CATCHUP_MAX_AGE", "43200"))
+
+# Missed commits released per batch, and seconds between batches
+CATCHUP_BATCH_SIZE = int(os.environ.get("CATCHUP_BATCH_SIZE", "50"))
+CATCHUP_BATCH_INTERVAL = float(os.environ.get("CATCHUP_BATCH_INTERVAL", "30"))
+
+def batched_times(count: int, now: float, batch_size: int = CATCHUP_BATCH_SIZE,
+                  interval: float = CATCHUP_BATCH_INTERVAL) -> List[float]:
+    """
+    Spread count commits over batches starting now
+
+    Args:
+        count: Number of commits
+        now: Epoch seconds of the first batch
+        batch_size: Commits per batch
+        interval: Seconds between batches
+
+    Returns:
+        List of due times, one per commit
+    """
+    batch_size = max(1, batch_size)
+    return [float(int(now + (index // batch_size) * interval)) for index in range(count)]
+
+def compressed_times(count: int, now: float, window_end: float, phase: float = 0.5) -> Optional[List[float]]:
+    """
+    Spread count commits evenly between now and the end of the window
+
+    Args:
+        count: Number of commits
+        now: Epoch seconds
+        window_end: Epoch seconds the window closes
+        phase: Position of each commit within its share of the window (0-1)
+
+    Returns:
+        List of due times, or None if they don't fit a minute apart
+    """
+    available = window_end - now
+    if count == 0:
+        return []
+    if available < count * planner.MIN_COMMIT_SPACING:
+        return None
+
+    step = available / count
+    return [float(int(now + (index + phase) * step)) for index in range(count)]
+
+def plan_catch_up(missed: List[Tuple[Hashable, str, float]], now: float, policy: str = CATCHUP_POLICY,
+                  window_ends: Optional[Dict[str, float]] = None) -> List[Tuple[Hashable, Optional[float]]]:
+    """
+    Choose new due times for missed commits
+
+    With run_now, all missed commits are released in batches of
+    CATCHUP_BATCH_SIZE every CATCHUP_BATCH_INTERVAL seconds, oldest first.
+    With compress, each user's missed commits are spread over what is left
+    of their window; users whose window has closed fall back to batches.
+    With skip, nothing is rescheduled.
+
+    Args:
+        missed: List of (key, username, original due time)
+        now: Epoch seconds
+        policy: run_now, compress or skip
+        window_ends: Dictionary of username to window end (defaults to today's business hours)
+
+    Returns:
+        List of (key, new due time), with None for commits to skip
+    """
+    if policy == CATCHUP_SKIP:
+        return [(key, None) for key, _, _ in missed]
+
+    missed = sorted(missed, key=lambda entry: entry[2])
+    results = []
+    overflow = missed
+
+    if policy == CATCHUP_COMPRESS:
+        default_end = planner.business_window(datetime.date.fromtimestamp(now))[1]
+        window_ends = window_ends or {}
+
+        by_user: Dict[str, List[Hashable]] = {}
+        for key, username, _ in missed:
+            by_user.setdefault(username, []).append(key)
+
+        overflow = []
+        for username, keys in by_user.items():
+            # Users with the same number of missed commits get different phases,
+            # so their compressed schedules don't line up into bursts
+            window_end = window_ends.get(username, default_end)
+            phase = 0.1 + 0.8 * (zlib.crc32(username.encode("utf-8")) % 1000) / 1000
+            times = compressed_times(len(keys), now, window_end, phase)
+            if times is None:
+                overflow.extend((key, username, 0.0) for key in keys)
+            else:
+                results.extend(zip(keys, times))
+
+    results.extend(zip([key for key, _, _ in overflow], batched_times(len(overflow), now)))
+    return results
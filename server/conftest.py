@@ -0,0 +1,13 @@
+"""
+Shared pytest fixtures
+"""
+import pytest
+
+import database as db
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point the database module at a fresh, migrated database for one test"""
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    db.init_db()
+    return db
@@ -7,11 +7,239 @@ import sqlite3
 import os
 import datetime
 import json
-from typing import Dict, List, Any, Optional, Union
+import threading
+import time
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
 
 # Database initialization
 DB_PATH = os.path.join(os.path.dirname(__file__), 'commits.db')
 
+# Connection tuning: how long a writer waits for a lock, page cache and
+# memory-mapped I/O sizes, and prepared statements kept per connection
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.environ.get("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.environ.get("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_CACHED_STATEMENTS = int(os.environ.get("DB_CACHED_STATEMENTS", "256"))
+
+# Published stats of processes that stopped reporting are dropped after this long
+PROCESS_STATS_MAX_AGE = 86400
+
+# Rows fetched per query when streaming a whole commit history
+COMMIT_EXPORT_BATCH_SIZE = int(os.environ.get("COMMIT_EXPORT_BATCH_SIZE", "500"))
+
+# One persistent connection per thread (sqlite3 connections can't be shared across threads)
+_local = threading.local()
+
+# Scheduled job states: pending jobs are claimed under a lease by an executor
+# and end up done (with the commit SHA) or failed; missed jobs can be skipped
+JOB_PENDING = 'pending'
+JOB_CLAIMED = 'claimed'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_SKIPPED = 'skipped'
+
+# Where a job came from: the user's plan (replaced whenever they are
+# re-planned) or outside it (rate-limit retries, catch-up, one-off commits),
+# which re-planning leaves alone
+JOB_SOURCE_PLAN = 'plan'
+JOB_SOURCE_EXTRA = 'extra'
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection with WAL mode and the tuned pragmas"""
+    conn = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                           cached_statements=DB_CACHED_STATEMENTS)
+    # WAL lets web workers keep reading while the scheduler writes; with WAL,
+    # synchronous=NORMAL only syncs at checkpoints and stays crash-safe
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}')
+    conn.execute(f'PRAGMA cache_size={-DB_CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size={DB_MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Get this thread's database connection, opening it on first use
+
+    The connection stays open for the life of the thread, so queries skip
+    connection setup and reuse their prepared statements. A new one is
+    opened if DB_PATH changes or the process has forked.
+
+    Returns:
+        SQLite connection
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.path != DB_PATH or _local.pid != os.getpid():
+        # A connection inherited through fork belongs to the parent; leave it be
+        if conn is not None and _local.pid == os.getpid():
+            conn.close()
+        conn = _connect()
+        _local.conn = conn
+        _local.path = DB_PATH
+        _local.pid = os.getpid()
+    return conn
+
+def _rollback() -> None:
+    """Roll back whatever a failed call left open on this thread's connection"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and conn.in_transaction:
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            pass
+
+def _count_commits(cursor: sqlite3.Cursor, username: str, repo_name: str, added: int) -> None:
+    """
+    Add newly inserted commits to a repository's total (in the caller's transaction)
+
+    Args:
+        cursor: Cursor inside the transaction that inserted the commits
+        username: GitHub username
+        repo_name: Repository name
+        added: Number of commit rows actually inserted
+    """
+    if added > 0:
+        cursor.execute(
+            '''INSERT INTO commit_counts (username, repo_name, total) VALUES (?, ?, ?)
+               ON CONFLICT (username, repo_name) DO UPDATE SET total = total + excluded.total''',
+            (username, repo_name, added)
+        )
+
+def _recount_commits(cursor: sqlite3.Cursor) -> None:
+    """Rebuild every repository's total from the commits table (in the caller's transaction)"""
+    cursor.execute('DELETE FROM commit_counts')
+    cursor.execute('''INSERT INTO commit_counts (username, repo_name, total)
+                      SELECT username, repo_name, COUNT(*) FROM commits GROUP BY username, repo_name''')
+
+def _add_missing_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]) -> None:
+    """
+    Add columns that a table created by an older version doesn't have yet
+
+    Args:
+        cursor: Open cursor
+        table: Table name
+        columns: Dictionary of column name to column definition
+    """
+    cursor.execute(f'PRAGMA table_info({table})')
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+def _migrate_commits_history_index(cursor: sqlite3.Cursor) -> None:
+    """Let history queries walk an index instead of scanning and sorting commits"""
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_commits_user_repo_time
+                      ON commits (username, repo_name, timestamp)''')
+
+def _migrate_commits_unique_sha(cursor: sqlite3.Cursor) -> None:
+    """Record each commit once: drop duplicate SHAs (keeping the first row) and enforce it"""
+    cursor.execute('''DELETE FROM commits WHERE id NOT IN
+                      (SELECT MIN(id) FROM commits GROUP BY commit_sha)''')
+    if cursor.rowcount:
+        print(f"Removed {cursor.rowcount} duplicate commit rows")
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_commits_sha ON commits (commit_sha)')
+
+def _migrate_commit_counts(cursor: sqlite3.Cursor) -> None:
+    """Keep per-repository commit totals so status doesn't count the history"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS commit_counts (
+                          username TEXT NOT NULL,
+                          repo_name TEXT NOT NULL,
+                          total INTEGER NOT NULL DEFAULT 0,
+                          PRIMARY KEY (username, repo_name)
+                      ) WITHOUT ROWID''')
+    _recount_commits(cursor)
+
+def _migrate_repo_heads(cursor: sqlite3.Cursor) -> None:
+    """Share branch heads from push webhooks with the scheduler worker"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS repo_heads (
+                          owner TEXT NOT NULL,
+                          repo_name TEXT NOT NULL,
+                          default_branch TEXT,
+                          head_sha TEXT,
+                          tree_sha TEXT,
+                          pushed_at REAL NOT NULL,
+                          PRIMARY KEY (owner, repo_name)
+                      ) WITHOUT ROWID''')
+
+def _migrate_scheduled_jobs_source(cursor: sqlite3.Cursor) -> None:
+    """Tell planned jobs from retried and caught-up ones so re-planning keeps the latter"""
+    cursor.execute(f"ALTER TABLE scheduled_jobs ADD COLUMN source TEXT NOT NULL DEFAULT '{JOB_SOURCE_PLAN}'")
+
+def _migrate_users_business_hours(cursor: sqlite3.Cursor) -> None:
+    """Per-user business hours and a marker telling the scheduler leader to re-plan"""
+    # NULL hours mean the planner defaults in server time. Databases from
+    # before migrations were tracked may already have some of these columns
+    _add_missing_columns(cursor, 'users', {
+        'timezone': 'TEXT',
+        'business_start_hour': 'INTEGER',
+        'business_end_hour': 'INTEGER',
+        'schedule_updated_at': 'REAL'
+    })
+
+def _migrate_scheduled_jobs_outbox(cursor: sqlite3.Cursor) -> None:
+    """Outbox state for each scheduled job"""
+    _add_missing_columns(cursor, 'scheduled_jobs', {
+        'status': f"TEXT NOT NULL DEFAULT '{JOB_PENDING}'",
+        'claimed_by': 'TEXT',
+        'lease_until': 'INTEGER',
+        'attempts': 'INTEGER NOT NULL DEFAULT 0',
+        'commit_sha': 'TEXT'
+    })
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_status_due ON scheduled_jobs (status, due_at)')
+
+def _migrate_process_stats(cursor: sqlite3.Cursor) -> None:
+    """Let the web app show the scheduler worker's planning progress and client counters"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS process_stats (
+                          process TEXT PRIMARY KEY,
+                          stats TEXT NOT NULL,
+                          updated_at REAL NOT NULL
+                      )''')
+
+def _migrate_repo_heads_pushed_at(cursor: sqlite3.Cursor) -> None:
+    """Let the repository cache poll for newly pushed heads without scanning them all"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_repo_heads_pushed_at ON repo_heads (pushed_at)')
+
+# Schema migrations, applied in order on top of the tables init_db creates.
+# PRAGMA user_version holds how many have run; only ever append to this list.
+MIGRATIONS = [
+    _migrate_commits_history_index,
+    _migrate_commits_unique_sha,
+    _migrate_commit_counts,
+    _migrate_users_business_hours,
+    _migrate_scheduled_jobs_outbox,
+    _migrate_repo_heads,
+    _migrate_scheduled_jobs_source,
+    _migrate_process_stats,
+    _migrate_repo_heads_pushed_at,
+]
+
+def _run_migrations(conn: sqlite3.Connection) -> None:
+    """
+    Apply the migrations this database hasn't had yet
+
+    Each migration runs in its own transaction together with the version
+    bump, so a failed one leaves the database at the previous version.
+    Processes starting at the same time take turns on the write lock and
+    re-check the version, so each migration runs once.
+
+    Args:
+        conn: Open connection with no transaction in progress
+    """
+    cursor = conn.cursor()
+    while True:
+        cursor.execute('BEGIN IMMEDIATE')
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version >= len(MIGRATIONS):
+            cursor.execute('COMMIT')
+            return
+
+        migration = MIGRATIONS[version]
+        print(f"Migrating database to version {version + 1}: {migration.__doc__}")
+        migration(cursor)
+        cursor.execute(f'PRAGMA user_version = {version + 1}')
+        cursor.execute('COMMIT')
+
 def init_db():
     """Initialize the SQLite database"""
     # Ensure the directory exists
@@ -20,7 +248,7 @@ def init_db():
         os.makedirs(db_dir, exist_ok=True)
 
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         cursor = conn.cursor()
 
         # Create commits table if it doesn't exist
@@ -46,10 +274,34 @@ def init_db():
         )
         ''')
 
+        # Upcoming commits: one small row per commit, credentials stay in users.
+        # user_id is the users rowid (stable as long as the database isn't VACUUMed)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scheduled_jobs (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            due_at INTEGER NOT NULL
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_due ON scheduled_jobs (due_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_user_due ON scheduled_jobs (user_id, due_at)')
+
+        # Lease row held by the process that runs the scheduler
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scheduler_lease (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            heartbeat_at REAL NOT NULL
+        )
+        ''')
+
         conn.commit()
-        conn.close()
+
+        _run_migrations(conn)
 
     except Exception as e:
+        _rollback()
         print(f"Error initializing database: {str(e)}")
         raise
 
@@ -70,27 +322,71 @@ def record_commit(username: str, repo_name: str, commit_sha: str, commit_message
     try:
         print(f"Recording commit {commit_sha[:7]} for {username}/{repo_name}")
         
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         cursor = conn.cursor()
         
         timestamp = datetime.datetime.now().isoformat()
         
         cursor.execute(
-            '''INSERT INTO commits (username, repo_name, commit_sha, commit_message, commit_url, timestamp)
+            '''INSERT OR IGNORE INTO commits (username, repo_name, commit_sha, commit_message, commit_url, timestamp)
                VALUES (?, ?, ?, ?, ?, ?)''',
             (username, repo_name, commit_sha, commit_message, commit_url, timestamp)
         )
+        # Already-recorded SHAs are ignored and not counted again
+        _count_commits(cursor, username, repo_name, cursor.rowcount)
         
         conn.commit()
-        conn.close()
         
         print(f"Successfully recorded commit {commit_sha[:7]}")
         return True
         
     except Exception as e:
+        _rollback()
         print(f"Error recording commit: {str(e)}")
         return False
 
+def record_commits_bulk(username: str, repo_name: str, commits: List[Tuple[str, str, str]]) -> int:
+    """
+    Record many commits to one repository in a single transaction
+
+    Commits whose SHA is already recorded (for example a scheduled commit
+    echoed back by the push webhook, or a redelivered webhook) are left
+    as they are and not counted again.
+
+    Args:
+        username: GitHub username
+        repo_name: Repository name
+        commits: List of (commit_sha, commit_message, commit_url)
+
+    Returns:
+        Number of commits newly recorded, or -1 on error
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        timestamp = datetime.datetime.now().isoformat()
+        changes_before = conn.total_changes
+        cursor.executemany(
+            '''INSERT INTO commits (username, repo_name, commit_sha, commit_message, commit_url, timestamp)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (commit_sha) DO NOTHING''',
+            [(username, repo_name, commit_sha, commit_message, commit_url, timestamp)
+             for commit_sha, commit_message, commit_url in commits]
+        )
+        inserted = conn.total_changes - changes_before
+        _count_commits(cursor, username, repo_name, inserted)
+
+        conn.commit()
+
+        print(f"Recorded {inserted} of {len(commits)} commits for {username}/{repo_name}")
+        return inserted
+
+    except Exception as e:
+        _rollback()
+        print(f"Error recording commits: {str(e)}")
+        return -1
+
 def get_user_commits(username: str, repo_name: str, limit: Optional[int] = 10) -> List[Dict[str, Any]]:
     """
     Get commit history for a user's repository
@@ -106,27 +402,26 @@ def get_user_commits(username: str, repo_name: str, limit: Optional[int] = 10) -
     try:
         print(f"Getting commits for {username}/{repo_name} with limit {limit}")
         
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row  # Return results as dictionaries
+        conn = get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row  # Return results as dictionaries
         
         if limit:
             cursor.execute(
                 '''SELECT * FROM commits 
                    WHERE username = ? AND repo_name = ? 
-                   ORDER BY timestamp DESC LIMIT ?''',
+                   ORDER BY timestamp DESC, id DESC LIMIT ?''',
                 (username, repo_name, limit)
             )
         else:
             cursor.execute(
                 '''SELECT * FROM commits 
                    WHERE username = ? AND repo_name = ? 
-                   ORDER BY timestamp DESC''',
+                   ORDER BY timestamp DESC, id DESC''',
                 (username, repo_name)
             )
         
         commits = [dict(row) for row in cursor.fetchall()]
-        conn.close()
         
         print(f"Found {len(commits)} commits for {username}/{repo_name}")
         return commits
@@ -135,6 +430,125 @@ def get_user_commits(username: str, repo_name: str, limit: Optional[int] = 10) -
         print(f"Error getting user commits: {str(e)}")
         return []
 
+def get_commits_page(username: str, repo_name: str, limit: int,
+                     before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+    """
+    Get one page of commit history, newest first
+
+    Pages are keyed on (timestamp, id) rather than an offset, so each page
+    is a short walk of idx_commits_user_repo_time however deep it is.
+
+    Args:
+        username: GitHub username
+        repo_name: Repository name
+        limit: Maximum number of commits to return
+        before: (timestamp, id) of the last commit of the previous page, None for the first page
+
+    Returns:
+        List of commit dictionaries
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+
+        if before is None:
+            cursor.execute(
+                '''SELECT * FROM commits
+                   WHERE username = ? AND repo_name = ?
+                   ORDER BY timestamp DESC, id DESC LIMIT ?''',
+                (username, repo_name, limit)
+            )
+        else:
+            cursor.execute(
+                '''SELECT * FROM commits
+                   WHERE username = ? AND repo_name = ? AND (timestamp, id) < (?, ?)
+                   ORDER BY timestamp DESC, id DESC LIMIT ?''',
+                (username, repo_name, before[0], before[1], limit)
+            )
+
+        return [dict(row) for row in cursor.fetchall()]
+
+    except Exception as e:
+        print(f"Error getting commits page: {str(e)}")
+        return []
+
+def iter_user_commits(username: str, repo_name: str,
+                      batch_size: int = COMMIT_EXPORT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yield a repository's whole commit history, newest first
+
+    Fetches one keyset page at a time, so memory stays flat and no read
+    transaction is held open while the caller consumes rows.
+
+    Args:
+        username: GitHub username
+        repo_name: Repository name
+        batch_size: Rows fetched per query
+
+    Yields:
+        Commit dictionaries
+    """
+    before = None
+    while True:
+        page = get_commits_page(username, repo_name, batch_size, before)
+        yield from page
+        if len(page) < batch_size:
+            return
+        before = (page[-1]["timestamp"], page[-1]["id"])
+
+def get_commit_count(username: str, repo_name: str) -> int:
+    """
+    Get the number of commits recorded for a repository
+
+    Args:
+        username: GitHub username
+        repo_name: Repository name
+
+    Returns:
+        Number of commits (0 if none or on error)
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT total FROM commit_counts WHERE username = ? AND repo_name = ?',
+                       (username, repo_name))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    except Exception as e:
+        print(f"Error getting commit count: {str(e)}")
+        return 0
+
+def backfill_commit_counts() -> int:
+    """
+    Recompute every repository's commit total from the commits table
+
+    The totals are kept up to date as commits are recorded; this repairs
+    them after commits were added or removed by other means.
+
+    Returns:
+        Number of repositories counted
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('BEGIN IMMEDIATE')
+        _recount_commits(cursor)
+        cursor.execute('SELECT COUNT(*) FROM commit_counts')
+        repositories = cursor.fetchone()[0]
+        cursor.execute('COMMIT')
+
+        print(f"Backfilled commit counts for {repositories} repositories")
+        return repositories
+
+    except Exception as e:
+        _rollback()
+        print(f"Error backfilling commit counts: {str(e)}")
+        return 0
+
 def store_user_token(username: str, token: str, repo_name: Optional[str] = None, webhook_secret: Optional[str] = None) -> bool:
     """
     Store user token securely
@@ -149,9 +563,9 @@ def store_user_token(username: str, token: str, repo_name: Optional[str] = None,
         True if successful, False otherwise
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
 
         # Check if user already exists and has a repository
         cursor.execute('SELECT repo_name FROM users WHERE username = ?', (username,))
@@ -166,18 +580,28 @@ def store_user_token(username: str, token: str, repo_name: Optional[str] = None,
             )
             print(f"Updated token for {username} while preserving existing repository {existing_user['repo_name']}")
         else:
-            # Either user doesn't exist, or we're explicitly setting a new repo_name
+            # Either user doesn't exist, or we're explicitly setting a new repo_name.
+            # Update in place: scheduled_jobs refer to the user's rowid, which
+            # REPLACE would change by deleting and reinserting the row, and the
+            # time zone and business hours columns are left as the user set them.
+            # Plans depend on the repository, so a new one asks for a re-plan
             cursor.execute(
-                '''INSERT OR REPLACE INTO users (username, token, repo_name, webhook_secret)
-                   VALUES (?, ?, ?, ?)''',
-                (username, token, repo_name, webhook_secret)
+                '''INSERT INTO users (username, token, repo_name, webhook_secret)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT (username) DO UPDATE SET
+                       token = excluded.token,
+                       repo_name = excluded.repo_name,
+                       webhook_secret = excluded.webhook_secret,
+                       schedule_updated_at = CASE WHEN users.repo_name IS excluded.repo_name
+                                                  THEN users.schedule_updated_at ELSE ? END''',
+                (username, token, repo_name, webhook_secret, datetime.datetime.now().timestamp())
             )
 
         conn.commit()
-        conn.close()
         return True
 
     except Exception as e:
+        _rollback()
         print(f"Error storing user token: {str(e)}")
         return False
 
@@ -193,13 +617,12 @@ def get_user_token(username: str) -> Optional[Dict[str, Any]]:
     """
     try:
         print(f"Getting token and repository data for user: {username}")
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
 
         cursor.execute('SELECT token, repo_name, webhook_secret FROM users WHERE username = ?', (username,))
         user_data = cursor.fetchone()
-        conn.close()
 
         if user_data:
             result = dict(user_data)
@@ -226,13 +649,16 @@ def get_user(username: str) -> Optional[Dict[str, Any]]:
     try:
         print(f"Getting user information for {username}")
         
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
         
-        cursor.execute('SELECT username, token, repo_name FROM users WHERE username = ?', (username,))
+        cursor.execute(
+            '''SELECT username, token, repo_name, timezone, business_start_hour, business_end_hour
+               FROM users WHERE username = ?''',
+            (username,)
+        )
         user_data = cursor.fetchone()
-        conn.close()
         
         if user_data:
             print(f"Found user information for {username}")
@@ -260,7 +686,7 @@ def store_webhook_secret(username: str, repo_name: str, webhook_secret: str) ->
     try:
         print(f"Storing webhook secret for {username}/{repo_name}")
         
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         cursor = conn.cursor()
         
         cursor.execute(
@@ -269,12 +695,12 @@ def store_webhook_secret(username: str, repo_name: str, webhook_secret: str) ->
         )
         
         conn.commit()
-        conn.close()
         
         print(f"Successfully stored webhook secret for {username}/{repo_name}")
         return True
         
     except Exception as e:
+        _rollback()
         print(f"Error storing webhook secret: {str(e)}")
         return False
 
@@ -292,13 +718,12 @@ def get_webhook_secret(username: str, repo_name: str) -> Optional[str]:
     try:
         print(f"Getting webhook secret for {username}/{repo_name}")
         
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         cursor = conn.cursor()
         
         cursor.execute('SELECT webhook_secret FROM users WHERE username = ? AND repo_name = ?', 
                       (username, repo_name))
         result = cursor.fetchone()
-        conn.close()
         
         if result and result[0]:
             print(f"Found webhook secret for {username}/{repo_name}")
@@ -316,23 +741,792 @@ def get_users_with_repositories() -> List[Dict[str, Any]]:
     Get all users who have repositories created through the platform
     
     Returns:
-        List of user dictionaries with username, token, and repo_name
+        List of user dictionaries with id, username, token, repo_name, business
+        hours settings and schedule_updated_at
     """
     try:
         print("Getting all users with repositories")
         
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
         
-        cursor.execute('SELECT username, token, repo_name FROM users WHERE repo_name IS NOT NULL')
+        cursor.execute(
+            '''SELECT rowid AS id, username, token, repo_name, timezone, business_start_hour,
+                      business_end_hour, schedule_updated_at
+               FROM users WHERE repo_name IS NOT NULL'''
+        )
         users = [dict(row) for row in cursor.fetchall()]
         
-        conn.close()
         
         print(f"Found {len(users)} users with repositories")
         return users
         
     except Exception as e:
         print(f"Error getting users with repositories: {str(e)}")
-        return []
\ No newline at end of file
+        return []
+
+def update_business_hours(username: str, timezone: Optional[str], start_hour: Optional[int],
+                          end_hour: Optional[int]) -> bool:
+    """
+    Store a user's time zone and business hours
+
+    Args:
+        username: GitHub username
+        timezone: IANA time zone name, or None for server time
+        start_hour: First hour commits may land in, or None for the default
+        end_hour: Hour commits stop, or None for the default
+
+    Returns:
+        True if the user exists and was updated, False otherwise
+    """
+    try:
+        print(f"Updating business hours for {username}: {timezone} {start_hour}-{end_hour}")
+
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            '''UPDATE users SET timezone = ?, business_start_hour = ?, business_end_hour = ?,
+                                schedule_updated_at = ?
+               WHERE username = ?''',
+            (timezone, start_hour, end_hour, datetime.datetime.now().timestamp(), username)
+        )
+        updated = cursor.rowcount > 0
+
+        conn.commit()
+        return updated
+
+    except Exception as e:
+        _rollback()
+        print(f"Error updating business hours: {str(e)}")
+        return False
+
+def store_pushed_head(owner: str, repo_name: str, default_branch: Optional[str],
+                      head_sha: Optional[str], tree_sha: Optional[str]) -> bool:
+    """
+    Store the branch head reported by a push webhook
+
+    Webhooks arrive at the web app while commits run in the scheduler
+    worker; the worker's repository cache picks heads up from here.
+
+    Args:
+        owner: Repository owner (lowercase)
+        repo_name: Repository name (lowercase)
+        default_branch: Default branch name
+        head_sha: New head SHA, or None if the branch was deleted
+        tree_sha: Tree SHA of the new head, if known
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            '''INSERT INTO repo_heads (owner, repo_name, default_branch, head_sha, tree_sha, pushed_at)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (owner, repo_name) DO UPDATE SET
+                   default_branch = excluded.default_branch,
+                   head_sha = excluded.head_sha,
+                   tree_sha = excluded.tree_sha,
+                   pushed_at = excluded.pushed_at''',
+            (owner, repo_name, default_branch, head_sha, tree_sha, time.time())
+        )
+
+        conn.commit()
+        return True
+
+    except Exception as e:
+        _rollback()
+        print(f"Error storing pushed head: {str(e)}")
+        return False
+
+def get_pushed_heads_since(since: float) -> List[Dict[str, Any]]:
+    """
+    Get the branch heads push webhooks reported since a point in time
+
+    Args:
+        since: Epoch seconds; heads pushed before this are left out
+
+    Returns:
+        List of dictionaries with owner, repo_name, default_branch, head_sha,
+        tree_sha and pushed_at, oldest first
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+
+        cursor.execute(
+            '''SELECT owner, repo_name, default_branch, head_sha, tree_sha, pushed_at FROM repo_heads
+               WHERE pushed_at >= ? ORDER BY pushed_at''',
+            (since,)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+    except Exception as e:
+        print(f"Error getting pushed heads: {str(e)}")
+        return []
+
+def acquire_lease(name: str, holder: str, ttl: float) -> bool:
+    """
+    Take or renew a named lease
+
+    The lease is granted if nobody holds it, the caller already holds it,
+    or the current holder's lease has expired. The check and the write
+    happen in one statement, so two processes can't both win.
+
+    Args:
+        name: Lease name
+        holder: Unique ID of the calling process
+        ttl: Seconds the lease stays valid without a renewal
+
+    Returns:
+        True if the caller holds the lease afterwards, False otherwise
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        now = datetime.datetime.now().timestamp()
+        cursor.execute(
+            '''INSERT INTO scheduler_lease (name, holder, expires_at, heartbeat_at)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(name) DO UPDATE SET
+                   holder = excluded.holder,
+                   expires_at = excluded.expires_at,
+                   heartbeat_at = excluded.heartbeat_at
+               WHERE scheduler_lease.holder = excluded.holder
+                  OR scheduler_lease.expires_at < excluded.heartbeat_at''',
+            (name, holder, now + ttl, now)
+        )
+        acquired = cursor.rowcount == 1
+
+        conn.commit()
+        return acquired
+
+    except Exception as e:
+        _rollback()
+        print(f"Error acquiring lease {name}: {str(e)}")
+        return False
+
+def release_lease(name: str, holder: str) -> bool:
+    """
+    Give up a lease so another process can take it immediately
+
+    The row is expired rather than deleted: its heartbeat_at tells the next
+    holder since when nobody has been dispatching.
+
+    Args:
+        name: Lease name
+        holder: Unique ID of the calling process
+
+    Returns:
+        True if the caller held the lease, False otherwise
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('UPDATE scheduler_lease SET expires_at = ? WHERE name = ? AND holder = ?',
+                       (datetime.datetime.now().timestamp(), name, holder))
+        released = cursor.rowcount == 1
+
+        conn.commit()
+        return released
+
+    except Exception as e:
+        _rollback()
+        print(f"Error releasing lease {name}: {str(e)}")
+        return False
+
+def get_lease(name: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the current holder of a lease
+
+    Args:
+        name: Lease name
+
+    Returns:
+        Dictionary with holder, expires_at and heartbeat_at, or None if not held
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+
+        cursor.execute('SELECT holder, expires_at, heartbeat_at FROM scheduler_lease WHERE name = ?', (name,))
+        lease = cursor.fetchone()
+
+        return dict(lease) if lease else None
+
+    except Exception as e:
+        print(f"Error getting lease {name}: {str(e)}")
+        return None
+
+def store_process_stats(process: str, stats: Dict[str, Any]) -> bool:
+    """
+    Publish a process's stats for other processes to read
+
+    Args:
+        process: Unique ID of the publishing process
+        stats: JSON-serializable stats dictionary
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        now = time.time()
+        cursor.execute(
+            '''INSERT INTO process_stats (process, stats, updated_at) VALUES (?, ?, ?)
+               ON CONFLICT (process) DO UPDATE SET stats = excluded.stats, updated_at = excluded.updated_at''',
+            (process, json.dumps(stats, default=str), now)
+        )
+        cursor.execute('DELETE FROM process_stats WHERE updated_at < ?', (now - PROCESS_STATS_MAX_AGE,))
+
+        conn.commit()
+        return True
+
+    except Exception as e:
+        _rollback()
+        print(f"Error storing process stats: {str(e)}")
+        return False
+
+def get_process_stats(since: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the stats processes published recently
+
+    Args:
+        since: Epoch seconds; processes that last published before this are left out
+
+    Returns:
+        Dictionary of process ID to {"updated_at": ..., "stats": {...}}
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT process, stats, updated_at FROM process_stats WHERE updated_at >= ?', (since,))
+        return {process: {"updated_at": updated_at, "stats": json.loads(stats)}
+                for process, stats, updated_at in cursor.fetchall()}
+
+    except Exception as e:
+        print(f"Error getting process stats: {str(e)}")
+        return {}
+
+def get_user_id(username: str) -> Optional[int]:
+    """
+    Get the numeric id scheduled jobs use for a user
+
+    Args:
+        username: GitHub username
+
+    Returns:
+        User id, or None if the user doesn't exist
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT rowid FROM users WHERE username = ?', (username,))
+        row = cursor.fetchone()
+
+        return row[0] if row else None
+
+    except Exception as e:
+        print(f"Error getting user id: {str(e)}")
+        return None
+
+def replace_scheduled_jobs(jobs_by_user: Dict[int, List[float]]) -> int:
+    """
+    Replace the pending (unclaimed) planned commits of a set of users
+
+    Jobs added or moved outside the plan (retries, catch-up) are kept.
+
+    Args:
+        jobs_by_user: Dictionary of user id to due times in epoch seconds
+
+    Returns:
+        Number of jobs written
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        # Jobs already claimed or finished are left alone
+        cursor.executemany('DELETE FROM scheduled_jobs WHERE user_id = ? AND status = ? AND source = ?',
+                           [(user_id, JOB_PENDING, JOB_SOURCE_PLAN) for user_id in jobs_by_user])
+        rows = [(user_id, int(due_at)) for user_id, due_times in jobs_by_user.items() for due_at in due_times]
+        cursor.executemany('INSERT INTO scheduled_jobs (user_id, due_at) VALUES (?, ?)', rows)
+
+        conn.commit()
+        return len(rows)
+
+    except Exception as e:
+        _rollback()
+        print(f"Error replacing scheduled jobs: {str(e)}")
+        return 0
+
+def get_extra_jobs(user_ids: List[int]) -> Dict[int, List[int]]:
+    """
+    Get the pending jobs outside the plan of a set of users
+
+    Args:
+        user_ids: User ids
+
+    Returns:
+        Dictionary of user id to due times, for users that have any
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        jobs: Dict[int, List[int]] = {}
+        for user_id in user_ids:
+            cursor.execute(
+                '''SELECT due_at FROM scheduled_jobs
+                   WHERE user_id = ? AND status = ? AND source = ? ORDER BY due_at''',
+                (user_id, JOB_PENDING, JOB_SOURCE_EXTRA)
+            )
+            due_times = [row[0] for row in cursor.fetchall()]
+            if due_times:
+                jobs[user_id] = due_times
+
+        return jobs
+
+    except Exception as e:
+        print(f"Error getting extra jobs: {str(e)}")
+        return {}
+
+def add_scheduled_job(username: str, due_at: float) -> bool:
+    """
+    Add one pending commit for a user, outside their plan
+
+    Args:
+        username: GitHub username
+        due_at: Epoch seconds when the commit should run
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            '''INSERT INTO scheduled_jobs (user_id, due_at, source)
+               SELECT rowid, ?, ? FROM users WHERE username = ?''',
+            (int(due_at), JOB_SOURCE_EXTRA, username)
+        )
+        added = cursor.rowcount == 1
+
+        conn.commit()
+        return added
+
+    except Exception as e:
+        _rollback()
+        print(f"Error adding scheduled job: {str(e)}")
+        return False
+
+def get_scheduled_jobs(since: float) -> List[Tuple[str, int]]:
+    """
+    Get every unclaimed commit due at or after a time
+
+    Args:
+        since: Epoch seconds
+
+    Returns:
+        List of (username, due_at) in due order
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            '''SELECT users.username, scheduled_jobs.due_at
+               FROM scheduled_jobs JOIN users ON users.rowid = scheduled_jobs.user_id
+               WHERE scheduled_jobs.status = ? AND scheduled_jobs.due_at >= ?
+               ORDER BY scheduled_jobs.due_at''',
+            (JOB_PENDING, int(since))
+        )
+        jobs = cursor.fetchall()
+
+        return jobs
+
+    except Exception as e:
+        print(f"Error getting scheduled jobs: {str(e)}")
+        return []
+
+def get_next_scheduled_job(username: str, since: float) -> Tuple[Optional[int], int]:
+    """
+    Get a user's next pending commit and how many are pending
+
+    Both come from the (user_id, due_at) index without touching other users.
+
+    Args:
+        username: GitHub username
+        since: Epoch seconds; earlier jobs are ignored
+
+    Returns:
+        Tuple of (next due_at or None, number of pending commits)
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            '''SELECT MIN(due_at), COUNT(*) FROM scheduled_jobs
+               WHERE user_id = (SELECT rowid FROM users WHERE username = ?) AND due_at >= ? AND status = ?''',
+            (username, int(since), JOB_PENDING)
+        )
+        next_due, count = cursor.fetchone()
+
+        return next_due, count
+
+    except Exception as e:
+        print(f"Error getting next scheduled job: {str(e)}")
+        return None, 0
+
+def delete_scheduled_jobs_before(before: float) -> int:
+    """
+    Delete jobs that were due before a time
+
+    Claimed jobs are kept so an expired claim can still be recovered.
+
+    Args:
+        before: Epoch seconds
+
+    Returns:
+        Number of jobs deleted
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('DELETE FROM scheduled_jobs WHERE due_at < ? AND status != ?', (int(before), JOB_CLAIMED))
+        deleted = cursor.rowcount
+
+        conn.commit()
+        return deleted
+
+    except Exception as e:
+        _rollback()
+        print(f"Error deleting old scheduled jobs: {str(e)}")
+        return 0
+
+def claim_job(username: str, due_at: float, worker_id: str, now: float,
+              lease_seconds: float) -> Optional[Dict[str, Any]]:
+    """
+    Claim one of a user's jobs for execution
+
+    A job can be claimed if it is pending or its previous claim has expired
+    (the executor died before finishing it).
+
+    Args:
+        username: GitHub username
+        due_at: Epoch seconds the job is due
+        worker_id: ID of the claiming executor
+        now: Epoch seconds; claims that expired before this can be taken over
+        lease_seconds: Seconds the claim is valid
+
+    Returns:
+        Dictionary with id, user_id, due_at and attempts, or None if the job
+        doesn't exist or someone else holds it
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+
+        now = int(now)
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(
+            '''SELECT id, user_id, due_at, attempts FROM scheduled_jobs
+               WHERE user_id = (SELECT rowid FROM users WHERE username = ?) AND due_at = ?
+                 AND (status = ? OR (status = ? AND lease_until < ?))
+               ORDER BY id LIMIT 1''',
+            (username, int(due_at), JOB_PENDING, JOB_CLAIMED, now)
+        )
+        job = cursor.fetchone()
+        if job:
+            cursor.execute(
+                '''UPDATE scheduled_jobs SET status = ?, claimed_by = ?, lease_until = ?, attempts = attempts + 1
+                   WHERE id = ?''',
+                (JOB_CLAIMED, worker_id, now + int(lease_seconds), job['id'])
+            )
+        cursor.execute('COMMIT')
+
+        if not job:
+            return None
+        job = dict(job)
+        job['attempts'] += 1
+        return job
+
+    except Exception as e:
+        _rollback()
+        print(f"Error claiming job: {str(e)}")
+        return None
+
+def claim_due_jobs(worker_id: str, now: float, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+    """
+    Claim a batch of due jobs, including ones whose claim has expired
+
+    Executors can call this concurrently; each job is handed to one of them.
+
+    Args:
+        worker_id: ID of the claiming executor
+        now: Epoch seconds; jobs due at or before this are claimed
+        limit: Maximum number of jobs to claim
+        lease_seconds: Seconds the claims are valid
+
+    Returns:
+        List of dictionaries with id, user_id, username, due_at and attempts
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+
+        now = int(now)
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(
+            '''SELECT scheduled_jobs.id, scheduled_jobs.user_id, users.username,
+                      scheduled_jobs.due_at, scheduled_jobs.attempts + 1 AS attempts
+               FROM scheduled_jobs JOIN users ON users.rowid = scheduled_jobs.user_id
+               WHERE (scheduled_jobs.status = ? AND scheduled_jobs.due_at <= ?)
+                  OR (scheduled_jobs.status = ? AND scheduled_jobs.lease_until < ?)
+               ORDER BY scheduled_jobs.due_at LIMIT ?''',
+            (JOB_PENDING, now, JOB_CLAIMED, now, limit)
+        )
+        jobs = [dict(row) for row in cursor.fetchall()]
+        cursor.executemany(
+            '''UPDATE scheduled_jobs SET status = ?, claimed_by = ?, lease_until = ?, attempts = attempts + 1
+               WHERE id = ?''',
+            [(JOB_CLAIMED, worker_id, now + int(lease_seconds), job['id']) for job in jobs]
+        )
+        cursor.execute('COMMIT')
+
+        return jobs
+
+    except Exception as e:
+        _rollback()
+        print(f"Error claiming due jobs: {str(e)}")
+        return []
+
+def complete_job(job_id: int, username: str, repo_name: str, commit_sha: str,
+                 commit_message: str, commit_url: str) -> bool:
+    """
+    Mark a job done and record its commit in one transaction
+
+    Args:
+        job_id: Scheduled job ID
+        username: GitHub username
+        repo_name: Repository name
+        commit_sha: SHA of the commit the job produced
+        commit_message: Commit message
+        commit_url: URL to the commit on GitHub
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        print(f"Completing job {job_id} with commit {commit_sha[:7]} for {username}/{repo_name}")
+
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            'UPDATE scheduled_jobs SET status = ?, commit_sha = ?, lease_until = NULL WHERE id = ?',
+            (JOB_DONE, commit_sha, job_id)
+        )
+        cursor.execute(
+            '''INSERT OR IGNORE INTO commits (username, repo_name, commit_sha, commit_message, commit_url, timestamp)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            (username, repo_name, commit_sha, commit_message, commit_url, datetime.datetime.now().isoformat())
+        )
+        _count_commits(cursor, username, repo_name, cursor.rowcount)
+
+        conn.commit()
+        return True
+
+    except Exception as e:
+        _rollback()
+        print(f"Error completing job: {str(e)}")
+        return False
+
+def fail_job(job_id: int) -> bool:
+    """
+    Mark a job failed so it isn't retried
+
+    Args:
+        job_id: Scheduled job ID
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('UPDATE scheduled_jobs SET status = ?, lease_until = NULL WHERE id = ?', (JOB_FAILED, job_id))
+
+        conn.commit()
+        return True
+
+    except Exception as e:
+        _rollback()
+        print(f"Error failing job: {str(e)}")
+        return False
+
+def release_job(job_id: int, due_at: float) -> bool:
+    """
+    Put a claimed job back as pending with a new due time
+
+    The job no longer follows the plan, so re-planning keeps it.
+
+    Args:
+        job_id: Scheduled job ID
+        due_at: New epoch seconds the job is due
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            '''UPDATE scheduled_jobs SET status = ?, due_at = ?, source = ?, claimed_by = NULL, lease_until = NULL
+               WHERE id = ?''',
+            (JOB_PENDING, int(due_at), JOB_SOURCE_EXTRA, job_id)
+        )
+
+        conn.commit()
+        return True
+
+    except Exception as e:
+        _rollback()
+        print(f"Error releasing job: {str(e)}")
+        return False
+
+def get_missed_jobs(since: float, until: float) -> List[Dict[str, Any]]:
+    """
+    Get unclaimed jobs whose due time passed without them running
+
+    Args:
+        since: Epoch seconds; older jobs are ignored
+        until: Epoch seconds; usually now
+
+    Returns:
+        List of dictionaries with id, user_id, username and due_at
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+
+        cursor.execute(
+            '''SELECT scheduled_jobs.id, scheduled_jobs.user_id, users.username, scheduled_jobs.due_at
+               FROM scheduled_jobs JOIN users ON users.rowid = scheduled_jobs.user_id
+               WHERE scheduled_jobs.status = ? AND scheduled_jobs.due_at >= ? AND scheduled_jobs.due_at < ?
+               ORDER BY scheduled_jobs.due_at''',
+            (JOB_PENDING, int(since), int(until))
+        )
+        jobs = [dict(row) for row in cursor.fetchall()]
+
+        return jobs
+
+    except Exception as e:
+        print(f"Error getting missed jobs: {str(e)}")
+        return []
+
+def get_user_ids_with_jobs(since: float) -> set:
+    """
+    Get the users that have any job (in any state) due at or after a time
+
+    Args:
+        since: Epoch seconds
+
+    Returns:
+        Set of user ids
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT DISTINCT user_id FROM scheduled_jobs WHERE due_at >= ?', (int(since),))
+        user_ids = {row[0] for row in cursor.fetchall()}
+
+        return user_ids
+
+    except Exception as e:
+        print(f"Error getting users with jobs: {str(e)}")
+        return set()
+
+def reschedule_jobs(updates: List[Tuple[int, float]]) -> int:
+    """
+    Move pending jobs to new due times (outside the plan, so re-planning keeps them)
+
+    Args:
+        updates: List of (job id, new due time in epoch seconds)
+
+    Returns:
+        Number of jobs updated
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.executemany('UPDATE scheduled_jobs SET due_at = ?, source = ? WHERE id = ? AND status = ?',
+                           [(int(due_at), JOB_SOURCE_EXTRA, job_id, JOB_PENDING) for job_id, due_at in updates])
+        updated = cursor.rowcount
+
+        conn.commit()
+        return updated
+
+    except Exception as e:
+        _rollback()
+        print(f"Error rescheduling jobs: {str(e)}")
+        return 0
+
+def skip_jobs(job_ids: List[int]) -> int:
+    """
+    Mark pending jobs as skipped
+
+    Args:
+        job_ids: Scheduled job IDs
+
+    Returns:
+        Number of jobs skipped
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.executemany('UPDATE scheduled_jobs SET status = ? WHERE id = ? AND status = ?',
+                           [(JOB_SKIPPED, job_id, JOB_PENDING) for job_id in job_ids])
+        skipped = cursor.rowcount
+
+        conn.commit()
+        return skipped
+
+    except Exception as e:
+        _rollback()
+        print(f"Error skipping jobs: {str(e)}")
+        return 0
+
+if __name__ == "__main__":
+    # Maintenance commands: python database.py backfill-counts
+    import sys
+
+    init_db()
+    if sys.argv[1:] == ["backfill-counts"]:
+        backfill_commit_counts()
+    else:
+        print("Usage: python database.py backfill-counts")
+        sys.exit(2)
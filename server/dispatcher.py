@@ -0,0 +1,296 @@
+"""
+Commit Dispatcher Module
+
+This module keeps upcoming commits in an in-memory min-heap of compact
+(due_time, user) entries and hands each one to a worker pool when it
+falls due. One thread sleeps until the earliest entry instead of a job
+store being scanned for every commit.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Worker threads that execute due commits
+DISPATCHER_WORKERS = int(os.environ.get("DISPATCHER_WORKERS", "10"))
+
+class CommitDispatcher:
+    """Min-heap dispatcher for scheduled commits"""
+
+    def __init__(self, handler: Callable[[str, float], None], max_workers: int = DISPATCHER_WORKERS,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize the dispatcher
+
+        Args:
+            handler: Called as handler(user, due_time) when an entry falls due
+            max_workers: Size of the worker pool running the handler
+            clock: Function returning the current time in epoch seconds
+        """
+        self.handler = handler
+        self.max_workers = max_workers
+        self.clock = clock
+
+        # Heap entries are (due_time, sequence, user, generation). Cancelling a
+        # user bumps their generation so old entries are skipped when popped.
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._generations: Dict[str, int] = {}
+
+        # Per-user heaps of live due times, so status lookups never touch
+        # the shared heap: the user's next commit is always at index 0
+        self._by_user: Dict[str, List[float]] = {}
+        self._stale = 0
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.dispatched = 0
+
+    def schedule(self, user: str, due_time: float) -> None:
+        """
+        Add a commit for a user at a given time
+
+        Args:
+            user: Username the commit belongs to
+            due_time: Epoch seconds when the commit should run
+        """
+        with self._condition:
+            generation = self._generations.get(user, 0)
+            heapq.heappush(self._heap, (due_time, next(self._sequence), user, generation))
+            heapq.heappush(self._by_user.setdefault(user, []), due_time)
+
+            # Wake the loop if this entry is now the earliest
+            if self._heap[0][0] == due_time:
+                self._condition.notify()
+
+    def schedule_many(self, user: str, due_times: List[float]) -> None:
+        """
+        Add several commits for a user
+
+        Args:
+            user: Username the commits belong to
+            due_times: Epoch seconds for each commit
+        """
+        for due_time in due_times:
+            self.schedule(user, due_time)
+
+    def schedule_batch(self, users: Sequence[str], user_index: Sequence[int], due_times: Sequence[float]) -> int:
+        """
+        Add many users' commits at once
+
+        Takes the flat (user_index, due_time) output of the batch planner and
+        rebuilds the heap once instead of pushing entry by entry.
+
+        Args:
+            users: Usernames that user_index points into
+            user_index: Index into users for each commit
+            due_times: Epoch seconds for each commit
+
+        Returns:
+            Number of commits added
+        """
+        # NumPy arrays become plain ints/floats here, keeping heap entries small
+        if hasattr(user_index, "tolist"):
+            user_index = user_index.tolist()
+        if hasattr(due_times, "tolist"):
+            due_times = due_times.tolist()
+
+        with self._condition:
+            generations = self._generations
+            for index, due_time in zip(user_index, due_times):
+                user = users[index]
+                self._heap.append((due_time, next(self._sequence), user, generations.get(user, 0)))
+                heapq.heappush(self._by_user.setdefault(user, []), due_time)
+            heapq.heapify(self._heap)
+            self._condition.notify()
+        return len(due_times)
+
+    def cancel_user(self, user: str) -> int:
+        """
+        Cancel every pending commit for a user
+
+        Args:
+            user: Username
+
+        Returns:
+            Number of commits cancelled
+        """
+        with self._condition:
+            cancelled = len(self._by_user.pop(user, ()))
+            if cancelled:
+                self._generations[user] = self._generations.get(user, 0) + 1
+                self._stale += cancelled
+                self._maybe_compact()
+            return cancelled
+
+    def _maybe_compact(self) -> None:
+        """Drop cancelled entries once they make up most of the heap (caller holds the lock)"""
+        if self._stale > 1024 and self._stale * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if self._is_live(entry)]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def _is_live(self, entry: Tuple[float, int, str, int]) -> bool:
+        """Whether a heap entry has not been cancelled (caller holds the lock)"""
+        return entry[3] == self._generations.get(entry[2], 0)
+
+    def pop_due(self, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Remove and return every entry due at or before a time
+
+        Args:
+            now: Epoch seconds (defaults to the dispatcher clock)
+
+        Returns:
+            List of (user, due_time) in due order
+        """
+        if now is None:
+            now = self.clock()
+
+        due = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if not self._is_live(entry):
+                    self._stale -= 1
+                    continue
+                # Entries leave the shared heap in due order, so this is
+                # also the smallest time in the user's own heap
+                user = entry[2]
+                user_times = self._by_user[user]
+                heapq.heappop(user_times)
+                if not user_times:
+                    del self._by_user[user]
+                due.append((user, entry[0]))
+        return due
+
+    def next_wakeup(self) -> Optional[float]:
+        """
+        Get the due time of the earliest live entry
+
+        Returns:
+            Epoch seconds, or None if nothing is scheduled
+        """
+        with self._condition:
+            while self._heap and not self._is_live(self._heap[0]):
+                heapq.heappop(self._heap)
+                self._stale -= 1
+            return self._heap[0][0] if self._heap else None
+
+    def pending_count(self, user: str) -> int:
+        """
+        Get the number of pending commits for a user
+
+        Args:
+            user: Username
+
+        Returns:
+            Number of pending commits
+        """
+        with self._condition:
+            return len(self._by_user.get(user, ()))
+
+    def next_due(self, user: str) -> Optional[float]:
+        """
+        Get the earliest pending commit time for a user
+
+        Args:
+            user: Username
+
+        Returns:
+            Epoch seconds, or None if the user has nothing pending
+        """
+        with self._condition:
+            user_times = self._by_user.get(user)
+            return user_times[0] if user_times else None
+
+    def size(self) -> int:
+        """Number of live entries across all users"""
+        with self._condition:
+            return len(self._heap) - self._stale
+
+    def clear(self) -> None:
+        """Drop every pending entry"""
+        with self._condition:
+            self._heap = []
+            self._generations = {}
+            self._by_user = {}
+            self._stale = 0
+            self._condition.notify()
+
+    def start(self) -> None:
+        """Start the dispatch thread and worker pool"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="commit-dispatch")
+            self._thread = threading.Thread(target=self._run, name="commit-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """
+        Stop dispatching
+
+        Args:
+            wait: Wait for running handlers to finish
+        """
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    def _run(self) -> None:
+        """Dispatch loop: sleep until the earliest entry, then hand out everything due"""
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                wakeup = self.next_wakeup()
+                now = self.clock()
+                if wakeup is None or wakeup > now:
+                    timeout = None if wakeup is None else wakeup - now
+                    self._condition.wait(timeout)
+                    continue
+
+            for user, due_time in self.pop_due():
+                self.dispatched += 1
+                self._executor.submit(self._invoke, user, due_time)
+
+    def submit(self, fn: Callable, *args) -> None:
+        """
+        Run other work on the dispatcher's worker pool
+
+        Args:
+            fn: Function to run
+            *args: Arguments for fn
+        """
+        if self._executor is None or not self._running:
+            raise RuntimeError("Dispatcher is not running")
+        self._executor.submit(self._invoke_work, fn, *args)
+
+    @staticmethod
+    def _invoke_work(fn: Callable, *args) -> None:
+        """Run submitted work, keeping worker threads alive on errors"""
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"Error running dispatcher work: {str(e)}")
+
+    def _invoke(self, user: str, due_time: float) -> None:
+        """Run the handler, keeping worker threads alive on errors"""
+        try:
+            self.handler(user, due_time)
+        except Exception as e:
+            print(f"Error dispatching commit for {user}: {str(e)}")
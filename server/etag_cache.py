@@ -0,0 +1,133 @@
+"""
+Conditional Request Cache Module
+
+This module keeps a bounded LRU cache of GitHub GET responses with their
+ETag and Last-Modified validators so repeat requests can be revalidated
+with If-None-Match / If-Modified-Since. GitHub doesn't count 304 responses
+against the rate limit.
+"""
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Maximum number of responses kept in the cache
+ETAG_CACHE_SIZE = int(os.environ.get("GITHUB_ETAG_CACHE_SIZE", "2048"))
+
+class ConditionalRequestCache:
+    """Bounded LRU cache of GET responses keyed by token, method and URL"""
+
+    def __init__(self, max_entries: int = ETAG_CACHE_SIZE):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of responses to keep
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "not_modified": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def _key(token: str, method: str, url: str) -> Tuple[str, str, str]:
+        """Responses differ per token, so the token digest is part of the key"""
+        token_key = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+        return (token_key, method.upper(), url)
+
+    def get_validators(self, token: str, method: str, url: str) -> Dict[str, str]:
+        """
+        Get the conditional request headers for a cached response
+
+        Args:
+            token: GitHub token
+            method: HTTP method
+            url: Full request URL
+
+        Returns:
+            Dictionary of headers to add to the request, empty on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(token, method, url))
+            if entry is None:
+                self._stats["misses"] += 1
+                return {}
+
+            self._stats["hits"] += 1
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            return headers
+
+    def get_cached(self, token: str, method: str, url: str) -> Optional[Any]:
+        """
+        Get the cached body after a 304 Not Modified response
+
+        Args:
+            token: GitHub token
+            method: HTTP method
+            url: Full request URL
+
+        Returns:
+            Copy of the cached response body, or None if it was evicted
+        """
+        key = self._key(token, method, url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["not_modified"] += 1
+            # Callers annotate response dicts, so never hand out the cached object
+            return copy.deepcopy(entry["data"])
+
+    def store(self, token: str, method: str, url: str, data: Any,
+              etag: Optional[str], last_modified: Optional[str]) -> None:
+        """
+        Store a successful response with its validators
+
+        Args:
+            token: GitHub token
+            method: HTTP method
+            url: Full request URL
+            data: Parsed response body
+            etag: ETag response header
+            last_modified: Last-Modified response header
+        """
+        if not etag and not last_modified:
+            return
+
+        key = self._key(token, method, url)
+        with self._lock:
+            self._entries[key] = {
+                "data": copy.deepcopy(data),
+                "etag": etag,
+                "last_modified": last_modified
+            }
+            self._entries.move_to_end(key)
+            self._stats["stores"] += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with entry count and hit, miss and 304 counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+            return stats
+
+# Create a global instance of the cache
+etag_cache = ConditionalRequestCache()
@@ -0,0 +1,479 @@
+"""
+Fake GitHub API Server Module
+
+This module runs a local stand-in for the parts of the GitHub REST and
+GraphQL APIs the app uses, backed by an in-memory object store. It sends
+rate limit headers and can add latency and inject errors, so the commit
+pipeline can be exercised and benchmarked without network access.
+
+Usage:
+    python fake_github.py --port 8765 --latency-ms 20 --error-rate 0.01
+
+Then point the app at it with GITHUB_API_URL=http://127.0.0.1:8765
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional, Tuple
+
+class FakeGitHubState:
+    """In-memory users, repositories and git objects"""
+
+    def __init__(self, rate_limit: int = 5000, graphql_rate_limit: int = 5000):
+        """
+        Initialize an empty store
+
+        Args:
+            rate_limit: Requests per hour per token for the core resource
+            graphql_rate_limit: Points per hour per token for GraphQL
+        """
+        self.lock = threading.Lock()
+        self.repos: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.hooks: Dict[Tuple[str, str], list] = {}
+        self.limits = {"core": rate_limit, "graphql": graphql_rate_limit}
+        self.usage: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.request_count = 0
+
+    def _store(self, kind: str, payload: Dict[str, Any]) -> str:
+        """Store a git object under a SHA derived from its content"""
+        sha = hashlib.sha1(f"{kind}:{json.dumps(payload, sort_keys=True)}".encode("utf-8")).hexdigest()
+        self.objects[sha] = dict(payload, type=kind, sha=sha)
+        return sha
+
+    def login_for(self, token: str) -> str:
+        """Tokens map to a user named after the token"""
+        return token or "anonymous"
+
+    def consume(self, token: str, resource: str) -> Dict[str, str]:
+        """
+        Count a request against a token's quota
+
+        Returns:
+            Rate limit headers for the response
+        """
+        now = int(time.time())
+        key = (token, resource)
+        usage = self.usage.get(key)
+        if usage is None or usage["reset"] <= now:
+            usage = {"used": 0, "reset": now + 3600}
+            self.usage[key] = usage
+        usage["used"] += 1
+        remaining = max(0, self.limits[resource] - usage["used"])
+        return {
+            "X-RateLimit-Limit": str(self.limits[resource]),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(usage["reset"]),
+            "X-RateLimit-Used": str(usage["used"]),
+            "X-RateLimit-Resource": resource
+        }
+
+    def create_repo(self, owner: str, name: str, description: str = "", private: bool = False) -> Optional[Dict]:
+        """Create a repository with an initial README commit"""
+        key = (owner.lower(), name.lower())
+        if key in self.repos:
+            return None
+
+        blob = self._store("blob", {"content": f"# {name}\n"})
+        tree = self._store("tree", {"entries": {"README.md": blob}})
+        commit = self._store("commit", {"message": "Initial commit", "tree": tree, "parents": [],
+                                        "created": time.time()})
+        repo = {
+            "owner": owner,
+            "name": name,
+            "description": description,
+            "private": private,
+            "default_branch": "main",
+            "refs": {"main": commit},
+            "etag": 0
+        }
+        self.repos[key] = repo
+        return repo
+
+    def get_repo(self, owner: str, name: str) -> Optional[Dict[str, Any]]:
+        """Look up a repository by owner and name"""
+        return self.repos.get((owner.lower(), name.lower()))
+
+    def repo_json(self, repo: Dict[str, Any]) -> Dict[str, Any]:
+        """Render a repository as the REST API does"""
+        full_name = f"{repo['owner']}/{repo['name']}"
+        return {
+            "name": repo["name"],
+            "full_name": full_name,
+            "description": repo["description"],
+            "private": repo["private"],
+            "default_branch": repo["default_branch"],
+            "html_url": f"https://github.com/{full_name}",
+            "owner": {"login": repo["owner"]}
+        }
+
+    def write_commit(self, repo: Dict[str, Any], branch: str, message: str,
+                     files: Dict[str, str]) -> str:
+        """Create a commit on top of a branch head (caller checks the head)"""
+        parent = repo["refs"][branch]
+        entries = dict(self.objects[self.objects[parent]["tree"]]["entries"])
+        for path, content in files.items():
+            entries[path] = self._store("blob", {"content": content})
+        tree = self._store("tree", {"entries": entries})
+        commit = self._store("commit", {"message": message, "tree": tree, "parents": [parent],
+                                        "created": time.time()})
+        repo["refs"][branch] = commit
+        return commit
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    """Request handler implementing the GitHub endpoints the app uses"""
+
+    protocol_version = "HTTP/1.1"
+    server: "FakeGitHubServer"
+
+    ROUTES = [
+        ("GET", r"^/user$", "get_user"),
+        ("POST", r"^/user/repos$", "create_repo"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)$", "get_repo"),
+        ("POST", r"^/repos/([^/]+)/([^/]+)/hooks$", "create_hook"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/git/refs/heads/(.+)$", "get_ref"),
+        ("PATCH", r"^/repos/([^/]+)/([^/]+)/git/refs/heads/(.+)$", "update_ref"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/git/commits/([0-9a-f]+)$", "get_commit"),
+        ("GET", r"^/repos/([^/]+)/([^/]+)/commits$", "list_commits"),
+        ("POST", r"^/repos/([^/]+)/([^/]+)/git/blobs$", "create_blob"),
+        ("POST", r"^/repos/([^/]+)/([^/]+)/git/trees$", "create_tree"),
+        ("POST", r"^/repos/([^/]+)/([^/]+)/git/commits$", "create_commit"),
+        ("POST", r"^/graphql$", "graphql"),
+    ]
+
+    def log_message(self, format, *args):
+        """Keep benchmark output readable"""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def _token(self) -> str:
+        """Extract the token from the Authorization header"""
+        auth = self.headers.get("Authorization", "")
+        return auth.split(" ", 1)[1] if " " in auth else ""
+
+    def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        """Write a JSON response"""
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def _dispatch(self, method: str) -> None:
+        """Route a request, applying latency, error injection and rate limits"""
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            self._send(400, {"message": "Problems parsing JSON"})
+            return
+
+        if server.latency:
+            time.sleep(server.latency * (0.5 + random.random()))
+
+        path = self.path.split("?", 1)[0]
+        token = self._token()
+        resource = "graphql" if path == "/graphql" else "core"
+
+        with server.state.lock:
+            server.state.request_count += 1
+            rate_headers = server.state.consume(token, resource)
+
+        if int(rate_headers["X-RateLimit-Remaining"]) <= 0:
+            self._send(403, {"message": "API rate limit exceeded"}, rate_headers)
+            return
+
+        if server.error_rate and random.random() < server.error_rate:
+            status = random.choice(server.error_statuses)
+            self._send(status, {"message": "Injected error"}, rate_headers)
+            return
+
+        for route_method, pattern, handler_name in self.ROUTES:
+            if route_method != method:
+                continue
+            match = re.match(pattern, path)
+            if match:
+                with server.state.lock:
+                    status, response, headers = getattr(self, handler_name)(token, body, *match.groups())
+                headers = dict(rate_headers, **(headers or {}))
+
+                # Honour conditional GETs the way GitHub does
+                etag = headers.get("ETag")
+                if method == "GET" and etag and self.headers.get("If-None-Match") == etag:
+                    self._send(304, None, headers)
+                    return
+
+                self._send(status, response, headers)
+                return
+
+        self._send(404, {"message": "Not Found"}, rate_headers)
+
+    # REST endpoints. Each returns (status, body, extra_headers) and runs
+    # with the state lock held.
+
+    def get_user(self, token, body):
+        login = self.server.state.login_for(token)
+        return 200, {"login": login, "id": abs(hash(login)) % 10 ** 8}, {"ETag": f'"user-{login}"'}
+
+    def create_repo(self, token, body):
+        state = self.server.state
+        name = body.get("name")
+        if not name:
+            return 422, {"message": "Repository creation failed.",
+                         "errors": [{"resource": "Repository", "code": "missing_field", "field": "name"}]}, None
+        repo = state.create_repo(state.login_for(token), name, body.get("description", ""),
+                                 bool(body.get("private")))
+        if repo is None:
+            return 422, {"message": "Repository creation failed.",
+                         "errors": [{"resource": "Repository", "code": "custom", "field": "name",
+                                     "message": "name already exists on this account"}]}, None
+        return 201, state.repo_json(repo), None
+
+    def get_repo(self, token, body, owner, name):
+        state = self.server.state
+        repo = state.get_repo(owner, name)
+        if repo is None:
+            return 404, {"message": "Not Found"}, None
+        return 200, state.repo_json(repo), {"ETag": f'"repo-{owner}-{name}-{repo["etag"]}"'}
+
+    def create_hook(self, token, body, owner, name):
+        state = self.server.state
+        if state.get_repo(owner, name) is None:
+            return 404, {"message": "Not Found"}, None
+        hooks = state.hooks.setdefault((owner.lower(), name.lower()), [])
+        hook = {"id": len(hooks) + 1, "name": body.get("name", "web"), "active": body.get("active", True),
+                "events": body.get("events", []), "config": body.get("config", {})}
+        hooks.append(hook)
+        return 201, hook, None
+
+    def get_ref(self, token, body, owner, name, branch):
+        repo = self.server.state.get_repo(owner, name)
+        if repo is None or branch not in repo["refs"]:
+            return 404, {"message": "Not Found"}, None
+        sha = repo["refs"][branch]
+        return 200, {"ref": f"refs/heads/{branch}", "object": {"sha": sha, "type": "commit"}}, \
+            {"ETag": f'"ref-{sha}"'}
+
+    def update_ref(self, token, body, owner, name, branch):
+        state = self.server.state
+        repo = state.get_repo(owner, name)
+        if repo is None or branch not in repo["refs"]:
+            return 404, {"message": "Not Found"}, None
+        new_sha = body.get("sha")
+        commit = state.objects.get(new_sha)
+        if not commit or commit["type"] != "commit":
+            return 422, {"message": "Object does not exist"}, None
+        current = repo["refs"][branch]
+        if new_sha != current and current not in commit["parents"] and not body.get("force"):
+            return 422, {"message": "Update is not a fast forward"}, None
+        repo["refs"][branch] = new_sha
+        return 200, {"ref": f"refs/heads/{branch}", "object": {"sha": new_sha, "type": "commit"}}, None
+
+    def get_commit(self, token, body, owner, name, sha):
+        commit = self.server.state.objects.get(sha)
+        if self.server.state.get_repo(owner, name) is None or not commit or commit["type"] != "commit":
+            return 404, {"message": "Not Found"}, None
+        return 200, {"sha": sha, "message": commit["message"], "tree": {"sha": commit["tree"]},
+                     "parents": [{"sha": parent} for parent in commit["parents"]]}, {"ETag": f'"commit-{sha}"'}
+
+    def list_commits(self, token, body, owner, name):
+        state = self.server.state
+        repo = state.get_repo(owner, name)
+        if repo is None:
+            return 404, {"message": "Not Found"}, None
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        per_page = min(100, int(query.get("per_page", ["30"])[0]))
+
+        # Walk first parents from the default branch head, newest first
+        commits = []
+        sha = repo["refs"][repo["default_branch"]]
+        while sha and len(commits) < per_page:
+            commit = state.objects[sha]
+            commits.append({"sha": sha, "commit": {"message": commit["message"]},
+                            "html_url": f"https://github.com/{owner}/{name}/commit/{sha}"})
+            sha = commit["parents"][0] if commit["parents"] else None
+        head = repo["refs"][repo["default_branch"]]
+        return 200, commits, {"ETag": f'"commits-{head}-{per_page}"'}
+
+    def create_blob(self, token, body, owner, name):
+        state = self.server.state
+        if state.get_repo(owner, name) is None:
+            return 404, {"message": "Not Found"}, None
+        content = body.get("content", "")
+        if body.get("encoding") == "base64":
+            content = base64.b64decode(content).decode("utf-8")
+        sha = state._store("blob", {"content": content})
+        return 201, {"sha": sha}, None
+
+    def create_tree(self, token, body, owner, name):
+        state = self.server.state
+        if state.get_repo(owner, name) is None:
+            return 404, {"message": "Not Found"}, None
+        base = state.objects.get(body.get("base_tree") or "")
+        entries = dict(base["entries"]) if base else {}
+        for entry in body.get("tree", []):
+            if entry.get("sha") not in state.objects:
+                return 422, {"message": "Invalid tree info"}, None
+            entries[entry["path"]] = entry["sha"]
+        sha = state._store("tree", {"entries": entries})
+        return 201, {"sha": sha}, None
+
+    def create_commit(self, token, body, owner, name):
+        state = self.server.state
+        if state.get_repo(owner, name) is None:
+            return 404, {"message": "Not Found"}, None
+        if body.get("tree") not in state.objects:
+            return 422, {"message": "Tree SHA does not exist"}, None
+        sha = state._store("commit", {"message": body.get("message", ""), "tree": body["tree"],
+                                      "parents": body.get("parents", []), "created": time.time()})
+        return 201, {"sha": sha, "message": body.get("message", ""), "tree": {"sha": body["tree"]},
+                     "html_url": f"https://github.com/{owner}/{name}/commit/{sha}"}, None
+
+    # GraphQL: just the repository head query and createCommitOnBranch
+
+    def graphql(self, token, body):
+        query = body.get("query", "")
+        variables = body.get("variables") or {}
+
+        if "createCommitOnBranch" in query:
+            return self._graphql_create_commit(variables.get("input") or {})
+        if "defaultBranchRef" in query:
+            return self._graphql_repo_head(variables)
+        return 200, {"errors": [{"message": "Unsupported query in fake server"}]}, None
+
+    def _graphql_repo_head(self, variables):
+        state = self.server.state
+        repo = state.get_repo(variables.get("owner", ""), variables.get("name", ""))
+        if repo is None:
+            return 200, {"data": {"repository": None},
+                         "errors": [{"type": "NOT_FOUND", "message": "Could not resolve to a Repository"}]}, None
+        branch = repo["default_branch"]
+        sha = repo["refs"][branch]
+        return 200, {"data": {"repository": {"defaultBranchRef": {
+            "name": branch,
+            "target": {"oid": sha, "tree": {"oid": state.objects[sha]["tree"]}}
+        }}}}, None
+
+    def _graphql_create_commit(self, commit_input):
+        state = self.server.state
+        branch_input = commit_input.get("branch") or {}
+        owner, _, name = (branch_input.get("repositoryNameWithOwner") or "").partition("/")
+        repo = state.get_repo(owner, name)
+        branch = branch_input.get("branchName")
+        if repo is None or branch not in repo["refs"]:
+            return 200, {"data": {"createCommitOnBranch": None},
+                         "errors": [{"type": "NOT_FOUND", "message": "Could not resolve branch"}]}, None
+
+        expected = commit_input.get("expectedHeadOid")
+        if expected != repo["refs"][branch]:
+            return 200, {"data": {"createCommitOnBranch": None},
+                         "errors": [{"type": "STALE_DATA",
+                                     "message": f"Expected branch to point to \"{expected}\" but it did not"}]}, None
+
+        files = {}
+        for addition in ((commit_input.get("fileChanges") or {}).get("additions") or []):
+            files[addition["path"]] = base64.b64decode(addition["contents"]).decode("utf-8")
+
+        message = commit_input.get("message") or {}
+        full_message = message.get("headline", "")
+        if message.get("body"):
+            full_message += "\n\n" + message["body"]
+
+        sha = state.write_commit(repo, branch, full_message, files)
+        return 200, {"data": {"createCommitOnBranch": {"commit": {
+            "oid": sha,
+            "url": f"https://github.com/{repo['owner']}/{repo['name']}/commit/{sha}",
+            "tree": {"oid": state.objects[sha]["tree"]}
+        }}}}, None
+
+class FakeGitHubServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fake GitHub state"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0,
+                 error_rate: float = 0.0, error_statuses: Tuple[int, ...] = (500, 502, 503),
+                 rate_limit: int = 5000, verbose: bool = False):
+        """
+        Initialize the server
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            latency_ms: Mean added latency per request in milliseconds
+            error_rate: Fraction of requests answered with an injected error
+            error_statuses: Status codes used for injected errors
+            rate_limit: Requests per hour per token
+            verbose: Log every request
+        """
+        super().__init__((host, port), FakeGitHubHandler)
+        self.state = FakeGitHubState(rate_limit=rate_limit, graphql_rate_limit=rate_limit)
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.verbose = verbose
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as GITHUB_API_URL"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGitHubServer":
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-github", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        self.shutdown()
+        self.server_close()
+
+def main():
+    """Run the fake server from the command line"""
+    parser = argparse.ArgumentParser(description="Local stand-in for the GitHub API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = FakeGitHubServer(args.host, args.port, args.latency_ms, args.error_rate,
+                              rate_limit=args.rate_limit, verbose=args.verbose)
+    print(f"Fake GitHub API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
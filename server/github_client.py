@@ -5,16 +5,179 @@ This module handles all interactions with the GitHub API.
 """
 import requests
 import json
+import base64
 import datetime
 import os
-from typing import Dict, Any, Optional, List, Tuple
+import threading
+import time
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional, List, Tuple, Generator, Mapping
+from repo_cache import repo_cache
+from rate_limiter import rate_limit_governor, RateLimitExceeded
+from etag_cache import etag_cache
+from resilience import (circuit_breaker, CircuitOpenError, backoff_delay,
+                        GITHUB_MAX_RETRIES, RETRYABLE_STATUS_CODES)
 
 # GitHub API configuration
-GITHUB_API_URL = "https://api.github.com"
+# Override with the fake server from fake_github.py for offline benchmarks
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+GITHUB_GRAPHQL_PATH = "/graphql"
+
+# How many times a README commit is rebuilt when the branch moves underneath it
+MAX_REF_UPDATE_ATTEMPTS = 3
+
+# Commit backends supported by make_commit
+COMMIT_BACKEND_REST = "rest"
+COMMIT_BACKEND_GRAPHQL = "graphql"
+
+# Trailer that carries an idempotency key in automated commit messages, and
+# how many recent commits are searched for it before a commit is retried
+COMMIT_KEY_TRAILER = "KCommit-Id"
+COMMIT_KEY_LOOKBACK = 30
+
+# Seconds to wait when we couldn't tell whether an earlier attempt landed
+COMMIT_KEY_CHECK_RETRY = 60
+
+CREATE_COMMIT_MUTATION = """
+mutation ($input: CreateCommitOnBranchInput!) {
+  createCommitOnBranch(input: $input) {
+    commit {
+      oid
+      url
+      tree {
+        oid
+      }
+    }
+  }
+}
+"""
+
+REPO_METADATA_QUERY = """
+query ($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      name
+      target {
+        oid
+        ... on Commit {
+          tree {
+            oid
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# Connection pool configuration
+GITHUB_POOL_CONNECTIONS = int(os.environ.get("GITHUB_POOL_CONNECTIONS", "4"))
+GITHUB_POOL_MAXSIZE = int(os.environ.get("GITHUB_POOL_MAXSIZE", "32"))
+GITHUB_CONNECT_TIMEOUT = float(os.environ.get("GITHUB_CONNECT_TIMEOUT", "5"))
+GITHUB_READ_TIMEOUT = float(os.environ.get("GITHUB_READ_TIMEOUT", "30"))
+
+# Shared session used by every GitHubClient instance in this process
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_session_stats = {"requests": 0, "errors": 0}
+_stats_lock = threading.Lock()
+
+def _count(name: str) -> None:
+    """Increment a shared session counter"""
+    with _stats_lock:
+        _session_stats[name] += 1
+
+def get_session() -> requests.Session:
+    """
+    Get the process-wide keep-alive session for GitHub API calls
+
+    The session is created lazily with a bounded connection pool so that
+    repeated calls reuse TCP/TLS connections instead of reconnecting.
+
+    Returns:
+        Shared requests.Session
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=GITHUB_POOL_CONNECTIONS,
+                    pool_maxsize=GITHUB_POOL_MAXSIZE,
+                    pool_block=True  # Wait for a free connection instead of opening extras
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+                print(f"Created GitHub HTTP session (pool_maxsize={GITHUB_POOL_MAXSIZE})")
+    return _session
+
+def close_session() -> None:
+    """Close the shared session and drop all pooled connections"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Get utilisation statistics for the shared connection pool
+
+    Returns:
+        Dictionary with request counters and per-host pool details
+    """
+    stats = {
+        "requests": _session_stats["requests"],
+        "errors": _session_stats["errors"],
+        "pool_maxsize": GITHUB_POOL_MAXSIZE,
+        "connect_timeout": GITHUB_CONNECT_TIMEOUT,
+        "read_timeout": GITHUB_READ_TIMEOUT,
+        "hosts": []
+    }
+
+    if _session is None:
+        return stats
+
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen or not isinstance(adapter, HTTPAdapter):
+            continue
+        seen.add(id(adapter))
+
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            queue = pool.pool
+            if queue is None:
+                continue
+            # Unused slots are held in the queue as None placeholders
+            slots = list(queue.queue)
+            idle = sum(1 for conn in slots if conn is not None)
+            stats["hosts"].append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "connections_opened": pool.num_connections,
+                "requests_sent": pool.num_requests,
+                "idle_connections": idle,
+                "in_use_connections": queue.maxsize - len(slots),
+                "maxsize": queue.maxsize
+            })
+
+    return stats
 
 class GitHubClient:
-    """Client for interacting with GitHub API"""
-    
+    """Client for interacting with GitHub API
+
+    Multi-step operations are written as flows: generators that yield the
+    API calls they need and receive each (response_data, status_code)
+    back. _run drives a flow with blocking requests; AsyncGitHubClient
+    drives the same flows on an event loop.
+    """
+
     def __init__(self, token: str):
         """Initialize with GitHub token"""
         self.token = token
@@ -22,46 +185,271 @@ class GitHubClient:
             "Authorization": f"token {token}",
             "Accept": "application/vnd.github.v3+json"
         }
-    
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Tuple[Dict, int]:
+
+    @staticmethod
+    def _call(method: str, endpoint: str, data: Optional[Dict] = None,
+              retry: Optional[bool] = None) -> Tuple[str, str, Optional[Dict], bool]:
+        """
+        Describe an API call for a flow to yield
+
+        Args:
+            method: HTTP method (GET, POST, PATCH, etc.)
+            endpoint: API endpoint (without base URL)
+            data: Request data for POST/PATCH requests
+            retry: Whether the request is safe to retry (defaults to GET only)
+
+        Returns:
+            Tuple of (method, endpoint, data, retry)
+        """
+        if retry is None:
+            retry = method == "GET"
+        return method, endpoint, data, retry
+
+    @staticmethod
+    def _graphql_call(query: str, variables: Dict[str, Any]) -> Tuple[str, str, Optional[Dict], bool]:
+        """
+        Describe a GraphQL call for a flow to yield
+
+        Args:
+            query: GraphQL query or mutation document
+            variables: Query variables
+
+        Returns:
+            Tuple of (method, endpoint, data, retry)
+        """
+        # Queries are safe to retry; a retried mutation could commit twice
+        return GitHubClient._call(
+            "POST",
+            GITHUB_GRAPHQL_PATH,
+            {"query": query, "variables": variables},
+            retry=not query.lstrip().startswith("mutation")
+        )
+
+    def _run(self, flow: Generator) -> Any:
+        """
+        Drive a flow to completion with blocking requests
+
+        Args:
+            flow: Generator yielding API calls
+
+        Returns:
+            The flow's return value
+        """
+        try:
+            call = next(flow)
+            while True:
+                call = flow.send(self._make_request(*call))
+        except StopIteration as done:
+            return done.value
+
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                      retry: Optional[bool] = None) -> Tuple[Dict, int]:
         """
         Make a request to GitHub API with detailed error logging
 
+        Idempotent requests are retried with jittered exponential backoff
+        on connection errors and 5xx responses.
+
         Args:
             method: HTTP method (GET, POST, PATCH, etc.)
             endpoint: API endpoint (without base URL)
             data: Request data for POST/PATCH requests
+            retry: Whether the request is safe to retry (defaults to GET only)
 
         Returns:
             Tuple of (response_data, status_code)
         """
-        url = f"{GITHUB_API_URL}{endpoint}"
+        if retry is None:
+            retry = method == "GET"
+        attempts = GITHUB_MAX_RETRIES + 1 if retry else 1
+
+        for attempt in range(attempts):
+            if attempt > 0:
+                delay = backoff_delay(attempt)
+                print(f"Retrying {method} {endpoint} in {delay:.2f}s (attempt {attempt + 1}/{attempts})")
+                time.sleep(delay)
+
+            response_data, status_code = self._send(method, endpoint, data)
+            if not self._should_retry(response_data, status_code):
+                break
+
+        return response_data, status_code
+
+    def _send(self, method: str, endpoint: str, data: Optional[Dict] = None,
+              conditional: bool = True) -> Tuple[Dict, int]:
+        """
+        Send a single request through the rate limit governor and circuit breaker
+
+        Args:
+            method: HTTP method (GET, POST, PATCH, etc.)
+            endpoint: API endpoint (without base URL)
+            data: Request data for POST/PATCH requests
+            conditional: Whether to revalidate a cached GET response
+
+        Returns:
+            Tuple of (response_data, status_code)
+        """
+        request = self._prepare(method, endpoint, data, conditional)
+
+        try:
+            rate_limit_governor.acquire(self.token, request["governed_method"], request["resource"])
+            circuit_breaker.before_call(request["host"])
+        except (RateLimitExceeded, CircuitOpenError) as e:
+            return self._deferred(request, e)
 
         try:
-            response = requests.request(
+            _count("requests")
+            response = get_session().request(
                 method=method,
-                url=url,
-                headers=self.headers,
-                json=data
+                url=request["url"],
+                headers=request["headers"],
+                json=data,
+                timeout=(GITHUB_CONNECT_TIMEOUT, GITHUB_READ_TIMEOUT)
             )
 
-            status_code = response.status_code
+            if response.status_code == 304 and request["conditional"]:
+                cached_data = self._not_modified(request, response.headers)
+                if cached_data is not None:
+                    return cached_data, 200
+
+                # Entry was evicted in the meantime; fetch the full response
+                return self._send(method, endpoint, data, conditional=False)
 
             try:
                 response_data = response.json()
             except ValueError:
                 response_data = {"text": response.text}
 
-            return response_data, status_code
+            return self._complete(request, response.status_code, response.headers, response_data)
 
         except Exception as e:
-            return {"error": str(e), "error_type": type(e).__name__}, 500
-    
+            return self._failed(request, e)
+
+    def _prepare(self, method: str, endpoint: str, data: Optional[Dict],
+                 conditional: bool = True) -> Dict[str, Any]:
+        """
+        Work out everything about a request that doesn't involve I/O
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint (without base URL)
+            data: Request data
+            conditional: Whether to revalidate a cached GET response
+
+        Returns:
+            Dictionary describing the request
+        """
+        url = f"{GITHUB_API_URL}{endpoint}"
+
+        # GraphQL has its own quota, and only mutations count as content creation
+        resource = "core"
+        governed_method = method
+        if endpoint == GITHUB_GRAPHQL_PATH:
+            resource = "graphql"
+            query = (data or {}).get("query", "").lstrip()
+            governed_method = "POST" if query.startswith("mutation") else "GET"
+
+        # Revalidate cached GET responses instead of downloading them again
+        headers = self.headers
+        validators = etag_cache.get_validators(self.token, method, url) if conditional and method == "GET" else {}
+        if validators:
+            headers = dict(self.headers, **validators)
+
+        return {
+            "method": method,
+            "endpoint": endpoint,
+            "url": url,
+            "host": urlparse(url).netloc,
+            "resource": resource,
+            "governed_method": governed_method,
+            "headers": headers,
+            "conditional": validators
+        }
+
+    @staticmethod
+    def _deferred(request: Dict[str, Any], error: Exception) -> Tuple[Dict, int]:
+        """Build the response for a request held back by rate limits or an open circuit"""
+        print(f"Deferring {request['method']} {request['endpoint']}: {str(error)}")
+        status_code = 429 if isinstance(error, RateLimitExceeded) else 503
+        return {"error": str(error), "error_type": type(error).__name__,
+                "retry_after": error.retry_after}, status_code
+
+    def _not_modified(self, request: Dict[str, Any], headers: Mapping[str, str]) -> Optional[Any]:
+        """Handle a 304 response, returning the cached body if it is still held"""
+        circuit_breaker.record_success(request["host"])
+        rate_limit_governor.observe(self.token, 304, headers, "", request["resource"])
+        return etag_cache.get_cached(self.token, request["method"], request["url"])
+
+    def _complete(self, request: Dict[str, Any], status_code: int, headers: Mapping[str, str],
+                  response_data: Any) -> Tuple[Dict, int]:
+        """
+        Record the outcome of a response with the breaker, cache and governor
+
+        Args:
+            request: Request description from _prepare
+            status_code: HTTP status code
+            headers: Response headers
+            response_data: Parsed response body
+
+        Returns:
+            Tuple of (response_data, status_code)
+        """
+        if status_code in RETRYABLE_STATUS_CODES:
+            circuit_breaker.record_failure(request["host"])
+        else:
+            circuit_breaker.record_success(request["host"])
+
+        if request["method"] == "GET" and status_code == 200:
+            etag_cache.store(self.token, request["method"], request["url"], response_data,
+                             headers.get("ETag"), headers.get("Last-Modified"))
+
+        message = response_data.get("message", "") if isinstance(response_data, dict) else ""
+        retry_after = rate_limit_governor.observe(self.token, status_code, headers,
+                                                  message, request["resource"])
+        if retry_after is not None and isinstance(response_data, dict):
+            print(f"Rate limited on {request['method']} {request['endpoint']}, "
+                  f"retry in {int(retry_after)} seconds")
+            response_data["retry_after"] = retry_after
+
+        return response_data, status_code
+
+    @staticmethod
+    def _failed(request: Dict[str, Any], error: Exception) -> Tuple[Dict, int]:
+        """Build the response for a request that failed in transport"""
+        _count("errors")
+        circuit_breaker.record_failure(request["host"])
+        return {"error": str(error), "error_type": type(error).__name__}, 500
+
+    @staticmethod
+    def _should_retry(response_data: Any, status_code: int) -> bool:
+        """Server-side failures are retried; deferred requests are not"""
+        deferred = isinstance(response_data, dict) and "retry_after" in response_data
+        return status_code in RETRYABLE_STATUS_CODES and not deferred
+
+    def _graphql(self, query: str, variables: Dict[str, Any]) -> Tuple[Dict, int]:
+        """
+        Run a GraphQL query against the GitHub API
+
+        Args:
+            query: GraphQL query or mutation document
+            variables: Query variables
+
+        Returns:
+            Tuple of (response_data, status_code)
+        """
+        return self._make_request(*self._graphql_call(query, variables))
+
+    @staticmethod
+    def _readme_content() -> str:
+        """Build the README.md content written by automated commits"""
+        date_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return f"# KCommit\n\nThis repository is maintained by the Auto Commit App.\n\nLast updated: {date_str}"
+
     def get_user_info(self) -> Dict:
         """Get authenticated user information"""
         data, status_code = self._make_request("GET", "/user")
         return data
-    
+
     def create_repository(self, name: str, description: str = "", private: bool = False) -> Tuple[Dict, int]:
         """
         Create a new GitHub repository
@@ -74,6 +462,10 @@ class GitHubClient:
         Returns:
             Tuple of (repository_data, status_code)
         """
+        return self._run(self._create_repository_flow(name, description, private))
+
+    def _create_repository_flow(self, name: str, description: str, private: bool) -> Generator:
+        """Flow behind create_repository"""
         data = {
             "name": name,
             "description": description,
@@ -81,7 +473,7 @@ class GitHubClient:
             "auto_init": True  # Initialize with README
         }
 
-        response_data, status_code = self._make_request("POST", "/user/repos", data)
+        response_data, status_code = yield self._call("POST", "/user/repos", data)
 
         # Debug information
         print(f"Repository creation response status: {status_code}")
@@ -115,159 +507,428 @@ class GitHubClient:
                             break
 
         return response_data, status_code
-    
-    def setup_webhook(self, username: str, repo_name: str, webhook_url: str, 
-                     secret: Optional[str] = None) -> Tuple[Dict, int]:
-        """
-        Set up a webhook for a repository
-        
-        Args:
-            username: GitHub username
-            repo_name: Repository name
-            webhook_url: URL to receive webhook events
-            secret: Secret for webhook signature verification
-            
-        Returns:
-            Tuple of (webhook_data, status_code)
-        """
+
+    @staticmethod
+    def _webhook_payload(webhook_url: str, secret: Optional[str]) -> Dict[str, Any]:
+        """Build the request body for creating a push webhook"""
         config = {
             "url": webhook_url,
             "content_type": "json"
         }
-        
+
         if secret:
             config["secret"] = secret
-            
-        data = {
+
+        return {
             "name": "web",
             "active": True,
             "events": ["push"],
             "config": config
         }
-        
+
+    def setup_webhook(self, username: str, repo_name: str, webhook_url: str,
+                     secret: Optional[str] = None) -> Tuple[Dict, int]:
+        """
+        Set up a webhook for a repository
+
+        Args:
+            username: GitHub username
+            repo_name: Repository name
+            webhook_url: URL to receive webhook events
+            secret: Secret for webhook signature verification
+
+        Returns:
+            Tuple of (webhook_data, status_code)
+        """
         return self._make_request(
-            "POST", 
+            "POST",
             f"/repos/{username}/{repo_name}/hooks",
-            data
+            self._webhook_payload(webhook_url, secret)
         )
-    
-    def make_commit(self, username: str, repo_name: str, commit_message: str) -> Tuple[Dict, bool, str]:
+
+    def make_commit(self, username: str, repo_name: str, commit_message: str,
+                    backend: str = COMMIT_BACKEND_REST, idempotency_key: Optional[str] = None,
+                    check_existing: bool = False) -> Tuple[Dict, bool, str]:
         """
         Make a commit to update README.md in a repository
-        
+
+        Args:
+            username: GitHub username
+            repo_name: Repository name
+            commit_message: Commit message
+            backend: Commit backend to use ("rest" or "graphql")
+            idempotency_key: Key added to the message as a KCommit-Id trailer
+            check_existing: Look for a recent commit with the same key first and
+                return it instead of committing again (for retries after a crash)
+
+        Returns:
+            Tuple of (commit_data, success, commit_sha)
+        """
+        return self._run(self._commit_flow(username, repo_name, commit_message, backend,
+                                           idempotency_key, check_existing))
+
+    def find_commit_by_key(self, username: str, repo_name: str, idempotency_key: str) -> Tuple[Optional[str], bool]:
+        """
+        Look for a recent commit carrying an idempotency key
+
+        Args:
+            username: GitHub username
+            repo_name: Repository name
+            idempotency_key: Key from the KCommit-Id trailer
+
+        Returns:
+            Tuple of (commit SHA or None, whether the lookup succeeded)
+        """
+        return self._run(self._find_commit_by_key_flow(username, repo_name, idempotency_key))
+
+    @staticmethod
+    def _message_with_key(commit_message: str, idempotency_key: str) -> str:
+        """Append the idempotency key trailer to a commit message"""
+        return f"{commit_message}\n\n{COMMIT_KEY_TRAILER}: {idempotency_key}"
+
+    def _find_commit_by_key_flow(self, username: str, repo_name: str, idempotency_key: str) -> Generator:
+        """Flow behind find_commit_by_key"""
+        commits, status_code = yield self._call(
+            "GET", f"/repos/{username}/{repo_name}/commits?per_page={COMMIT_KEY_LOOKBACK}")
+        if status_code != 200 or not isinstance(commits, list):
+            print(f"Could not list recent commits for {username}/{repo_name}: {status_code}")
+            return None, False
+
+        trailer = f"{COMMIT_KEY_TRAILER}: {idempotency_key}"
+        for commit in commits:
+            message = commit.get("commit", {}).get("message", "")
+            if trailer in message.splitlines():
+                return commit.get("sha"), True
+        return None, True
+
+    def make_commit_graphql(self, username: str, repo_name: str, commit_message: str) -> Tuple[Dict, bool, str]:
+        """
+        Make a README.md commit with a single createCommitOnBranch mutation
+
+        The expected head OID comes from the repository metadata cache. If
+        GitHub reports that the branch has moved, the head is refreshed and
+        the mutation is retried once. If the mutation may have landed (a
+        transport failure, 5xx or empty response) the result carries
+        retry_after instead of being retried here.
+
         Args:
             username: GitHub username
             repo_name: Repository name
             commit_message: Commit message
-            
+
         Returns:
             Tuple of (commit_data, success, commit_sha)
         """
+        return self._run(self._commit_graphql_flow(username, repo_name, commit_message))
+
+    def make_commit_rest(self, username: str, repo_name: str, commit_message: str) -> Tuple[Dict, bool, str]:
+        """
+        Make a README.md commit through the REST git data API
+
+        Repository metadata comes from the cache when available. If the ref
+        update is rejected as non-fast-forward, the metadata is refetched
+        and the tree and commit are rebuilt on the new head.
+
+        Args:
+            username: GitHub username
+            repo_name: Repository name
+            commit_message: Commit message
+
+        Returns:
+            Tuple of (commit_data, success, commit_sha)
+        """
+        return self._run(self._commit_rest_flow(username, repo_name, commit_message))
+
+    def _commit_flow(self, username: str, repo_name: str, commit_message: str, backend: str,
+                     idempotency_key: Optional[str] = None, check_existing: bool = False) -> Generator:
+        """Flow behind make_commit"""
+        if idempotency_key:
+            commit_message = self._message_with_key(commit_message, idempotency_key)
+
+            if check_existing:
+                # An earlier attempt may have landed before we lost track of it
+                existing_sha, checked = yield from self._find_commit_by_key_flow(
+                    username, repo_name, idempotency_key)
+                if existing_sha:
+                    print(f"Commit {idempotency_key} already landed as {existing_sha}")
+                    return {"sha": existing_sha, "recovered": True}, True, existing_sha
+                if not checked:
+                    return {"message": "Could not check for an earlier commit attempt",
+                            "retry_after": COMMIT_KEY_CHECK_RETRY}, False, ""
+
+        if backend == COMMIT_BACKEND_GRAPHQL:
+            commit_data, success, commit_sha = yield from self._commit_graphql_flow(
+                username, repo_name, commit_message)
+            # Only a mutation GitHub definitely rejected (a 4xx or GraphQL errors)
+            # falls back; ambiguous failures come back with retry_after
+            if success or "retry_after" in commit_data:
+                return commit_data, success, commit_sha
+
+            print(f"GraphQL commit failed for {username}/{repo_name}, falling back to REST")
+
+        return (yield from self._commit_rest_flow(username, repo_name, commit_message))
+
+    def _repo_metadata_graphql_flow(self, username: str, repo_name: str) -> Generator:
+        """
+        Look up default branch, head SHA and tree SHA with one GraphQL query
+
+        Args:
+            username: GitHub username
+            repo_name: Repository name
+
+        Returns:
+            Dictionary with default_branch, head_sha and tree_sha, or None
+        """
+        data, status_code = yield self._graphql_call(REPO_METADATA_QUERY, {"owner": username, "name": repo_name})
+        if status_code != 200 or data.get("errors"):
+            print(f"Failed to get branch head for {username}/{repo_name}: {data}")
+            return None
+
+        branch_ref = ((data.get("data") or {}).get("repository") or {}).get("defaultBranchRef")
+        if not branch_ref or not branch_ref.get("target"):
+            print(f"Repository {username}/{repo_name} has no default branch")
+            return None
+
+        target = branch_ref["target"]
+        return {
+            "default_branch": branch_ref["name"],
+            "head_sha": target["oid"],
+            "tree_sha": (target.get("tree") or {}).get("oid")
+        }
+
+    def _repo_metadata_rest_flow(self, username: str, repo_name: str) -> Generator:
+        """
+        Look up default branch, head SHA and tree SHA through the REST API
+
+        Args:
+            username: GitHub username
+            repo_name: Repository name
+
+        Returns:
+            Tuple of (metadata or error data, success)
+        """
+        # Get repository info to find default branch
+        repo_data, status_code = yield self._call(
+            "GET",
+            f"/repos/{username}/{repo_name}"
+        )
+
+        if status_code != 200:
+            return repo_data, False
+
+        default_branch = repo_data["default_branch"]
+
+        # Get the reference to HEAD
+        ref_data, status_code = yield self._call(
+            "GET",
+            f"/repos/{username}/{repo_name}/git/refs/heads/{default_branch}"
+        )
+
+        if status_code != 200:
+            return ref_data, False
+
+        head_sha = ref_data["object"]["sha"]
+
+        # Get the commit that HEAD points to
+        commit_data, status_code = yield self._call(
+            "GET",
+            f"/repos/{username}/{repo_name}/git/commits/{head_sha}"
+        )
+
+        if status_code != 200:
+            return commit_data, False
+
+        return {
+            "default_branch": default_branch,
+            "head_sha": head_sha,
+            "tree_sha": commit_data["tree"]["sha"]
+        }, True
+
+    @staticmethod
+    def _outcome_unknown(data: Any) -> Dict[str, Any]:
+        """
+        Build the result for a mutation that may or may not have been applied
+
+        Carries retry_after so callers retry later (with an idempotency
+        check) instead of writing the commit again another way.
+        """
+        return {"message": "Commit outcome unknown, retrying after a check for an earlier attempt",
+                "error": data, "retry_after": COMMIT_KEY_CHECK_RETRY}
+
+    def _commit_graphql_flow(self, username: str, repo_name: str, commit_message: str) -> Generator:
+        """Flow behind make_commit_graphql"""
+        sent = False
+        try:
+            contents = base64.b64encode(self._readme_content().encode("utf-8")).decode("ascii")
+            headline, _, body = commit_message.partition("\n")
+
+            for attempt in range(2):
+                metadata = repo_cache.get(username, repo_name) if attempt == 0 else None
+                if not metadata:
+                    metadata = yield from self._repo_metadata_graphql_flow(username, repo_name)
+                    if not metadata:
+                        return {"error": "Could not resolve branch head"}, False, ""
+                    repo_cache.update(username, repo_name, **metadata)
+
+                branch_name = metadata["default_branch"]
+                message = {"headline": headline}
+                if body.strip():
+                    message["body"] = body.strip()
+
+                data, status_code = yield self._graphql_call(CREATE_COMMIT_MUTATION, {
+                    "input": {
+                        "branch": {
+                            "repositoryNameWithOwner": f"{username}/{repo_name}",
+                            "branchName": branch_name
+                        },
+                        "message": message,
+                        "fileChanges": {
+                            "additions": [{"path": "README.md", "contents": contents}]
+                        },
+                        "expectedHeadOid": metadata["head_sha"]
+                    }
+                })
+                sent = True
+
+                # Transport failures and 5xx leave it open whether the commit landed
+                if status_code >= 500 and "retry_after" not in data:
+                    return self._outcome_unknown(data), False, ""
+                if status_code != 200:
+                    return data, False, ""
+
+                errors = data.get("errors") or []
+                if errors:
+                    stale = any(error.get("type") == "STALE_DATA" or
+                                "expected branch to point to" in error.get("message", "").lower()
+                                for error in errors)
+                    if stale and attempt == 0:
+                        print(f"Cached head for {username}/{repo_name} is stale, refreshing")
+                        repo_cache.invalidate(username, repo_name)
+                        continue
+                    return data, False, ""
+
+                commit = ((data.get("data") or {}).get("createCommitOnBranch") or {}).get("commit")
+                if not commit:
+                    return self._outcome_unknown(data), False, ""
+
+                commit_sha = commit["oid"]
+                repo_cache.update(username, repo_name, default_branch=branch_name, head_sha=commit_sha,
+                                  tree_sha=(commit.get("tree") or {}).get("oid"))
+
+                return {"sha": commit_sha, "html_url": commit.get("url")}, True, commit_sha
+
+            return {"error": "Branch head kept moving"}, False, ""
+
+        except Exception as e:
+            print(f"Exception during GraphQL commit creation: {str(e)}")
+            if sent:
+                return self._outcome_unknown(str(e)), False, ""
+            return {"error": str(e)}, False, ""
+
+    def _commit_rest_flow(self, username: str, repo_name: str, commit_message: str) -> Generator:
+        """Flow behind make_commit_rest"""
         try:
-            # Get repository info to find default branch
-            repo_data, status_code = self._make_request(
-                "GET", 
-                f"/repos/{username}/{repo_name}"
-            )
-            
-            if status_code != 200:
-                return repo_data, False, ""
-                
-            default_branch = repo_data["default_branch"]
-            
-            # Get the reference to HEAD
-            ref_data, status_code = self._make_request(
-                "GET",
-                f"/repos/{username}/{repo_name}/git/refs/heads/{default_branch}"
-            )
-            
-            if status_code != 200:
-                return ref_data, False, ""
-                
-            head_sha = ref_data["object"]["sha"]
-            
-            # Get the commit that HEAD points to
-            commit_data, status_code = self._make_request(
-                "GET",
-                f"/repos/{username}/{repo_name}/git/commits/{head_sha}"
-            )
-            
-            if status_code != 200:
-                return commit_data, False, ""
-                
-            tree_sha = commit_data["tree"]["sha"]
-            
             # Create a new blob with updated content
-            date_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            new_content = f"# KCommit\n\nThis repository is maintained by the Auto Commit App.\n\nLast updated: {date_str}"
-            
-            blob_data, status_code = self._make_request(
+            new_content = self._readme_content()
+
+            blob_data, status_code = yield self._call(
                 "POST",
                 f"/repos/{username}/{repo_name}/git/blobs",
                 {
                     "content": new_content,
                     "encoding": "utf-8"
-                }
+                },
+                retry=True  # Blobs are content-addressed, so retries are harmless
             )
-            
+
             if status_code != 201:
                 return blob_data, False, ""
-                
+
             blob_sha = blob_data["sha"]
-            
-            # Create a new tree
-            tree_data, status_code = self._make_request(
-                "POST",
-                f"/repos/{username}/{repo_name}/git/trees",
-                {
-                    "base_tree": tree_sha,
-                    "tree": [
-                        {
-                            "path": "README.md",
-                            "mode": "100644",
-                            "type": "blob",
-                            "sha": blob_sha
-                        }
-                    ]
-                }
-            )
-            
-            if status_code != 201:
-                return tree_data, False, ""
-                
-            new_tree_sha = tree_data["sha"]
-            
-            # Create a new commit
-            new_commit_data, status_code = self._make_request(
-                "POST",
-                f"/repos/{username}/{repo_name}/git/commits",
-                {
-                    "message": commit_message,
-                    "tree": new_tree_sha,
-                    "parents": [head_sha]
-                }
-            )
-            
-            if status_code != 201:
-                return new_commit_data, False, ""
-                
-            new_commit_sha = new_commit_data["sha"]
-            
-            # Update the reference
-            update_ref_data, status_code = self._make_request(
-                "PATCH",
-                f"/repos/{username}/{repo_name}/git/refs/heads/{default_branch}",
-                {
-                    "sha": new_commit_sha,
-                    "force": False
-                }
-            )
-            
-            if status_code != 200:
-                return update_ref_data, False, ""
-                
-            return new_commit_data, True, new_commit_sha
-            
+
+            metadata = repo_cache.get(username, repo_name)
+
+            for attempt in range(MAX_REF_UPDATE_ATTEMPTS):
+                if not metadata:
+                    metadata, success = yield from self._repo_metadata_rest_flow(username, repo_name)
+                    if not success:
+                        return metadata, False, ""
+                    repo_cache.update(username, repo_name, **metadata)
+
+                default_branch = metadata["default_branch"]
+                head_sha = metadata["head_sha"]
+
+                # Create a new tree
+                tree_data, status_code = yield self._call(
+                    "POST",
+                    f"/repos/{username}/{repo_name}/git/trees",
+                    {
+                        "base_tree": metadata["tree_sha"],
+                        "tree": [
+                            {
+                                "path": "README.md",
+                                "mode": "100644",
+                                "type": "blob",
+                                "sha": blob_sha
+                            }
+                        ]
+                    },
+                    retry=True
+                )
+
+                if status_code != 201:
+                    repo_cache.invalidate(username, repo_name)
+                    return tree_data, False, ""
+
+                new_tree_sha = tree_data["sha"]
+
+                # Create a new commit
+                new_commit_data, status_code = yield self._call(
+                    "POST",
+                    f"/repos/{username}/{repo_name}/git/commits",
+                    {
+                        "message": commit_message,
+                        "tree": new_tree_sha,
+                        "parents": [head_sha]
+                    },
+                    retry=True  # Unreferenced commit objects are never published
+                )
+
+                if status_code != 201:
+                    repo_cache.invalidate(username, repo_name)
+                    return new_commit_data, False, ""
+
+                new_commit_sha = new_commit_data["sha"]
+
+                # Update the reference
+                update_ref_data, status_code = yield self._call(
+                    "PATCH",
+                    f"/repos/{username}/{repo_name}/git/refs/heads/{default_branch}",
+                    {
+                        "sha": new_commit_sha,
+                        "force": False
+                    },
+                    retry=True  # Moving a ref to the same SHA again is a no-op
+                )
+
+                if status_code == 422 and attempt < MAX_REF_UPDATE_ATTEMPTS - 1:
+                    # Branch moved since the head was read; rebase onto the new head
+                    print(f"Ref update for {username}/{repo_name} was not a fast-forward, rebasing")
+                    repo_cache.invalidate(username, repo_name)
+                    metadata = None
+                    continue
+
+                if status_code != 200:
+                    repo_cache.invalidate(username, repo_name)
+                    return update_ref_data, False, ""
+
+                repo_cache.update(username, repo_name, default_branch=default_branch,
+                                  head_sha=new_commit_sha, tree_sha=new_tree_sha)
+
+                return new_commit_data, True, new_commit_sha
+
+            return {"error": "Branch head kept moving"}, False, ""
+
         except Exception as e:
             print(f"Exception during commit creation: {str(e)}")
-            return {"error": str(e)}, False, ""
\ No newline at end of file
+            return {"error": str(e)}, False, ""
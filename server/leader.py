@@ -0,0 +1,141 @@
+"""
+Leader Election Module
+
+This module elects one process to run the scheduler using a lease row in
+SQLite. The leader renews the lease on a heartbeat; if it dies, another
+process takes the lease once it expires.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Optional, Dict, Any
+
+import database as db
+
+# Name of the scheduler lease row
+SCHEDULER_LEASE = "scheduler"
+
+# Seconds a lease stays valid without renewal, and how often it is renewed
+LEADER_LEASE_TTL = float(os.environ.get("LEADER_LEASE_TTL", "15"))
+LEADER_HEARTBEAT_INTERVAL = float(os.environ.get("LEADER_HEARTBEAT_INTERVAL", "5"))
+
+class LeaderElector:
+    """Keeps trying to hold a lease and reports leadership changes"""
+
+    def __init__(self, on_elected: Callable[[], None], on_demoted: Callable[[], None],
+                 lease_name: str = SCHEDULER_LEASE, ttl: float = LEADER_LEASE_TTL,
+                 interval: float = LEADER_HEARTBEAT_INTERVAL):
+        """
+        Initialize the elector
+
+        Args:
+            on_elected: Called when this process becomes leader
+            on_demoted: Called when this process stops being leader
+            lease_name: Lease row to contend for
+            ttl: Seconds the lease stays valid without renewal
+            interval: Seconds between acquire/renew attempts
+        """
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.lease_name = lease_name
+        self.ttl = ttl
+        self.interval = interval
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._leader = False
+        self._valid_until = 0.0
+
+        # Last heartbeat of whoever held the lease before we took it; tells
+        # the new leader since when nobody was dispatching
+        self.previous_heartbeat: Optional[float] = None
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def is_leader(self) -> bool:
+        """Whether this process currently holds an unexpired lease"""
+        return self._leader and time.monotonic() < self._valid_until
+
+    def start(self) -> None:
+        """Start the heartbeat thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="leader-elector", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the heartbeat and hand the lease back"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        if self._leader:
+            self._set_leader(False)
+            db.release_lease(self.lease_name, self.holder_id)
+
+    def heartbeat(self) -> bool:
+        """
+        Acquire or renew the lease once
+
+        Returns:
+            Whether this process is leader afterwards
+        """
+        started = time.monotonic()
+        if not self._leader:
+            lease = db.get_lease(self.lease_name)
+            self.previous_heartbeat = lease["heartbeat_at"] if lease else None
+
+        if db.acquire_lease(self.lease_name, self.holder_id, self.ttl):
+            # Count validity from before the write so we never outlive the row
+            self._valid_until = started + self.ttl
+            self._set_leader(True)
+        elif self._leader:
+            # Step down if another process took over, or once our lease
+            # has run out without a successful renewal
+            lease = db.get_lease(self.lease_name)
+            taken = lease is not None and lease["holder"] != self.holder_id
+            if taken or time.monotonic() >= self._valid_until:
+                self._set_leader(False)
+        return self.is_leader()
+
+    def _set_leader(self, leader: bool) -> None:
+        """Record a leadership change and run the matching callback"""
+        if leader == self._leader:
+            return
+        self._leader = leader
+
+        if leader:
+            print(f"Elected scheduler leader ({self.holder_id})")
+            callback = self.on_elected
+        else:
+            print(f"Lost scheduler leadership ({self.holder_id})")
+            callback = self.on_demoted
+
+        try:
+            callback()
+        except Exception as e:
+            print(f"Error handling leadership change: {str(e)}")
+
+    def _run(self) -> None:
+        """Heartbeat loop"""
+        while not self._stop.is_set():
+            try:
+                self.heartbeat()
+            except Exception as e:
+                print(f"Error in leader heartbeat: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get leadership status
+
+        Returns:
+            Dictionary with this process's ID, whether it leads, and the lease row
+        """
+        return {
+            "holder_id": self.holder_id,
+            "is_leader": self.is_leader(),
+            "lease": db.get_lease(self.lease_name)
+        }
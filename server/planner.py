@@ -0,0 +1,378 @@
+"""
+Commit Planner Module
+
+This module derives each user's daily commit plan from a keyed hash of
+(user, repository, date). The same inputs always give the same plan, so
+any process can recompute it without a job store: startup doesn't have to
+re-plan and status queries don't need scheduler state.
+"""
+import datetime
+import functools
+import hashlib
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Iterable
+from zoneinfo import ZoneInfo
+
+# Key for the plan hash; plans change if this changes
+PLAN_SECRET = os.environ.get("COMMIT_PLAN_SECRET") or os.environ.get("FLASK_SECRET_KEY", "dev_secret_key")
+
+# Default business hours commits are spread across (in the user's time zone)
+BUSINESS_START_HOUR = 9
+BUSINESS_END_HOUR = 21
+
+# A user's business hours: (IANA time zone or None for server time, start hour, end hour)
+BusinessHours = Tuple[Optional[str], int, int]
+DEFAULT_HOURS: BusinessHours = (None, BUSINESS_START_HOUR, BUSINESS_END_HOUR)
+
+# Commits per day and minimum spacing between commits
+MIN_COMMITS_PER_DAY = 1
+MAX_COMMITS_PER_DAY = 10
+MIN_COMMIT_SPACING = 60
+
+# BLAKE2b keys are at most 64 bytes, so the secret is hashed down to one
+_PLAN_KEY = hashlib.sha256(PLAN_SECRET.encode("utf-8")).digest()
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+def splitmix64(value: int) -> int:
+    """
+    Mix a 64-bit integer into a well-distributed 64-bit value
+
+    Args:
+        value: Input integer (taken modulo 2**64)
+
+    Returns:
+        Mixed 64-bit integer
+    """
+    z = (value + _GOLDEN_GAMMA) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+def user_key(username: str, repo_name: str) -> int:
+    """
+    Get the 64-bit key a user's plans are derived from
+
+    Only this step needs the keyed hash; daily seeds are mixed from the key
+    with plain integer arithmetic, so the key can be computed once and
+    reused (the batch planner relies on this).
+
+    Args:
+        username: GitHub username
+        repo_name: Repository name
+
+    Returns:
+        Key integer
+    """
+    message = f"{username.lower()}:{repo_name.lower()}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(message, key=_PLAN_KEY, digest_size=8).digest(), "little")
+
+def day_seed(key: int, day: datetime.date) -> int:
+    """
+    Get the seed for one day of a user's plans
+
+    Args:
+        key: User key from user_key
+        day: Plan date
+
+    Returns:
+        Seed integer
+    """
+    return splitmix64((key + day.toordinal() * _GOLDEN_GAMMA) & _MASK64)
+
+def plan_seed(username: str, repo_name: str, day: datetime.date) -> int:
+    """
+    Get the 64-bit seed for a user's plan on a given day
+
+    Args:
+        username: GitHub username
+        repo_name: Repository name
+        day: Plan date
+
+    Returns:
+        Seed integer
+    """
+    return day_seed(user_key(username, repo_name), day)
+
+def random_value(seed: int, index: int) -> int:
+    """
+    Get the index-th pseudo-random value of a plan's stream
+
+    Args:
+        seed: Plan seed
+        index: Position in the stream (0 picks the commit count)
+
+    Returns:
+        64-bit pseudo-random integer
+    """
+    return splitmix64((seed + index * _GOLDEN_GAMMA) & _MASK64)
+
+@functools.lru_cache(maxsize=None)
+def get_zone(name: Optional[str]) -> Optional[datetime.tzinfo]:
+    """
+    Look up a time zone by IANA name
+
+    Args:
+        name: Time zone name, e.g. "Europe/Berlin"
+
+    Returns:
+        The time zone, or None for server time (no name or an unknown one)
+    """
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except Exception:
+        print(f"Unknown time zone {name!r}, using server time")
+        return None
+
+def is_valid_timezone(name: str) -> bool:
+    """Whether a name is a known IANA time zone"""
+    try:
+        ZoneInfo(name)
+        return True
+    except Exception:
+        return False
+
+def is_valid_hours(start_hour: Any, end_hour: Any) -> bool:
+    """Whether start_hour and end_hour form a non-empty window within one day"""
+    return (isinstance(start_hour, int) and isinstance(end_hour, int)
+            and 0 <= start_hour < end_hour <= 24)
+
+def user_hours(user: Dict[str, Any]) -> BusinessHours:
+    """
+    Get a user's business hours from their users row
+
+    Args:
+        user: Dictionary with optional timezone, business_start_hour and business_end_hour
+
+    Returns:
+        Business hours tuple, with defaults for anything unset
+    """
+    start_hour = user.get("business_start_hour")
+    end_hour = user.get("business_end_hour")
+    if start_hour is None or end_hour is None or not is_valid_hours(start_hour, end_hour):
+        start_hour, end_hour = BUSINESS_START_HOUR, BUSINESS_END_HOUR
+    return (user.get("timezone") or None, start_hour, end_hour)
+
+def local_date(timestamp: float, hours: BusinessHours = DEFAULT_HOURS) -> datetime.date:
+    """
+    Get the date in a user's time zone at a given moment
+
+    Args:
+        timestamp: Epoch seconds
+        hours: The user's business hours
+
+    Returns:
+        Local date
+    """
+    return datetime.datetime.fromtimestamp(timestamp, get_zone(hours[0])).date()
+
+@functools.lru_cache(maxsize=65536)
+def business_window(day: datetime.date, hours: BusinessHours = DEFAULT_HOURS) -> Tuple[float, float]:
+    """
+    Get a user's business hours on a day as epoch seconds (UTC)
+
+    Windows depend only on (day, hours) and most users share a handful of
+    settings, so they are computed once and cached.
+
+    Args:
+        day: Plan date in the user's time zone
+        hours: The user's business hours
+
+    Returns:
+        Tuple of (start, end) epoch seconds
+    """
+    zone = get_zone(hours[0])
+    midnight = datetime.datetime(day.year, day.month, day.day, tzinfo=zone)
+    start = midnight + datetime.timedelta(hours=hours[1])
+    end = midnight + datetime.timedelta(hours=hours[2])
+    return start.timestamp(), end.timestamp()
+
+def plan_times(seed: int, window_start: float, window_end: float) -> List[float]:
+    """
+    Spread a day's commits across a window
+
+    The window is cut into one segment per commit and each commit lands
+    at a pseudo-random offset between 10% and 90% of its segment, keeping
+    commits at least a minute apart.
+
+    Args:
+        seed: Plan seed
+        window_start: Window start in epoch seconds
+        window_end: Window end in epoch seconds
+
+    Returns:
+        Sorted list of commit times in epoch seconds
+    """
+    available_seconds = window_end - window_start
+    if available_seconds <= 0:
+        return []
+
+    span = MAX_COMMITS_PER_DAY - MIN_COMMITS_PER_DAY + 1
+    num_commits = MIN_COMMITS_PER_DAY + random_value(seed, 0) % span
+
+    # Ensure we have enough time for all commits
+    num_commits = max(1, min(num_commits, int(available_seconds // MIN_COMMIT_SPACING)))
+
+    segment_seconds = available_seconds / num_commits
+    min_seconds = min(MIN_COMMIT_SPACING, int(segment_seconds * 0.1))
+    max_seconds = max(min_seconds, int(segment_seconds * 0.9))
+
+    times = []
+    for i in range(num_commits):
+        offset = min_seconds + random_value(seed, i + 1) % (max_seconds - min_seconds + 1)
+        commit_time = window_start + i * segment_seconds + offset
+
+        # Ensure we're still within the window
+        if commit_time > window_end:
+            commit_time = window_end - MIN_COMMIT_SPACING
+        times.append(float(int(commit_time)))
+
+    return times
+
+def plan_day(username: str, repo_name: str, day: datetime.date,
+             hours: BusinessHours = DEFAULT_HOURS) -> List[float]:
+    """
+    Get a user's commit plan for a day
+
+    Args:
+        username: GitHub username
+        repo_name: Repository name
+        day: Plan date in the user's time zone
+        hours: The user's business hours
+
+    Returns:
+        Sorted list of commit times in epoch seconds
+    """
+    window_start, window_end = business_window(day, hours)
+    return plan_times(plan_seed(username, repo_name, day), window_start, window_end)
+
+def plan_between(username: str, repo_name: str, start: float, end: float,
+                 hours: BusinessHours = DEFAULT_HOURS) -> List[float]:
+    """
+    Get a user's planned commits within a span of time
+
+    The span can cover parts of several of the user's local days (a
+    server day rarely lines up with a user's day); each day's plan is
+    deterministic, so consecutive spans never repeat or drop a commit.
+
+    Args:
+        username: GitHub username
+        repo_name: Repository name
+        start: Epoch seconds (inclusive)
+        end: Epoch seconds (exclusive)
+        hours: The user's business hours
+
+    Returns:
+        Sorted list of commit times in epoch seconds
+    """
+    if end <= start:
+        return []
+
+    key = user_key(username, repo_name)
+    day = local_date(start, hours)
+    last_day = local_date(end - 1, hours)
+    times = []
+    while day <= last_day:
+        window_start, window_end = business_window(day, hours)
+        times.extend(commit_time for commit_time in plan_times(day_seed(key, day), window_start, window_end)
+                     if start <= commit_time < end)
+        day += datetime.timedelta(days=1)
+    return times
+
+def upcoming_commits(username: str, repo_name: str, now: Optional[datetime.datetime] = None,
+                     hours: BusinessHours = DEFAULT_HOURS) -> List[float]:
+    """
+    Get the commits still to come in the current plan
+
+    Once the user's business hours are over for the day this is their
+    next day's plan.
+
+    Args:
+        username: GitHub username
+        repo_name: Repository name
+        now: Current time (defaults to now)
+        hours: The user's business hours
+
+    Returns:
+        Sorted list of future commit times in epoch seconds
+    """
+    if now is None:
+        now = datetime.datetime.now()
+    now_ts = now.timestamp()
+
+    today = local_date(now_ts, hours)
+    _, today_end = business_window(today, hours)
+    if now_ts > today_end:
+        return plan_day(username, repo_name, today + datetime.timedelta(days=1), hours)
+
+    return [commit_time for commit_time in plan_day(username, repo_name, today, hours) if commit_time > now_ts]
+
+def next_commit_time(username: str, repo_name: str, now: Optional[datetime.datetime] = None,
+                     hours: BusinessHours = DEFAULT_HOURS) -> Optional[float]:
+    """
+    Get the next planned commit time for a user
+
+    Args:
+        username: GitHub username
+        repo_name: Repository name
+        now: Current time (defaults to now)
+        hours: The user's business hours
+
+    Returns:
+        Epoch seconds of the next commit, or None if nothing is planned
+    """
+    if now is None:
+        now = datetime.datetime.now()
+
+    upcoming = upcoming_commits(username, repo_name, now, hours)
+    if upcoming:
+        return upcoming[0]
+
+    # Today's commits are done; the next one is the first of tomorrow
+    tomorrow = local_date(now.timestamp(), hours) + datetime.timedelta(days=1)
+    tomorrow_plan = plan_day(username, repo_name, tomorrow, hours)
+    return tomorrow_plan[0] if tomorrow_plan else None
+
+def bulk_plans(users: Iterable[Tuple[str, str]], day: datetime.date,
+               hours: Optional[Sequence[BusinessHours]] = None) -> Dict[str, List[float]]:
+    """
+    Get the plans for many users on one day
+
+    Args:
+        users: Iterable of (username, repo_name)
+        day: Plan date in each user's time zone
+        hours: Business hours of each user, in the same order (defaults for everyone if omitted)
+
+    Returns:
+        Dictionary of username to sorted commit times in epoch seconds
+    """
+    users = list(users)
+    hours = hours or [DEFAULT_HOURS] * len(users)
+    return {
+        username: plan_day(username, repo_name, day, plan_hours)
+        for (username, repo_name), plan_hours in zip(users, hours)
+    }
+
+def bulk_plans_between(users: Iterable[Tuple[str, str]], start: float, end: float,
+                       hours: Optional[Sequence[BusinessHours]] = None) -> Dict[str, List[float]]:
+    """
+    Get many users' planned commits within a span of time
+
+    Args:
+        users: Iterable of (username, repo_name)
+        start: Epoch seconds (inclusive)
+        end: Epoch seconds (exclusive)
+        hours: Business hours of each user, in the same order (defaults for everyone if omitted)
+
+    Returns:
+        Dictionary of username to sorted commit times in epoch seconds
+    """
+    users = list(users)
+    hours = hours or [DEFAULT_HOURS] * len(users)
+    return {
+        username: plan_between(username, repo_name, start, end, plan_hours)
+        for (username, repo_name), plan_hours in zip(users, hours)
+    }
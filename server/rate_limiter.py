@@ -0,0 +1,310 @@
+"""
+Rate Limit Governor Module
+
+This module tracks GitHub rate limits per token from response headers and
+paces requests so they are delayed or rescheduled instead of rejected.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, Mapping, Tuple
+
+# Longest time a request will block waiting for quota before giving up
+RATE_LIMIT_MAX_WAIT = float(os.environ.get("GITHUB_RATE_LIMIT_MAX_WAIT", "10"))
+
+# Requests kept in reserve so interactive calls still work when quota is low
+RATE_LIMIT_RESERVE = int(os.environ.get("GITHUB_RATE_LIMIT_RESERVE", "20"))
+
+# Secondary (content-creation) limits: GitHub asks for at most 80 content
+# requests per minute and roughly one second between mutating requests
+WRITES_PER_MINUTE = float(os.environ.get("GITHUB_WRITES_PER_MINUTE", "80"))
+WRITE_MIN_INTERVAL = float(os.environ.get("GITHUB_WRITE_MIN_INTERVAL", "1"))
+
+# How long to back off after a secondary limit response without Retry-After
+SECONDARY_LIMIT_BACKOFF = 60
+
+MUTATING_METHODS = {"POST", "PATCH", "PUT", "DELETE"}
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would have to wait longer than allowed for quota"""
+
+    def __init__(self, retry_after: float, reason: str):
+        """
+        Initialize with the time until quota is available
+
+        Args:
+            retry_after: Seconds until the request may be sent
+            reason: Which limit is exhausted
+        """
+        super().__init__(f"Rate limited ({reason}), retry in {int(retry_after)} seconds")
+        self.retry_after = retry_after
+        self.reason = reason
+
+class RateLimitGovernor:
+    """Keeps a quota bucket per GitHub token and paces requests against it"""
+
+    def __init__(self, max_wait: float = RATE_LIMIT_MAX_WAIT, reserve: int = RATE_LIMIT_RESERVE,
+                 writes_per_minute: float = WRITES_PER_MINUTE, write_interval: float = WRITE_MIN_INTERVAL,
+                 clock=time.time, sleep=time.sleep):
+        """
+        Initialize the governor
+
+        Args:
+            max_wait: Longest a request may block waiting for quota
+            reserve: Primary quota kept in reserve
+            writes_per_minute: Content-creation requests allowed per minute
+            write_interval: Minimum spacing between mutating requests
+            clock: Function returning the current time in seconds
+            sleep: Function used to wait
+        """
+        self.max_wait = max_wait
+        self.reserve = reserve
+        self.writes_per_minute = writes_per_minute
+        self.write_interval = write_interval
+        self.clock = clock
+        self.sleep = sleep
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        """Key state by a digest so raw tokens aren't held in another structure"""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+    def _state(self, token: str) -> Dict[str, Any]:
+        """Get or create the state for a token (caller holds the lock)"""
+        key = self._key(token)
+        state = self._states.get(key)
+        if state is None:
+            state = {
+                "resources": {},
+                "blocked_until": 0.0,
+                "blocked_reason": "",
+                "secondary_until": 0.0,
+                "write_tokens": self.writes_per_minute,
+                "write_refilled_at": self.clock(),
+                "last_write_at": 0.0
+            }
+            self._states[key] = state
+        return state
+
+    @staticmethod
+    def _resource(state: Dict[str, Any], resource: str) -> Dict[str, Any]:
+        """Get the primary quota for a rate limit resource (caller holds the lock)"""
+        return state["resources"].setdefault(resource, {"limit": None, "remaining": None, "reset_at": 0.0})
+
+    def _refill_writes(self, state: Dict[str, Any], now: float) -> None:
+        """Refill the content-creation bucket (caller holds the lock)"""
+        elapsed = max(0.0, now - state["write_refilled_at"])
+        state["write_tokens"] = min(self.writes_per_minute,
+                                    state["write_tokens"] + elapsed * self.writes_per_minute / 60.0)
+        state["write_refilled_at"] = now
+
+    def _wait_time(self, state: Dict[str, Any], method: str, resource: str, calls: int,
+                   reserve: int, now: float) -> Tuple[float, str]:
+        """
+        Compute how long a request must wait (caller holds the lock)
+
+        Returns:
+            Tuple of (seconds, reason)
+        """
+        if state["blocked_until"] > now:
+            return state["blocked_until"] - now, state["blocked_reason"]
+
+        quota = self._resource(state, resource)
+        remaining = quota["remaining"]
+        if remaining is not None and remaining - calls < reserve and quota["reset_at"] > now:
+            return quota["reset_at"] - now, "primary"
+
+        if method in MUTATING_METHODS:
+            if state["secondary_until"] > now:
+                return state["secondary_until"] - now, "secondary"
+
+            self._refill_writes(state, now)
+            wait = max(0.0, state["last_write_at"] + self.write_interval - now)
+            if state["write_tokens"] < 1:
+                wait = max(wait, (1 - state["write_tokens"]) * 60.0 / self.writes_per_minute)
+            if wait > 0:
+                return wait, "secondary"
+
+        return 0.0, ""
+
+    def try_acquire(self, token: str, method: str, resource: str = "core") -> float:
+        """
+        Take quota for a request if it can be sent right now
+
+        Args:
+            token: GitHub token
+            method: HTTP method of the request
+            resource: Rate limit resource the request counts against
+
+        Returns:
+            0 if quota was taken, otherwise the seconds to wait before trying again
+
+        Raises:
+            RateLimitExceeded: If the wait would exceed max_wait
+        """
+        method = method.upper()
+        with self._lock:
+            state = self._state(token)
+            now = self.clock()
+            wait, reason = self._wait_time(state, method, resource, 1, 0, now)
+
+            if wait <= 0:
+                if method in MUTATING_METHODS:
+                    state["write_tokens"] -= 1
+                    state["last_write_at"] = now
+                quota = self._resource(state, resource)
+                if quota["remaining"] is not None:
+                    quota["remaining"] -= 1
+                return 0.0
+
+        if wait > self.max_wait:
+            raise RateLimitExceeded(wait, reason)
+        return wait
+
+    def acquire(self, token: str, method: str, resource: str = "core") -> None:
+        """
+        Wait until a request may be sent with this token
+
+        Args:
+            token: GitHub token
+            method: HTTP method of the request
+            resource: Rate limit resource the request counts against
+
+        Raises:
+            RateLimitExceeded: If the wait would exceed max_wait
+        """
+        while True:
+            wait = self.try_acquire(token, method, resource)
+            if wait <= 0:
+                return
+            self.sleep(wait)
+
+    async def acquire_async(self, token: str, method: str, resource: str = "core") -> None:
+        """
+        Wait without blocking the event loop until a request may be sent
+
+        Args:
+            token: GitHub token
+            method: HTTP method of the request
+            resource: Rate limit resource the request counts against
+
+        Raises:
+            RateLimitExceeded: If the wait would exceed max_wait
+        """
+        while True:
+            wait = self.try_acquire(token, method, resource)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def observe(self, token: str, status_code: int, headers: Mapping[str, str],
+                message: str = "", resource: str = "core") -> Optional[float]:
+        """
+        Update the state for a token from a GitHub response
+
+        Args:
+            token: GitHub token
+            status_code: HTTP status code
+            headers: Response headers
+            message: Error message from the response body, if any
+            resource: Rate limit resource the request counted against
+
+        Returns:
+            Seconds to wait before retrying if the response was rate limited,
+            None otherwise
+        """
+        with self._lock:
+            state = self._state(token)
+            now = self.clock()
+            quota = self._resource(state, headers.get("X-RateLimit-Resource") or resource)
+
+            try:
+                if headers.get("X-RateLimit-Limit") is not None:
+                    quota["limit"] = int(headers["X-RateLimit-Limit"])
+                if headers.get("X-RateLimit-Remaining") is not None:
+                    quota["remaining"] = int(headers["X-RateLimit-Remaining"])
+                if headers.get("X-RateLimit-Reset") is not None:
+                    quota["reset_at"] = float(headers["X-RateLimit-Reset"])
+            except ValueError:
+                pass
+
+            if status_code not in (403, 429):
+                return None
+
+            retry_after = headers.get("Retry-After")
+            if retry_after is not None:
+                try:
+                    state["blocked_until"] = now + float(retry_after)
+                    state["blocked_reason"] = "retry-after"
+                    return float(retry_after)
+                except ValueError:
+                    pass
+
+            if quota["remaining"] == 0 and quota["reset_at"] > now:
+                state["blocked_until"] = quota["reset_at"]
+                state["blocked_reason"] = "primary"
+                return quota["reset_at"] - now
+
+            if "secondary rate limit" in message.lower() or status_code == 429:
+                state["secondary_until"] = now + SECONDARY_LIMIT_BACKOFF
+                return float(SECONDARY_LIMIT_BACKOFF)
+
+            # A plain 403 is a permission problem, not a rate limit
+            return None
+
+    def time_until_available(self, token: str, calls: int = 1, method: str = "GET",
+                             resource: str = "core") -> float:
+        """
+        Get the number of seconds until a batch of calls can be sent
+
+        Unlike acquire, this keeps the configured reserve free so that
+        background work leaves room for interactive requests.
+
+        Args:
+            token: GitHub token
+            calls: Number of requests the caller intends to send
+            method: HTTP method to check against the secondary limits
+            resource: Rate limit resource the calls count against
+
+        Returns:
+            Seconds until the calls can start, 0 if they can start now
+        """
+        with self._lock:
+            state = self._state(token)
+            wait, _ = self._wait_time(state, method.upper(), resource, calls, self.reserve, self.clock())
+            return wait
+
+    def get_quota(self, token: str) -> Dict[str, Any]:
+        """
+        Get the known quota for a token
+
+        Args:
+            token: GitHub token
+
+        Returns:
+            Dictionary with per-resource quota and any active backoff
+        """
+        with self._lock:
+            state = self._state(token)
+            now = self.clock()
+            self._refill_writes(state, now)
+            return {
+                "resources": {
+                    name: {
+                        "limit": quota["limit"],
+                        "remaining": quota["remaining"],
+                        "reset_at": quota["reset_at"] or None
+                    }
+                    for name, quota in state["resources"].items()
+                },
+                "blocked_for": max(0.0, state["blocked_until"] - now),
+                "secondary_blocked_for": max(0.0, state["secondary_until"] - now),
+                "writes_available": int(state["write_tokens"])
+            }
+
+# Create a global instance of the governor
+rate_limit_governor = RateLimitGovernor()
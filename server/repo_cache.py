@@ -0,0 +1,194 @@
+"""
+Repository Metadata Cache Module
+
+This module keeps the default branch, head commit SHA and tree SHA of each
+repository in memory so commits don't have to look them up every time.
+Heads from push webhooks go through SQLite, since webhooks reach the web
+app while commits run in the scheduler worker. A background thread polls
+for them, so lookups (which the async client makes on its event loop)
+never wait on the database.
+"""
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import database as db
+
+# How often pushed heads are read from the database, and how far each poll
+# looks back so a head written just before the previous poll isn't missed
+REPO_HEADS_POLL_INTERVAL = float(os.environ.get("REPO_HEADS_POLL_INTERVAL", "5"))
+REPO_HEADS_POLL_OVERLAP = 60
+
+class RepoMetadataCache:
+    """Thread-safe per-repository cache of branch head metadata"""
+
+    def __init__(self):
+        """Initialize an empty cache"""
+        self._entries: Dict[tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        # Pushed heads are applied up to this time by the poller thread
+        self._pushed_since = 0.0
+        self._poller: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _key(owner: str, repo_name: str) -> tuple:
+        """GitHub owner and repository names are case-insensitive"""
+        return (owner.lower(), repo_name.lower())
+
+    def get(self, owner: str, repo_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached metadata for a repository
+
+        Args:
+            owner: Repository owner
+            repo_name: Repository name
+
+        Returns:
+            Dictionary with default_branch, head_sha and tree_sha, or None
+            if the repository is not cached or only partially known
+        """
+        self._start_poller()
+        with self._lock:
+            entry = self._entries.get(self._key(owner, repo_name))
+            if entry and entry.get("default_branch") and entry.get("head_sha") and entry.get("tree_sha"):
+                self.hits += 1
+                return dict(entry)
+            self.misses += 1
+            return None
+
+    def update(self, owner: str, repo_name: str, default_branch: Optional[str] = None,
+               head_sha: Optional[str] = None, tree_sha: Optional[str] = None) -> None:
+        """
+        Update cached metadata for a repository
+
+        Only the fields that are given are changed. Moving the head without
+        a matching tree SHA drops the stale tree SHA.
+
+        Args:
+            owner: Repository owner
+            repo_name: Repository name
+            default_branch: Default branch name
+            head_sha: SHA of the commit the default branch points to
+            tree_sha: SHA of the tree of the head commit
+        """
+        with self._lock:
+            entry = self._entries.setdefault(self._key(owner, repo_name), {})
+            if default_branch:
+                entry["default_branch"] = default_branch
+            if head_sha and head_sha != entry.get("head_sha"):
+                entry["head_sha"] = head_sha
+                entry["tree_sha"] = None
+            if tree_sha:
+                entry["tree_sha"] = tree_sha
+            entry["updated_at"] = time.time()
+
+    def invalidate(self, owner: str, repo_name: str) -> None:
+        """
+        Drop cached metadata for a repository
+
+        Args:
+            owner: Repository owner
+            repo_name: Repository name
+        """
+        with self._lock:
+            self._entries.pop(self._key(owner, repo_name), None)
+
+    def _start_poller(self) -> None:
+        """Start polling for pushed heads on first use"""
+        with self._lock:
+            if self._poller is not None:
+                return
+            self._poller = threading.Thread(target=self._poll_pushed_heads, name="repo-heads-poller", daemon=True)
+            self._poller.start()
+
+    def _poll_pushed_heads(self) -> None:
+        """Apply pushed heads now and every REPO_HEADS_POLL_INTERVAL seconds after"""
+        while True:
+            try:
+                self.apply_pushed_heads()
+            except Exception as e:
+                print(f"Error polling pushed heads: {str(e)}")
+            time.sleep(REPO_HEADS_POLL_INTERVAL)
+
+    def apply_pushed_heads(self) -> int:
+        """
+        Take in heads stored by push webhooks (in any process) since the last poll
+
+        A head is only applied if it is newer than our entry, so heads seen
+        again in the overlap are skipped.
+
+        Returns:
+            Number of heads applied
+        """
+        applied = 0
+        for pushed in db.get_pushed_heads_since(max(0.0, self._pushed_since - REPO_HEADS_POLL_OVERLAP)):
+            key = (pushed["owner"], pushed["repo_name"])
+            self._pushed_since = max(self._pushed_since, pushed["pushed_at"])
+
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry.get("updated_at", 0) >= pushed["pushed_at"]:
+                    continue
+
+            if pushed["head_sha"] is None:
+                self.invalidate(*key)
+            else:
+                self.update(*key, default_branch=pushed["default_branch"],
+                            head_sha=pushed["head_sha"], tree_sha=pushed["tree_sha"])
+            applied += 1
+        return applied
+
+    def update_from_push(self, payload: Dict[str, Any]) -> bool:
+        """
+        Update cached metadata from a push webhook payload
+
+        Args:
+            payload: Webhook payload
+
+        Returns:
+            True if the cache was updated, False otherwise
+        """
+        repository = payload.get("repository") or {}
+        repo_name = repository.get("name")
+        owner = repository.get("owner") or {}
+        owner_name = owner.get("name") or owner.get("login")
+        default_branch = repository.get("default_branch")
+        after = payload.get("after")
+
+        if not repo_name or not owner_name or not default_branch or not after:
+            return False
+
+        # Pushes to other branches don't move the branch we commit to
+        if payload.get("ref") != f"refs/heads/{default_branch}":
+            return False
+
+        if payload.get("deleted") or set(after) == {"0"}:
+            self.invalidate(owner_name, repo_name)
+            db.store_pushed_head(*self._key(owner_name, repo_name), default_branch, None, None)
+            return True
+
+        head_commit = payload.get("head_commit") or {}
+        tree_sha = head_commit.get("tree_id") if head_commit.get("id") == after else None
+
+        self.update(owner_name, repo_name, default_branch=default_branch,
+                    head_sha=after, tree_sha=tree_sha)
+        db.store_pushed_head(*self._key(owner_name, repo_name), default_branch, after, tree_sha)
+        print(f"Updated cached head for {owner_name}/{repo_name}: {after[:7]}")
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with entry, hit and miss counts
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+# Create a global instance of the cache
+repo_cache = RepoMetadataCache()
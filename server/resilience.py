@@ -0,0 +1,173 @@
+"""
+Resilience Module
+
+This module provides retry backoff and a per-host circuit breaker for
+outgoing GitHub API calls.
+"""
+import os
+import random
+import threading
+import time
+from typing import Dict, Any
+
+# Retry configuration for idempotent requests
+GITHUB_MAX_RETRIES = int(os.environ.get("GITHUB_MAX_RETRIES", "3"))
+GITHUB_RETRY_BASE_DELAY = float(os.environ.get("GITHUB_RETRY_BASE_DELAY", "0.5"))
+GITHUB_RETRY_MAX_DELAY = float(os.environ.get("GITHUB_RETRY_MAX_DELAY", "8"))
+
+# Circuit breaker configuration
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("GITHUB_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.environ.get("GITHUB_BREAKER_RESET_TIMEOUT", "30"))
+
+# Status codes that mean the server side failed and the call may succeed later
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+def backoff_delay(attempt: int, base: float = GITHUB_RETRY_BASE_DELAY,
+                  cap: float = GITHUB_RETRY_MAX_DELAY) -> float:
+    """
+    Get a jittered exponential backoff delay
+
+    Uses "full jitter": a random delay between zero and the exponential
+    ceiling, which spreads out retries from many workers.
+
+    Args:
+        attempt: Retry number, starting at 1
+        base: Delay ceiling for the first retry
+        cap: Maximum delay ceiling
+
+    Returns:
+        Seconds to wait before the retry
+    """
+    ceiling = min(cap, base * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+class CircuitOpenError(Exception):
+    """Raised when calls to a host are being shed because its circuit is open"""
+
+    def __init__(self, host: str, retry_after: float):
+        """
+        Initialize with the time until the circuit allows a trial call
+
+        Args:
+            host: Host whose circuit is open
+            retry_after: Seconds until a trial call is allowed
+        """
+        super().__init__(f"Circuit open for {host}, retry in {int(retry_after)} seconds")
+        self.host = host
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Per-host circuit breaker that sheds load while a host keeps failing"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT, clock=time.time):
+        """
+        Initialize the breaker
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+            clock: Function returning the current time in seconds
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> Dict[str, Any]:
+        """Get or create the state for a host (caller holds the lock)"""
+        return self._hosts.setdefault(host, {
+            "state": self.CLOSED,
+            "failures": 0,
+            "opened_at": 0.0,
+            "trial_in_flight": False,
+            "rejected": 0
+        })
+
+    def before_call(self, host: str) -> None:
+        """
+        Check whether a call to a host may proceed
+
+        Args:
+            host: Target host
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        with self._lock:
+            state = self._host(host)
+            if state["state"] == self.CLOSED:
+                return
+
+            now = self.clock()
+            if state["state"] == self.OPEN:
+                remaining = state["opened_at"] + self.reset_timeout - now
+                if remaining > 0:
+                    state["rejected"] += 1
+                    raise CircuitOpenError(host, remaining)
+                state["state"] = self.HALF_OPEN
+                state["trial_in_flight"] = False
+
+            # Half-open: let a single trial call through
+            if state["trial_in_flight"]:
+                state["rejected"] += 1
+                raise CircuitOpenError(host, self.reset_timeout)
+            state["trial_in_flight"] = True
+
+    def record_success(self, host: str) -> None:
+        """
+        Record a successful call, closing the circuit
+
+        Args:
+            host: Target host
+        """
+        with self._lock:
+            state = self._host(host)
+            if state["state"] != self.CLOSED:
+                print(f"Circuit for {host} closed")
+            state["state"] = self.CLOSED
+            state["failures"] = 0
+            state["trial_in_flight"] = False
+
+    def record_failure(self, host: str) -> None:
+        """
+        Record a failed call, opening the circuit once the threshold is hit
+
+        Args:
+            host: Target host
+        """
+        with self._lock:
+            state = self._host(host)
+            state["failures"] += 1
+            state["trial_in_flight"] = False
+
+            if state["state"] == self.HALF_OPEN or state["failures"] >= self.failure_threshold:
+                if state["state"] != self.OPEN:
+                    print(f"Circuit for {host} opened after {state['failures']} failures")
+                state["state"] = self.OPEN
+                state["opened_at"] = self.clock()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the state of every tracked host
+
+        Returns:
+            Dictionary of host to state, failure count and rejected calls
+        """
+        with self._lock:
+            return {
+                host: {
+                    "state": state["state"],
+                    "failures": state["failures"],
+                    "rejected": state["rejected"]
+                }
+                for host, state in self._hosts.items()
+            }
+
+# Create a global instance of the circuit breaker
+circuit_breaker = CircuitBreaker()
@@ -3,20 +3,90 @@ Scheduler Module
 
 This module handles scheduling of commits and other periodic tasks.
 """
+import os
+import atexit
 import random
 import json
+import time
 import datetime
+import threading
 from typing import Dict, List, Any, Optional, Callable
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 import database as db
-from github_client import GitHubClient
+import planner
+import batch_planner
+import catchup
+from github_client import GitHubClient, get_pool_stats, COMMIT_BACKEND_REST, COMMIT_BACKEND_GRAPHQL
+from etag_cache import etag_cache
+from repo_cache import repo_cache
+from resilience import circuit_breaker
+from rate_limiter import rate_limit_governor, RATE_LIMIT_MAX_WAIT
+from dispatcher import CommitDispatcher
+from leader import LeaderElector
+
+# Commit backend used for scheduled commits ("rest" or "graphql")
+COMMIT_BACKEND = os.environ.get("COMMIT_BACKEND", COMMIT_BACKEND_REST)
+
+# How scheduled commits are executed: on scheduler threads or on an asyncio loop
+COMMIT_EXECUTOR_THREAD = "thread"
+COMMIT_EXECUTOR_ASYNC = "async"
+COMMIT_EXECUTOR = os.environ.get("COMMIT_EXECUTOR", COMMIT_EXECUTOR_THREAD)
+
+# Worst-case API calls one commit costs with each backend
+COMMIT_API_CALLS = {COMMIT_BACKEND_REST: 7, COMMIT_BACKEND_GRAPHQL: 2}
+
+# One APScheduler job plans the whole fleet each night
+DAILY_PLANNING_JOB_ID = "daily_planner"
+
+# Users planned per batch, and the window after midnight batches are spread over
+PLANNING_BATCH_SIZE = int(os.environ.get("PLANNING_BATCH_SIZE", "500"))
+PLANNING_WINDOW_SECONDS = float(os.environ.get("PLANNING_WINDOW_SECONDS", "600"))
+
+# Users' business hours rarely line up with the server's day, so each pass
+# plans through this long after the next midnight; commits due before the
+# next pass reaches a user are already scheduled
+PLANNING_OVERLAP_SECONDS = float(os.environ.get("PLANNING_OVERLAP_SECONDS", str(PLANNING_WINDOW_SECONDS + 3600)))
+
+# The leader picks up new users and changed business hours this often
+NEW_USER_SYNC_JOB_ID = "plan_new_users"
+NEW_USER_SYNC_INTERVAL = int(os.environ.get("NEW_USER_SYNC_INTERVAL", "60"))
+
+# Per-user midnight jobs created by earlier versions (removed on restore)
+LEGACY_DAILY_JOB_SUFFIX = "_daily_scheduler"
+
+# Outbox: how long a claimed job is reserved for its executor, and how the
+# leader sweeps up due or abandoned jobs in batches
+OUTBOX_LEASE_SECONDS = int(os.environ.get("OUTBOX_LEASE_SECONDS", "300"))
+OUTBOX_CLAIM_BATCH = int(os.environ.get("OUTBOX_CLAIM_BATCH", "50"))
+OUTBOX_SWEEP_JOB_ID = "drain_outbox"
+OUTBOX_SWEEP_INTERVAL = int(os.environ.get("OUTBOX_SWEEP_INTERVAL", "60"))
+
+# Scheduler processes publish planning progress and client counters this
+# often so the web app can show them; rows older than a few intervals
+# belong to processes that have stopped
+STATS_PUBLISH_INTERVAL = int(os.environ.get("STATS_PUBLISH_INTERVAL", "15"))
+STATS_MAX_AGE = STATS_PUBLISH_INTERVAL * 4
+
+def commit_key(job: Dict[str, Any]) -> str:
+    """
+    Get the idempotency key for a scheduled job
+
+    The key goes into the commit message, so a retry after a crash can
+    tell whether the first attempt already landed.
 
-# Store for user jobs
-user_jobs = {}
+    Args:
+        job: Claimed job dictionary
+
+    Returns:
+        Key string
+    """
+    return f"{job['user_id']}-{job['id']}"
 
 # Define standalone functions for job execution to avoid serialization issues
-def make_scheduled_commit(token: str, username: str, repo_name: str) -> None:
+def make_scheduled_commit(token: str, username: str, repo_name: str,
+                          job: Optional[Dict[str, Any]] = None) -> None:
     """
     Make a scheduled commit (standalone function)
 
@@ -24,6 +94,7 @@ def make_scheduled_commit(token: str, username: str, repo_name: str) -> None:
         token: GitHub token
         username: GitHub username
         repo_name: Repository name
+        job: Claimed outbox job the commit belongs to, if any
     """
     print(f"\n=== Scheduled Commit Execution ===")
     print(f"Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -31,36 +102,38 @@ def make_scheduled_commit(token: str, username: str, repo_name: str) -> None:
     print(f"Repository: {repo_name}")
 
     try:
+        # Don't start a commit that would run out of quota halfway through
+        resource = "graphql" if COMMIT_BACKEND == COMMIT_BACKEND_GRAPHQL else "core"
+        wait = rate_limit_governor.time_until_available(
+            token, COMMIT_API_CALLS.get(COMMIT_BACKEND, 7), resource=resource)
+        if wait > RATE_LIMIT_MAX_WAIT:
+            print(f"Rate limit quota low for {username}, rescheduling commit")
+            reschedule_commit(username, wait, job)
+            print("=== End of Scheduled Commit ===\n")
+            return
+
         commit_message = f"Automated commit at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
 
+        if COMMIT_EXECUTOR == COMMIT_EXECUTOR_ASYNC:
+            # Hand the commit to the event loop and free this scheduler thread
+            from async_executor import async_commit_executor
+            async_commit_executor.submit(token, username, repo_name, commit_message, job)
+            print(f"Handed commit to async executor with message: {commit_message}")
+            print("=== End of Scheduled Commit ===\n")
+            return
+
         # Create GitHub client
         github_client = GitHubClient(token)
 
         # Make the commit
         print(f"Initiating commit with message: {commit_message}")
-        commit_data, success, commit_sha = github_client.make_commit(username, repo_name, commit_message)
+        # A job claimed more than once may have landed before an earlier executor died
+        commit_data, success, commit_sha = github_client.make_commit(
+            username, repo_name, commit_message, backend=COMMIT_BACKEND,
+            idempotency_key=commit_key(job) if job else None,
+            check_existing=bool(job) and job["attempts"] > 1)
 
-        if success:
-            print(f"✓ Commit successful!")
-            print(f"Commit SHA: {commit_sha}")
-
-            # Record the commit in the database
-            commit_url = f"https://github.com/{username}/{repo_name}/commit/{commit_sha}"
-            db_success = db.record_commit(username, repo_name, commit_sha, commit_message, commit_url)
-
-            if db_success:
-                print(f"✓ Commit recorded in database")
-            else:
-                print(f"✗ Failed to record commit in database")
-        else:
-            print(f"✗ Commit failed")
-            if isinstance(commit_data, dict):
-                if "message" in commit_data:
-                    print(f"Error message: {commit_data['message']}")
-                elif "error" in commit_data:
-                    print(f"Error: {commit_data['error']}")
-                else:
-                    print(f"Error data: {commit_data}")
+        handle_commit_result(token, username, repo_name, commit_message, commit_data, success, commit_sha, job)
 
     except Exception as e:
         print(f"✗ Exception during scheduled commit: {str(e)}")
@@ -73,149 +146,235 @@ def make_scheduled_commit(token: str, username: str, repo_name: str) -> None:
     # This will ensure the next_commit information is updated for the frontend
     commit_scheduler.update_next_commit_info(username)
 
-def schedule_todays_commits_job(username: str, token: str, repo_name: str) -> None:
+def handle_commit_result(token: str, username: str, repo_name: str, commit_message: str,
+                         commit_data: Dict, success: bool, commit_sha: str,
+                         job: Optional[Dict[str, Any]] = None) -> None:
     """
-    Standalone function to schedule today's commits
+    Record, reschedule or report the outcome of a scheduled commit
+
+    For outbox jobs the job is marked done together with the commit record,
+    put back with a new due time, or marked failed.
 
     Args:
-        username: GitHub username
         token: GitHub token
+        username: GitHub username
         repo_name: Repository name
+        commit_message: Commit message that was used
+        commit_data: Response data from make_commit
+        success: Whether the commit landed
+        commit_sha: SHA of the new commit
+        job: Claimed outbox job the commit belongs to, if any
     """
-    print(f"Scheduling today's commits for {username}/{repo_name}")
+    if success:
+        print(f"✓ Commit successful!")
+        print(f"Commit SHA: {commit_sha}")
+
+        # Record the commit in the database
+        commit_url = f"https://github.com/{username}/{repo_name}/commit/{commit_sha}"
+        if job:
+            db_success = db.complete_job(job["id"], username, repo_name, commit_sha, commit_message, commit_url)
+        else:
+            db_success = db.record_commit(username, repo_name, commit_sha, commit_message, commit_url)
 
-    # Get the scheduler instance
+        if db_success:
+            print(f"✓ Commit recorded in database")
+        else:
+            print(f"✗ Failed to record commit in database")
+    elif isinstance(commit_data, dict) and commit_data.get("retry_after") is not None:
+        print(f"✗ Commit rate limited")
+        reschedule_commit(username, commit_data["retry_after"], job)
+    else:
+        print(f"✗ Commit failed")
+        if job:
+            db.fail_job(job["id"])
+        if isinstance(commit_data, dict):
+            if "message" in commit_data:
+                print(f"Error message: {commit_data['message']}")
+            elif "error" in commit_data:
+                print(f"Error: {commit_data['error']}")
+            else:
+                print(f"Error data: {commit_data}")
+
+def reschedule_commit(username: str, delay: float, job: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Reschedule a commit that was held back by GitHub rate limits
+
+    Args:
+        username: GitHub username
+        delay: Seconds until quota is expected to be available
+        job: Claimed outbox job to put back, if any
+    """
     from scheduler import commit_scheduler
 
-    # Clear existing jobs for this user
-    if username in user_jobs:
-        for job_id in user_jobs[username]:
-            if not job_id.endswith("daily_scheduler"):
-                try:
-                    commit_scheduler.scheduler.remove_job(job_id)
-                    print(f"Removed existing job {job_id}")
-                except Exception as e:
-                    print(f"Error removing job {job_id}: {str(e)}")
-
-        # Keep only the daily scheduler job
-        user_jobs[username] = [job_id for job_id in user_jobs[username]
-                              if job_id.endswith("daily_scheduler")]
-
-    # Choose random number of commits for today (1-10)
-    # For testing, ensure at least one commit is scheduled in the next few minutes
-    num_commits = random.randint(1, 10)
-    print(f"Scheduling {num_commits} commits for today")
+    # Small jitter so deferred commits for the same token don't all fire together
+    run_date = commit_scheduler.now() + datetime.timedelta(seconds=delay + random.randint(1, 30))
+    if job:
+        db.release_job(job["id"], run_date.timestamp())
+        commit_scheduler.dispatcher.schedule(username, float(int(run_date.timestamp())))
+    else:
+        commit_scheduler.add_commit(username, run_date.timestamp())
+    print(f"Rescheduled commit for {username} at {run_date}")
 
-    # Debug: Force a commit to be scheduled soon for testing
-    debug_force_commit = False  # Set to False in production
-    if debug_force_commit:
-        # Schedule a commit in the next 5 minutes for testing
-        now = datetime.datetime.now()
-        test_commit_time = now + datetime.timedelta(minutes=5)
-        job_id = f"{username}_{repo_name}_test"
+def dispatch_scheduled_commit(username: str, due_time: float) -> None:
+    """
+    Run a commit handed out by the dispatcher
 
-        try:
-            print(f"DEBUG: Scheduling a test commit at {test_commit_time}")
-            commit_scheduler.scheduler.add_job(
-                func=make_scheduled_commit,
-                trigger="date",
-                run_date=test_commit_time,
-                id=job_id,
-                args=[token, username, repo_name],
-                replace_existing=True
-            )
+    Credentials are looked up when the commit fires rather than being
+    stored with every scheduled entry.
 
-            # Add to user_jobs if not already there
-            if job_id not in user_jobs.get(username, []):
-                user_jobs.setdefault(username, []).append(job_id)
+    Args:
+        username: GitHub username
+        due_time: Epoch seconds the commit was scheduled for
+    """
+    from scheduler import commit_scheduler
 
-            print(f"DEBUG: Scheduled test commit with job ID {job_id}")
-        except Exception as e:
-            print(f"DEBUG: Error scheduling test commit: {str(e)}")
+    # A demoted process may still have entries in flight; only the leader commits
+    if not commit_scheduler.is_leader():
+        print(f"Skipping scheduled commit for {username}: not the scheduler leader")
+        return
 
-    # Get business hours (9 AM to 9 PM)
-    now = datetime.datetime.now()
-    start_time = datetime.datetime(now.year, now.month, now.day, 9, 0, 0)
-    end_time = datetime.datetime(now.year, now.month, now.day, 21, 0, 0)  # 9 PM
+    # Claim the outbox job; if someone else has it (or it was replaced) there's nothing to do
+    job = db.claim_job(username, due_time, commit_scheduler.elector.holder_id,
+                       commit_scheduler.clock(), OUTBOX_LEASE_SECONDS)
+    if job is None:
+        print(f"Skipping scheduled commit for {username}: job already claimed or replaced")
+        return
 
-    # Always schedule for today, even if it's past business hours
-    # This ensures we always have the right number of commits scheduled
+    run_claimed_job(username, job)
 
-    # If it's before 9 AM, start at 9 AM
-    effective_start = max(now, start_time)
+def run_claimed_job(username: str, job: Dict[str, Any]) -> None:
+    """
+    Execute an outbox job this process has claimed
 
-    # If it's already past 9 PM, schedule for tomorrow
-    if now > end_time:
-        print("It's past business hours, scheduling for tomorrow's business hours")
-        tomorrow = now + datetime.timedelta(days=1)
-        start_time = datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, 9, 0, 0)
-        end_time = datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, 21, 0, 0)
-        effective_start = start_time
+    Args:
+        username: GitHub username
+        job: Claimed job dictionary
+    """
+    user_data = db.get_user_token(username)
+    if not user_data or not user_data.get("token") or not user_data.get("repo_name"):
+        print(f"Skipping scheduled commit for {username}: no token or repository")
+        db.fail_job(job["id"])
+        return
 
-    # Calculate available seconds in the business hours
-    available_seconds = (end_time - effective_start).total_seconds()
+    make_scheduled_commit(user_data["token"], username, user_data["repo_name"], job)
 
-    # Ensure we have enough time for all commits (at least 60 seconds apart)
-    min_time_needed = num_commits * 60  # 60 seconds minimum between commits
+def schedule_todays_commits_job(username: str, token: str, repo_name: str) -> None:
+    """
+    Standalone function to schedule today's commits
 
-    if available_seconds < min_time_needed:
-        print(f"Not enough time for {num_commits} commits. Adjusting to fit within business hours.")
-        num_commits = max(1, int(available_seconds / 60))
-        print(f"Adjusted to {num_commits} commits")
+    Args:
+        username: GitHub username
+        token: GitHub token
+        repo_name: Repository name
+    """
+    print(f"Scheduling today's commits for {username}/{repo_name}")
 
-    # Divide the business hours into segments
-    segment_seconds = available_seconds / num_commits
+    # Get the scheduler instance
+    from scheduler import commit_scheduler
 
-    # Schedule the commits at random times within each segment
-    current_time = effective_start
-    for i in range(num_commits):
-        # Calculate the end of this segment
-        segment_end = current_time + datetime.timedelta(seconds=segment_seconds)
+    # Other processes leave planning to the leader's new-user sync
+    if not commit_scheduler.is_leader():
+        print(f"Not the scheduler leader; {username} will be planned by the leader")
+        return
+    commit_times = []
 
-        # Choose a random time within this segment
-        # Ensure at least 60 seconds from the start of the segment
-        min_seconds = min(60, int(segment_seconds * 0.1))
-        max_seconds = max(min_seconds, int(segment_seconds * 0.9))
+    # Debug: Force a commit to be scheduled soon for testing
+    debug_force_commit = False  # Set to False in production
+    if debug_force_commit:
+        # Schedule a commit in the next 5 minutes for testing
+        now = commit_scheduler.now()
+        test_commit_time = now + datetime.timedelta(minutes=5)
+        print(f"DEBUG: Scheduling a test commit at {test_commit_time}")
+        commit_times.append(test_commit_time.timestamp())
+
+    # The plan is derived from (user, repo, date), so re-running this job
+    # schedules the same remaining commits rather than a fresh random set.
+    # Once the user's business hours are over this is their next day's plan.
+    user_data = db.get_user(username) or {}
+    commit_times.extend(planner.upcoming_commits(username, repo_name, commit_scheduler.now(),
+                                                 planner.user_hours(user_data)))
+    print(f"Scheduling {len(commit_times)} commits for {username}")
+
+    # Replace whatever this user had pending
+    cancelled = commit_scheduler.replace_commits(username, commit_times)
+    if cancelled:
+        print(f"Removed {cancelled} existing commits for {username}")
+
+    for i, commit_time in enumerate(commit_times):
+        print(f"Scheduled commit {i + 1}/{len(commit_times)} at {datetime.datetime.fromtimestamp(commit_time)}")
+
+def plan_all_users_job() -> None:
+    """Standalone function for the nightly fleet-wide planning pass"""
+    from scheduler import commit_scheduler
+    commit_scheduler.plan_all_users()
 
-        random_seconds = random.randint(min_seconds, max_seconds)
-        commit_time = current_time + datetime.timedelta(seconds=random_seconds)
+def plan_new_users_job() -> None:
+    """Standalone function planning users added since the last planning pass"""
+    from scheduler import commit_scheduler
+    commit_scheduler.plan_new_users()
 
-        # Ensure we're still within business hours
-        if commit_time > end_time:
-            commit_time = end_time - datetime.timedelta(seconds=60)
-            print(f"Adjusted commit time to stay within business hours: {commit_time}")
+def drain_outbox_job() -> None:
+    """Standalone function sweeping due and abandoned outbox jobs"""
+    from scheduler import commit_scheduler
+    commit_scheduler.drain_outbox()
 
-        # Schedule the job
-        job_id = f"{username}_{repo_name}_{i}"
+class CommitScheduler:
+    """Handles scheduling of commits"""
 
-        # Check if job already exists in the scheduler
-        try:
-            commit_scheduler.scheduler.add_job(
-                func=make_scheduled_commit,
-                trigger="date",
-                run_date=commit_time,
-                id=job_id,
-                args=[token, username, repo_name],
-                replace_existing=True  # Replace if job already exists
-            )
+    def __init__(self, clock: Callable[[], float] = time.time,
+                 monotonic: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize the scheduler
 
-            # Add to user_jobs if not already there
-            if job_id not in user_jobs.get(username, []):
-                user_jobs.setdefault(username, []).append(job_id)
+        Nothing runs until start() is called, so processes that only read
+        schedule state (the web app) can import this module cheaply.
 
-            print(f"Scheduled commit at {commit_time} with job ID {job_id}")
-        except Exception as e:
-            print(f"Error scheduling job {job_id}: {str(e)}")
+        Args:
+            clock: Function returning the current time in epoch seconds
+                (replaced by a virtual clock in simulate.py)
+            monotonic: Function returning seconds for pacing planning batches
+            sleep: Function waiting for a planning batch's slot
+        """
+        self.scheduler = BackgroundScheduler()
+        self.started = False
+        self.clock = clock
+        self.monotonic = monotonic
+        self.sleep = sleep
+
+        # Individual commits are kept in the dispatcher rather than the job store
+        self.dispatcher = CommitDispatcher(dispatch_scheduled_commit, clock=clock)
+
+        # Users whose plan for today is in the dispatcher, and when the leader
+        # last looked for new users and changed business hours
+        self.planned_users = set()
+        self.last_user_sync = 0.0
+
+        # Progress of the most recent planning pass
+        self.planning_status = {
+            "running": False,
+            "started_at": None,
+            "finished_at": None,
+            "users_total": 0,
+            "users_planned": 0,
+            "batches_total": 0,
+            "batches_done": 0,
+            "commits_scheduled": 0,
+            "max_lag_seconds": 0.0,
+            "errors": 0
+        }
 
-        # Move to the next segments
-        current_time = current_time + datetime.timedelta(seconds=segment_seconds)
+        # Set once missed commits have been rescheduled after taking over;
+        # the outbox sweep waits for it so they aren't claimed in one burst
+        self.caught_up = False
 
-class CommitScheduler:
-    """Handles scheduling of commits"""
+        self.elector = LeaderElector(self._on_elected, self._on_demoted)
 
-    def __init__(self):
-        """Initialize the scheduler"""
-        self.scheduler = BackgroundScheduler()
+    def start(self) -> None:
+        """Start contending for the scheduler lease (used by the scheduler worker)"""
+        if self.started:
+            return
+        self.started = True
 
         # Configure the scheduler to use a more robust job store
         # This helps ensure jobs persist even if the application is restarted
@@ -229,9 +388,114 @@ class CommitScheduler:
             print("SQLAlchemy not available, using memory job store (jobs will be lost on restart)")
             pass
 
-        # Start the scheduler
-        self.scheduler.start()
-        print("Commit scheduler initialized and started")
+        # Every worker can hold jobs, but only the elected leader runs them
+        # and dispatches commits; the others stay paused until they take over
+        self.scheduler.start(paused=True)
+        self.elector.start()
+
+        # Hand the lease back on a clean exit so another process takes over at once
+        atexit.register(self.stop)
+        print("Commit scheduler started, waiting for leader election")
+
+    def stop(self) -> None:
+        """Release the lease and stop running jobs and commits"""
+        if not self.started:
+            return
+        self.started = False
+
+        self.elector.stop()
+        self.dispatcher.stop()
+        self.scheduler.shutdown(wait=False)
+        print("Commit scheduler stopped")
+
+    def is_leader(self) -> bool:
+        """Whether this process runs planning and dispatch"""
+        return self.elector.is_leader()
+
+    def now(self) -> datetime.datetime:
+        """Current local time according to the scheduler clock"""
+        return datetime.datetime.fromtimestamp(self.clock())
+
+    def planning_horizon(self, now: datetime.datetime) -> float:
+        """
+        Get the end of the span a planning pass at a given time covers
+
+        Args:
+            now: Current local time
+
+        Returns:
+            Epoch seconds, PLANNING_OVERLAP_SECONDS past the next midnight
+        """
+        next_midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+        return next_midnight.timestamp() + PLANNING_OVERLAP_SECONDS
+
+    def _on_elected(self) -> None:
+        """Start running jobs and commits after winning the lease"""
+        self.scheduler.resume()
+        self.dispatcher.start()
+
+        # Planning every user can outlast a heartbeat, so keep it off the elector thread
+        threading.Thread(target=self.restore_schedulers, name="scheduler-restore", daemon=True).start()
+
+    def _on_demoted(self) -> None:
+        """Stop running jobs and drop pending commits after losing the lease"""
+        self.scheduler.pause()
+        self.dispatcher.stop(wait=False)
+        self.dispatcher.clear()
+        self.planned_users = set()
+        self.caught_up = False
+
+    def add_commit(self, username: str, due_time: float) -> None:
+        """
+        Add one pending commit to the job table and the dispatcher
+
+        Args:
+            username: GitHub username
+            due_time: Epoch seconds when the commit should run
+        """
+        db.add_scheduled_job(username, due_time)
+        self.dispatcher.schedule(username, due_time)
+
+    def replace_commits(self, username: str, due_times: List[float]) -> int:
+        """
+        Replace a user's pending commits in the job table and the dispatcher
+
+        Args:
+            username: GitHub username
+            due_times: Epoch seconds of the new commits
+
+        Returns:
+            Number of commits that were pending before
+        """
+        user_id = db.get_user_id(username)
+        if user_id is not None:
+            db.replace_scheduled_jobs({user_id: due_times})
+
+        cancelled = self.dispatcher.cancel_user(username)
+        self.dispatcher.schedule_many(username, due_times)
+        if user_id is not None:
+            self._reschedule_extra_jobs({user_id: username})
+        self.planned_users.add(username)
+        return cancelled
+
+    def _reschedule_extra_jobs(self, usernames_by_id: Dict[int, str]) -> int:
+        """
+        Put users' retried and caught-up jobs back in the dispatcher
+
+        Re-planning cancels everything the dispatcher holds for a user, but
+        only replaces their planned jobs in the job table.
+
+        Args:
+            usernames_by_id: Dictionary of user id to username
+
+        Returns:
+            Number of jobs put back
+        """
+        restored = 0
+        for user_id, due_times in db.get_extra_jobs(list(usernames_by_id)).items():
+            self.dispatcher.schedule_many(usernames_by_id[user_id], [float(due_at) for due_at in due_times])
+            restored += len(due_times)
+        return restored
 
     def setup_daily_commits(self, username: str, token: str, repo_name: str) -> None:
         """
@@ -247,79 +511,340 @@ class CommitScheduler:
         # Schedule today's commits immediately
         schedule_todays_commits_job(username, token, repo_name)
 
-        # Set up recurring daily job to schedule commits at the start of each day
-        scheduler_job_id = f"{username}_daily_scheduler"
-
-        # Remove any existing scheduler for this user
-        if scheduler_job_id in user_jobs.get(username, []):
-            try:
-                self.scheduler.remove_job(scheduler_job_id)
-                print(f"Removed existing daily scheduler for {username}")
-            except Exception as e:
-                print(f"Error removing existing scheduler: {str(e)}")
-
-        # Add the new midnight scheduler
-        self.scheduler.add_job(
-            func=schedule_todays_commits_job,
-            trigger=CronTrigger(hour=0, minute=0),
-            id=scheduler_job_id,
-            args=[username, token, repo_name],
-            replace_existing=True
-        )
-
-        print(f"Added daily scheduler for {username} at midnight")
-
-        if username not in user_jobs:
-            user_jobs[username] = []
-        user_jobs[username].append(scheduler_job_id)
+        # Later days are covered by the nightly planning pass
+        self.setup_daily_planning()
 
     def setup_midnight_scheduler(self, username: str, token: str, repo_name: str) -> None:
         """
-        Set up only the midnight scheduler job
+        Make sure a user is covered by the nightly planning pass
+
+        There is no per-user midnight job any more; every user with a
+        repository is planned by the single fleet-wide job.
 
         Args:
             username: GitHub username
             token: GitHub token
             repo_name: Repository name
         """
-        print(f"Setting up midnight scheduler for {username}/{repo_name}")
+        print(f"Ensuring nightly planning covers {username}/{repo_name}")
+        self.setup_daily_planning()
 
-        # Add job to run at midnight each day
-        scheduler_job_id = f"{username}_daily_scheduler"
+    def setup_daily_planning(self) -> None:
+        """Add the fleet-wide planning job at midnight if it isn't registered"""
+        # The leader registers the jobs when it is elected
+        if not self.is_leader():
+            return
 
         try:
-            # Add the midnight scheduler with replace_existing=True
+            job_ids = (DAILY_PLANNING_JOB_ID, NEW_USER_SYNC_JOB_ID, OUTBOX_SWEEP_JOB_ID)
+            if all(self.scheduler.get_job(job_id) is not None for job_id in job_ids):
+                return
+
             self.scheduler.add_job(
-                func=schedule_todays_commits_job,
+                func=plan_all_users_job,
                 trigger=CronTrigger(hour=0, minute=0),
-                id=scheduler_job_id,
-                args=[username, token, repo_name],
-                replace_existing=True
+                id=DAILY_PLANNING_JOB_ID,
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
             )
+            self.scheduler.add_job(
+                func=plan_new_users_job,
+                trigger=IntervalTrigger(seconds=NEW_USER_SYNC_INTERVAL),
+                id=NEW_USER_SYNC_JOB_ID,
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            self.scheduler.add_job(
+                func=drain_outbox_job,
+                trigger=IntervalTrigger(seconds=OUTBOX_SWEEP_INTERVAL),
+                id=OUTBOX_SWEEP_JOB_ID,
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            print("Added daily planning job at midnight")
+        except Exception as e:
+            print(f"Error setting up daily planning job: {str(e)}")
 
-            print(f"Added midnight scheduler for {username}")
+    def plan_all_users(self, batch_size: int = PLANNING_BATCH_SIZE,
+                       window_seconds: float = PLANNING_WINDOW_SECONDS) -> Dict[str, Any]:
+        """
+        Plan today's commits for every user with a repository
 
-            # Update user_jobs tracking
-            if username not in user_jobs:
-                user_jobs[username] = []
-            if scheduler_job_id not in user_jobs[username]:
-                user_jobs[username].append(scheduler_job_id)
+        Users are planned in batches whose start times are spread evenly
+        across window_seconds, so the database and dispatcher see a steady
+        trickle instead of the whole fleet at once. Progress and lag (how
+        far a batch started behind its slot) are kept in planning_status.
 
-        except Exception as e:
-            print(f"Error setting up midnight scheduler for {username}: {str(e)}")
+        Args:
+            batch_size: Users planned per batch
+            window_seconds: Seconds to spread the batches over (0 runs them back to back)
+
+        Returns:
+            The final planning status
+        """
+        users = db.get_users_with_repositories()
+        batch_size = max(1, batch_size)
+
+        # Commits missed before today are not carried over
+        today = datetime.datetime.combine(self.now().date(), datetime.time())
+        db.delete_scheduled_jobs_before(today.timestamp())
+        batches = [users[i:i + batch_size] for i in range(0, len(users), batch_size)]
+        interval = window_seconds / len(batches) if batches else 0
+
+        status = self.planning_status
+        status.update({
+            "running": True,
+            "started_at": self.now().isoformat(),
+            "finished_at": None,
+            "users_total": len(users),
+            "users_planned": 0,
+            "batches_total": len(batches),
+            "batches_done": 0,
+            "commits_scheduled": 0,
+            "max_lag_seconds": 0.0,
+            "errors": 0
+        })
+        # Only after "running" is set, so plan_new_users leaves the users
+        # still waiting for their batch to this pass
+        self.planned_users = set()
+        self.publish_stats()
+        print(f"Planning {len(users)} users in {len(batches)} batches over {window_seconds:.0f}s")
+
+        started = self.monotonic()
+        for index, batch in enumerate(batches):
+            # Wait for this batch's slot in the window
+            slot = started + index * interval
+            delay = slot - self.monotonic()
+            if delay > 0:
+                self.sleep(delay)
+            lag = max(0.0, self.monotonic() - slot)
+            status["max_lag_seconds"] = max(status["max_lag_seconds"], round(lag, 3))
+
+            try:
+                status["commits_scheduled"] += self._plan_batch(batch, self.now())
+            except Exception as e:
+                status["errors"] += 1
+                print(f"Error planning batch {index + 1}/{len(batches)}: {str(e)}")
+
+            status["users_planned"] += len(batch)
+            status["batches_done"] += 1
+            print(f"Planned batch {index + 1}/{len(batches)}: {status['users_planned']}/{len(users)} users, "
+                  f"lag {lag:.1f}s")
+
+        status["running"] = False
+        status["finished_at"] = self.now().isoformat()
+        self.publish_stats()
+        print(f"Planning finished: {status['commits_scheduled']} commits for {len(users)} users, "
+              f"max lag {status['max_lag_seconds']:.1f}s")
+        return dict(status)
+
+    def _plan_batch(self, batch: List[Dict[str, Any]], now: datetime.datetime) -> int:
+        """
+        Replace the pending commits of a batch of users with their plans up to the planning horizon
+
+        Each user's commits fall within their own business hours, so a
+        fleet spread over time zones keeps the dispatcher busy around the
+        clock instead of in one shared band.
+
+        Args:
+            batch: User dictionaries with username, repo_name and business hours settings
+            now: Current local time
+
+        Returns:
+            Number of commits scheduled
+        """
+        users = [(user["username"], user["repo_name"]) for user in batch]
+        usernames = [username for username, _ in users]
+        for username in usernames:
+            self.dispatcher.cancel_user(username)
+        self.planned_users.update(usernames)
+
+        # Every user in the batch gets their old jobs replaced, even with nothing left today
+        jobs_by_user = {user["id"]: [] for user in batch}
+        user_ids = [user["id"] for user in batch]
+        hours = [planner.user_hours(user) for user in batch]
+
+        # Commits due exactly now are left to whoever already holds them
+        start = int(now.timestamp()) + 1
+        end = self.planning_horizon(now)
+        if batch_planner.available():
+            user_index, commit_times = batch_planner.plan_users_between(users, start, end, hours=hours)
+            for index, commit_time in zip(user_index.tolist(), commit_times.tolist()):
+                jobs_by_user[user_ids[index]].append(commit_time)
+            db.replace_scheduled_jobs(jobs_by_user)
+            self._reschedule_extra_jobs(dict(zip(user_ids, usernames)))
+            return self.dispatcher.schedule_batch(usernames, user_index, commit_times)
+
+        scheduled = 0
+        plans = planner.bulk_plans_between(users, start, end, hours)
+        for user in batch:
+            upcoming = plans[user["username"]]
+            jobs_by_user[user["id"]] = upcoming
+            self.dispatcher.schedule_many(user["username"], upcoming)
+            scheduled += len(upcoming)
+        db.replace_scheduled_jobs(jobs_by_user)
+        self._reschedule_extra_jobs(dict(zip(user_ids, usernames)))
+        return scheduled
+
+    def plan_new_users(self) -> int:
+        """
+        Plan users that aren't in the dispatcher yet or changed their business hours
+
+        Repositories and settings can change through any process, while only
+        the leader dispatches, so the leader picks changes up periodically.
+
+        Returns:
+            Number of users planned
+        """
+        if not self.is_leader():
+            return 0
+        # The nightly pass plans everyone in paced batches; users it hasn't
+        # reached yet would otherwise all be planned here at once. Changes
+        # made meanwhile are picked up by the first sync after it finishes
+        if self.planning_status["running"]:
+            return 0
+
+        # Anything updated while the previous sync was reading is picked up next time
+        synced_before = self.last_user_sync
+        self.last_user_sync = self.clock()
+        new_users = [user for user in db.get_users_with_repositories()
+                     if user["username"] not in self.planned_users
+                     or (user["schedule_updated_at"] or 0) >= synced_before]
+        if new_users:
+            scheduled = self._plan_batch(new_users, self.now())
+            print(f"Planned {len(new_users)} new users ({scheduled} commits)")
+        return len(new_users)
+
+    def drain_outbox(self, batch_size: int = OUTBOX_CLAIM_BATCH) -> int:
+        """
+        Claim due and abandoned outbox jobs in batches and run them
+
+        The dispatcher normally claims each job as it falls due; this sweep
+        recovers jobs whose executor died (expired claims, retried with an
+        idempotency check) and anything the dispatcher doesn't know about.
+
+        Args:
+            batch_size: Jobs claimed per batch
+
+        Returns:
+            Number of jobs claimed
+        """
+        if not self.is_leader() or not self.caught_up:
+            return 0
+
+        claimed = 0
+        while True:
+            jobs = db.claim_due_jobs(self.elector.holder_id, self.clock(),
+                                     batch_size, OUTBOX_LEASE_SECONDS)
+            for job in jobs:
+                self.dispatcher.submit(run_claimed_job, job["username"], job)
+            claimed += len(jobs)
+            if len(jobs) < batch_size:
+                break
+
+        if claimed:
+            print(f"Claimed {claimed} outbox jobs")
+        return claimed
+
+    def get_planning_status(self) -> Dict[str, Any]:
+        """
+        Get the progress of the most recent planning pass
+
+        Only the leader plans, so other processes (the web app) return the
+        status the lease holder last published.
+
+        Returns:
+            Dictionary of planning counters
+        """
+        if self.is_leader():
+            return dict(self.planning_status)
+
+        lease = db.get_lease(self.elector.lease_name)
+        published = self.get_published_stats("planning")
+        if lease and lease["holder"] in published:
+            return published[lease["holder"]]
+        return dict(self.planning_status)
+
+    def collect_stats(self) -> Dict[str, Any]:
+        """
+        Collect this process's planning progress and GitHub client counters
+
+        Returns:
+            Stats dictionary
+        """
+        pool = get_pool_stats()
+        pool["circuit_breakers"] = circuit_breaker.get_stats()
+        return {
+            "is_leader": self.is_leader(),
+            "planning": dict(self.planning_status),
+            "github_pool": pool,
+            "github_cache": {
+                "conditional_requests": etag_cache.get_stats(),
+                "repository_metadata": repo_cache.get_stats()
+            }
+        }
+
+    def publish_stats(self) -> bool:
+        """
+        Store this process's stats in the database for the web app to read
+
+        Returns:
+            True if successful, False otherwise
+        """
+        return db.store_process_stats(self.elector.holder_id, self.collect_stats())
+
+    def get_published_stats(self, section: str) -> Dict[str, Any]:
+        """
+        Get one section of the stats scheduler processes published recently
+
+        Args:
+            section: Key of collect_stats to return
+
+        Returns:
+            Dictionary of process ID to that section, with published_at added
+        """
+        published = {}
+        for process, row in db.get_process_stats(time.time() - STATS_MAX_AGE).items():
+            if section in row["stats"]:
+                published[process] = dict(row["stats"][section], published_at=row["updated_at"])
+        return published
 
     def get_scheduled_commits_count(self, username: str) -> int:
         """
         Get the number of scheduled commits for a user
 
+        The leader answers from its dispatcher; other processes read the
+        job table.
+
         Args:
             username: GitHub username
 
         Returns:
             Number of scheduled commits
         """
-        return len([job_id for job_id in user_jobs.get(username, [])
-                   if not job_id.endswith("daily_scheduler")])
+        if self.is_leader():
+            return self.dispatcher.pending_count(username)
+        _, count = db.get_next_scheduled_job(username, self.clock())
+        return count
+
+    def get_rate_limit_quota(self, username: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the known GitHub rate limit quota for a user
+
+        Args:
+            username: GitHub username
+
+        Returns:
+            Quota dictionary from the rate limit governor, or None if the
+            user has no stored token
+        """
+        user_data = db.get_user_token(username)
+        if not user_data or not user_data.get("token"):
+            return None
+        return rate_limit_governor.get_quota(user_data["token"])
 
     def update_next_commit_info(self, username: str) -> None:
         """
@@ -337,12 +862,17 @@ class CommitScheduler:
         # We just need to ensure it's called after a commit is processed
         self.get_next_commit_time(username)
 
-    def get_next_commit_time(self, username: str) -> dict:
+    def get_next_commit_time(self, username: str, repo_name: Optional[str] = None) -> dict:
         """
         Get the next scheduled commit time for a user
 
+        Pending commits come from the leader's dispatcher or the job table;
+        once today's are done the time is recomputed from the user's plan
+        when repo_name is given.
+
         Args:
             username: GitHub username
+            repo_name: Repository name (enables the plan lookup)
 
         Returns:
             Dictionary with next commit information:
@@ -364,62 +894,42 @@ class CommitScheduler:
             'formatted_countdown': None
         }
 
-        # Get all job IDs for this user that are not daily schedulers
-        commit_job_ids = [job_id for job_id in user_jobs.get(username, [])
-                         if not job_id.endswith("daily_scheduler")]
-
-        print(f"Found {len(commit_job_ids)} commit job IDs for {username}: {commit_job_ids}")
-
-        if not commit_job_ids:
-            print(f"No commit jobs found for {username}")
-            return result
-
-        # Get all jobs from the scheduler
         try:
-            all_jobs = self.scheduler.get_jobs()
-            print(f"Total jobs in scheduler: {len(all_jobs)}")
-
-            # Filter to only this user's commit jobs
-            user_jobs_list = [job for job in all_jobs if job.id in commit_job_ids]
-            print(f"Found {len(user_jobs_list)} jobs for {username}")
+            if self.is_leader():
+                next_due = self.dispatcher.next_due(username)
+            else:
+                next_due, _ = db.get_next_scheduled_job(username, self.clock())
+            if next_due is None and repo_name:
+                hours = planner.user_hours(db.get_user(username) or {})
+                next_due = planner.next_commit_time(username, repo_name, self.now(), hours)
 
-            if not user_jobs_list:
-                print(f"No matching jobs found in scheduler for {username}")
+            if next_due is None:
+                print(f"No commits scheduled for {username}")
                 return result
 
-            # Sort jobs by next run time
-            user_jobs_list.sort(key=lambda job: job.next_run_time if job.next_run_time else datetime.datetime.max.replace(tzinfo=datetime.timezone.utc))
-
-            # Get the next job
-            next_job = user_jobs_list[0]
-            next_time = next_job.next_run_time
+            next_time = datetime.datetime.fromtimestamp(next_due)
 
-            print(f"Next job for {username}: {next_job.id}, run time: {next_time}")
+            # Calculate seconds until next commit
+            now = self.now()
+            seconds_until_next = max(0, int((next_time - now).total_seconds()))
 
-            if next_time:
-                # Calculate seconds until next commit
-                now = datetime.datetime.now(next_time.tzinfo)
-                seconds_until_next = max(0, int((next_time - now).total_seconds()))
+            # Format the time
+            formatted_time = next_time.strftime('%Y-%m-%d %H:%M:%S')
 
-                # Format the time
-                formatted_time = next_time.strftime('%Y-%m-%d %H:%M:%S')
+            # Format the countdown
+            hours, remainder = divmod(seconds_until_next, 3600)
+            minutes, seconds = divmod(remainder, 60)
+            formatted_countdown = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
-                # Format the countdown
-                hours, remainder = divmod(seconds_until_next, 3600)
-                minutes, seconds = divmod(remainder, 60)
-                formatted_countdown = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-
-                result = {
-                    'has_scheduled_commits': True,
-                    'next_commit_time': next_time,
-                    'seconds_until_next': seconds_until_next,
-                    'formatted_time': formatted_time,
-                    'formatted_countdown': formatted_countdown
-                }
+            result = {
+                'has_scheduled_commits': True,
+                'next_commit_time': next_time,
+                'seconds_until_next': seconds_until_next,
+                'formatted_time': formatted_time,
+                'formatted_countdown': formatted_countdown
+            }
 
-                print(f"Next commit for {username} in {formatted_countdown} ({seconds_until_next} seconds)")
-            else:
-                print(f"Next job for {username} has no run time")
+            print(f"Next commit for {username} in {formatted_countdown} ({seconds_until_next} seconds)")
 
         except Exception as e:
             print(f"Error getting next commit time for {username}: {str(e)}")
@@ -428,53 +938,134 @@ class CommitScheduler:
 
         return result
 
+    def catch_up_missed(self, down_since: Optional[float], now: float,
+                        policy: str = catchup.CATCHUP_POLICY) -> int:
+        """
+        Reschedule commits whose slot passed while no leader was running
+
+        Missed slots are pending outbox jobs that fell due, plus today's
+        planned slots since down_since for users that were never planned
+        today (the scheduler was down over midnight). They are handed to
+        plan_catch_up together, so the whole fleet's backlog is released in
+        rate-limited batches rather than all at once.
+
+        Args:
+            down_since: Last heartbeat of the previous leader, or None if unknown
+            now: Epoch seconds
+            policy: run_now, compress or skip
+
+        Returns:
+            Number of missed commits rescheduled
+        """
+        oldest = now - catchup.CATCHUP_MAX_AGE
+        today = datetime.date.fromtimestamp(now)
+        today_start = datetime.datetime.combine(today, datetime.time()).timestamp()
+
+        # Outbox jobs that fell due; ones too old to catch up are skipped
+        missed = []
+        expired = []
+        for job in db.get_missed_jobs(0, now):
+            if job["due_at"] < oldest:
+                expired.append(job["id"])
+            else:
+                missed.append((("job", job["id"]), job["username"], float(job["due_at"])))
+
+        users = db.get_users_with_repositories()
+
+        # Users with no jobs today missed their whole plan; work out the
+        # slots that passed during the downtime and the ones still to come
+        upcoming_by_user: Dict[int, List[float]] = {}
+        if down_since is not None:
+            since = max(down_since, today_start, oldest)
+            have_jobs = db.get_user_ids_with_jobs(today_start)
+            unplanned = [user for user in users if user["id"] not in have_jobs]
+            plans = planner.bulk_plans_between([(user["username"], user["repo_name"]) for user in unplanned],
+                                               since, self.planning_horizon(datetime.datetime.fromtimestamp(now)),
+                                               [planner.user_hours(user) for user in unplanned])
+            for user in unplanned:
+                times = plans[user["username"]]
+                upcoming_by_user[user["id"]] = [commit_time for commit_time in times if commit_time >= now]
+                missed.extend((("slot", user["id"]), user["username"], commit_time)
+                              for commit_time in times if commit_time < now)
+
+        # Compressed catch-up fits into the rest of each user's own window
+        window_ends = None
+        if policy == catchup.CATCHUP_COMPRESS:
+            window_ends = {}
+            for user in users:
+                hours = planner.user_hours(user)
+                window_ends[user["username"]] = planner.business_window(planner.local_date(now, hours), hours)[1]
+
+        rescheduled_jobs = []
+        skipped = list(expired)
+        for (kind, key), new_due in catchup.plan_catch_up(missed, now, policy, window_ends):
+            if kind == "slot":
+                if new_due is not None:
+                    upcoming_by_user[key].append(new_due)
+            elif new_due is None:
+                skipped.append(key)
+            else:
+                rescheduled_jobs.append((key, new_due))
+
+        # Rescheduled jobs are marked as outside the plan, so replacing the
+        # unplanned users' jobs below keeps them
+        if rescheduled_jobs:
+            db.reschedule_jobs(rescheduled_jobs)
+        if skipped:
+            db.skip_jobs(skipped)
+        if upcoming_by_user:
+            db.replace_scheduled_jobs(upcoming_by_user)
+
+        caught_up = len(missed) - (len(skipped) - len(expired))
+        if missed or expired:
+            print(f"Catch-up ({policy}): {len(missed)} missed commits, {caught_up} rescheduled, "
+                  f"{len(skipped)} skipped")
+        return caught_up
+
     def restore_schedulers(self) -> None:
         """Restore schedulers for all users with repositories"""
-        print("Restoring schedulers for all users with repositories")
+        if not self.is_leader():
+            print("Not the scheduler leader, leaving restore to the leader")
+            return
 
-        # Get all users with repositories
-        users_with_repos = db.get_users_with_repositories()
+        print("Restoring schedulers for all users with repositories")
 
-        # First, clear any existing jobs that might conflict
-        global user_jobs
+        # Drop per-user midnight jobs left in the job store by earlier versions
         try:
-            # Get all job IDs from the scheduler
-            job_ids = [job.id for job in self.scheduler.get_jobs()]
-            print(f"Found {len(job_ids)} existing jobs in the scheduler")
+            for job in self.scheduler.get_jobs():
+                if job.id.endswith(LEGACY_DAILY_JOB_SUFFIX):
+                    self.scheduler.remove_job(job.id)
+                    print(f"Removed legacy job {job.id}")
+        except Exception as e:
+            print(f"Error removing legacy jobs: {str(e)}")
 
-            # Clear user_jobs dictionary to avoid stale references
-            user_jobs = {}
+        self.setup_daily_planning()
+
+        # Reschedule whatever fell due while no leader was running, then
+        # load pending commits (including rescheduled ones) from the job table
+        now = float(int(self.clock()))
+        try:
+            self.catch_up_missed(self.elector.previous_heartbeat, now)
         except Exception as e:
-            print(f"Error getting existing jobs: {str(e)}")
-            # Continue with empty user_jobs
-            user_jobs = {}
+            print(f"Error catching up missed commits: {str(e)}")
+        self.caught_up = True
 
-        for user in users_with_repos:
-            try:
-                print(f"Restoring scheduler for {user['username']}/{user['repo_name']}")
-
-                # First set up the midnight scheduler
-                self.setup_midnight_scheduler(user['username'], user['token'], user['repo_name'])
-
-                # Check if we need to schedule today's commits
-                now = datetime.datetime.now()
-                midnight = datetime.datetime(now.year, now.month, now.day, 0, 0, 0)
-
-                # If it's been less than 1 hour since midnight, don't schedule again
-                # as the midnight job might have already run
-                if (now - midnight).total_seconds() > 3600:
-                    # Check if there are already commits scheduled for today
-                    if self.get_scheduled_commits_count(user['username']) == 0:
-                        print(f"No commits scheduled for today for {user['username']}, scheduling now")
-                        try:
-                            schedule_todays_commits_job(user['username'], user['token'], user['repo_name'])
-                        except Exception as e:
-                            print(f"Error scheduling today's commits for {user['username']}: {str(e)}")
-            except Exception as e:
-                print(f"Error restoring scheduler for {user.get('username', 'unknown')}: {str(e)}")
-                continue
+        self.dispatcher.clear()
+        jobs = db.get_scheduled_jobs(now)
+        usernames = sorted({username for username, _ in jobs})
+        index = {username: i for i, username in enumerate(usernames)}
+        self.dispatcher.schedule_batch(usernames, [index[username] for username, _ in jobs],
+                                       [float(due_at) for _, due_at in jobs])
+        self.planned_users = set(usernames)
+
+        # Business hours changed while no leader was running still need re-planning
+        self.last_user_sync = self.elector.previous_heartbeat or now
+
+        # Plans are deterministic, so users without pending jobs get exactly
+        # the commits still to come today
+        planned = self.plan_new_users()
 
-        print(f"Restored schedulers for {len(users_with_repos)} users")
+        print(f"Restored {len(jobs)} commits for {len(usernames)} users and planned {planned} more users")
 
 # Create a global instance of the scheduler
 commit_scheduler = CommitScheduler()
@@ -484,7 +1075,6 @@ def clear_job_store():
     Utility function to clear the job store
     This can be called manually if needed to reset the scheduler
     """
-    global user_jobs
     try:
         print("Clearing job store...")
         # Get all jobs
@@ -496,8 +1086,8 @@ def clear_job_store():
             commit_scheduler.scheduler.remove_job(job.id)
             print(f"Removed job {job.id}")
 
-        # Reset user_jobs
-        user_jobs = {}
+        # Reset pending commits
+        commit_scheduler.dispatcher.clear()
 
         print("Job store cleared successfully")
         return True
@@ -0,0 +1,48 @@
+"""
+Scheduler Worker
+
+Runs commit planning and dispatch in a process of its own, so the web app
+only serves HTTP and reads schedule state. Several workers can run at once;
+leader election makes sure only one of them dispatches commits.
+
+Usage:
+    python -m scheduler_worker
+"""
+import signal
+import sys
+import threading
+
+from dotenv import load_dotenv
+
+# Load environment variables before modules read their settings
+load_dotenv()
+
+import database as db
+from scheduler import commit_scheduler, STATS_PUBLISH_INTERVAL
+
+def main() -> int:
+    """Run the scheduler until SIGINT or SIGTERM"""
+    db.init_db()
+
+    stop = threading.Event()
+
+    def handle_signal(signum, frame):
+        print(f"Received signal {signum}, stopping scheduler worker")
+        stop.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    commit_scheduler.start()
+    print("Scheduler worker running")
+
+    # Planning progress and client counters only exist in this process
+    while not stop.is_set():
+        commit_scheduler.publish_stats()
+        stop.wait(STATS_PUBLISH_INTERVAL)
+
+    commit_scheduler.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
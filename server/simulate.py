@@ -0,0 +1,236 @@
+"""
+Scheduler Simulation
+
+Runs the commit scheduler for synthetic users over several virtual days,
+with a virtual clock and a fake commit function instead of GitHub, and
+reports per simulated day how late commits started, how many ran at once,
+how big the job store got, and the memory and CPU spent.
+
+Usage:
+    python simulate.py --users 10000 --days 3
+    python simulate.py --users 2000 --days 2 --planning per-user --workers 4 --commit-seconds 5
+    python simulate.py --users 10000 --days 2 --timezones America/Los_Angeles,Europe/Berlin,Asia/Tokyo
+    python simulate.py --users 10000 --days 2 --planning-window 0
+"""
+import argparse
+import contextlib
+import datetime
+import heapq
+import os
+import random
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Simulate the commit scheduler on a virtual clock")
+    parser.add_argument("--users", type=int, default=1000, help="Number of synthetic users")
+    parser.add_argument("--days", type=int, default=1, help="Number of virtual days")
+    parser.add_argument("--start", default=None, help="First simulated day (YYYY-MM-DD, defaults to today)")
+    parser.add_argument("--planning", choices=["fleet", "per-user"], default="fleet",
+                        help="Nightly fleet-wide pass or schedule_todays_commits_job per user")
+    parser.add_argument("--planning-window", type=float, default=None,
+                        help="Seconds the fleet pass spreads its batches over (default PLANNING_WINDOW_SECONDS)")
+    parser.add_argument("--workers", type=int, default=None, help="Dispatcher worker threads (default DISPATCHER_WORKERS)")
+    parser.add_argument("--timezones", default="",
+                        help="Comma-separated time zones assigned to users round-robin (default server time)")
+    parser.add_argument("--commit-seconds", type=float, default=2.0, help="Mean duration of a fake commit")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for fake commit durations")
+    parser.add_argument("--verbose", action="store_true", help="Show the scheduler's own log output")
+    return parser.parse_args()
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+class VirtualClock:
+    """Clock that only moves when the simulation advances it"""
+
+    def __init__(self, start: float):
+        self.current = start
+
+    def __call__(self) -> float:
+        return self.current
+
+    def advance_to(self, when: float) -> None:
+        """Move the clock forward (never backwards)"""
+        self.current = max(self.current, when)
+
+class FakeCommit:
+    """Stands in for make_scheduled_commit: claims and completes the outbox job without GitHub"""
+
+    def __init__(self, db, clock: VirtualClock, mean_seconds: float, seed: int):
+        self.db = db
+        self.clock = clock
+        self.mean_seconds = mean_seconds
+        self.random = random.Random(seed)
+        self.made = 0
+        self.missing = 0
+
+    def __call__(self, username: str, repo_name: str, due_time: float) -> float:
+        """
+        Make a fake commit
+
+        Returns:
+            Simulated seconds the commit took
+        """
+        job = self.db.claim_job(username, due_time, "simulator", self.clock(), 300)
+        if job is None:
+            self.missing += 1
+        else:
+            self.made += 1
+            sha = f"{self.made:040x}"
+            self.db.complete_job(job["id"], username, repo_name, sha, "Simulated commit", "")
+        return self.random.expovariate(1.0 / self.mean_seconds) if self.mean_seconds > 0 else 0.0
+
+class VirtualWorkers:
+    """Hands due commits to the next free worker as the virtual clock moves"""
+
+    def __init__(self, dispatcher, clock: VirtualClock, commit: FakeCommit, repos, workers: int):
+        self.dispatcher = dispatcher
+        self.clock = clock
+        self.commit = commit
+        self.repos = repos
+        # Times each worker becomes free, and finish times of commits in flight
+        self.free_at = [clock()] * workers
+        self.in_flight = []
+        self.start_day(clock())
+
+    def start_day(self, day_start: float) -> None:
+        """Reset the per-day figures"""
+        self.day_start = day_start
+        self.lags = []
+        self.per_hour = [0] * 25
+        self.peak_concurrency = 0
+
+    def run_until(self, target: float) -> None:
+        """Run every commit that comes due before target, then move the clock to it"""
+        while True:
+            wakeup = self.dispatcher.next_wakeup()
+            if wakeup is None or wakeup >= target:
+                break
+            self.clock.advance_to(wakeup)
+            for username, due_time in self.dispatcher.pop_due():
+                started = max(due_time, heapq.heappop(self.free_at))
+                self.lags.append(started - due_time)
+                self.per_hour[int((due_time - self.day_start) // 3600)] += 1
+
+                while self.in_flight and self.in_flight[0] <= started:
+                    heapq.heappop(self.in_flight)
+                finished = started + self.commit(username, self.repos[username], due_time)
+                heapq.heappush(self.in_flight, finished)
+                heapq.heappush(self.free_at, finished)
+                self.peak_concurrency = max(self.peak_concurrency, len(self.in_flight))
+        self.clock.advance_to(target)
+
+    def sleep(self, seconds: float) -> None:
+        """Stands in for time.sleep while the planning pass waits for a batch slot"""
+        self.run_until(self.clock() + seconds)
+
+def job_store_size(db_path):
+    """Rows in the scheduled_jobs table"""
+    conn = sqlite3.connect(db_path)
+    count = conn.execute('SELECT COUNT(*) FROM scheduled_jobs').fetchone()[0]
+    conn.close()
+    return count
+
+def main():
+    """Run the simulation and print a report"""
+    args = parse_args()
+    start_day = datetime.date.fromisoformat(args.start) if args.start else datetime.date.today()
+    clock = VirtualClock(datetime.datetime.combine(start_day, datetime.time()).timestamp())
+
+    # Everything runs against a throwaway database in a scratch directory
+    workdir = tempfile.mkdtemp(prefix="commit-sim-")
+    os.chdir(workdir)
+    import database as db
+    db.DB_PATH = os.path.join(workdir, "simulation.db")
+
+    import scheduler
+    from dispatcher import DISPATCHER_WORKERS
+
+    workers = args.workers or DISPATCHER_WORKERS
+    window = scheduler.PLANNING_WINDOW_SECONDS if args.planning_window is None else args.planning_window
+    # Commits keep running while the planning pass waits between batches
+    sim = scheduler.CommitScheduler(clock=clock, monotonic=clock,
+                                    sleep=lambda seconds: pool.sleep(seconds))
+    # schedule_todays_commits_job looks up the global instance
+    scheduler.commit_scheduler = sim
+    # Pretend to hold the lease forever instead of running an elector
+    sim.elector._leader = True
+    sim.elector._valid_until = float("inf")
+    sim.caught_up = True
+
+    # The scheduler logs every commit; keep that out of the report (and the memory figures)
+    devnull = open(os.devnull, "w")
+    quiet = contextlib.nullcontext if args.verbose else (lambda: contextlib.redirect_stdout(devnull))
+
+    with quiet():
+        db.init_db()
+        conn = sqlite3.connect(db.DB_PATH)
+        timezones = [timezone.strip() for timezone in args.timezones.split(",") if timezone.strip()] or [None]
+        conn.executemany('INSERT INTO users (username, token, repo_name, timezone) VALUES (?, ?, ?, ?)',
+                         [(f"sim-user-{index}", "sim-token", "sim-repo", timezones[index % len(timezones)])
+                          for index in range(args.users)])
+        conn.commit()
+        conn.close()
+    repos = {f"sim-user-{index}": "sim-repo" for index in range(args.users)}
+
+    commit = FakeCommit(db, clock, args.commit_seconds, args.seed)
+    pool = VirtualWorkers(sim.dispatcher, clock, commit, repos, workers)
+    print(f"Simulating {args.users} users over {args.days} days from {start_day} "
+          f"(planning={args.planning}, window={window:.0f}s, workers={workers}, commit={args.commit_seconds}s mean)")
+    print(f"{'day':<12}{'commits':>9}{'peak/h':>8}{'lag p50':>10}{'lag p95':>10}{'lag max':>10}"
+          f"{'peak':>6}{'store':>9}{'heap':>8}{'plan s':>8}{'cpu s':>8}{'mem MB':>8}")
+
+    tracemalloc.start()
+    for day_index in range(args.days):
+        day = start_day + datetime.timedelta(days=day_index)
+        day_start = datetime.datetime.combine(day, datetime.time()).timestamp()
+        day_end = day_start + 86400
+        tracemalloc.reset_peak()
+        cpu_started = time.process_time()
+
+        # Midnight: plan the day
+        clock.advance_to(day_start)
+        pool.start_day(day_start)
+        plan_started = time.process_time()
+        with quiet():
+            if args.planning == "fleet":
+                sim.plan_all_users(window_seconds=window)
+            else:
+                for user in db.get_users_with_repositories():
+                    scheduler.schedule_todays_commits_job(user["username"], user["token"], user["repo_name"])
+        plan_cpu = time.process_time() - plan_started
+        peak_store = job_store_size(db.DB_PATH)
+        peak_heap = sim.dispatcher.size()
+
+        # Run the rest of the day
+        with quiet():
+            pool.run_until(day_end)
+        lags = pool.lags
+
+        cpu = time.process_time() - cpu_started
+        _, mem_peak = tracemalloc.get_traced_memory()
+        print(f"{day.isoformat():<12}{len(lags):>9}{max(pool.per_hour):>8}{percentile(lags, 50):>10.1f}{percentile(lags, 95):>10.1f}"
+              f"{max(lags, default=0.0):>10.1f}{pool.peak_concurrency:>6}{peak_store:>9}{peak_heap:>8}"
+              f"{plan_cpu:>8.2f}{cpu:>8.2f}{mem_peak / 1e6:>8.1f}")
+
+    tracemalloc.stop()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nCommits made:     {commit.made} ({commit.missing} with no claimable job)")
+    print(f"Job store now:    {job_store_size(db.DB_PATH)} rows")
+    print(f"Max RSS:          {max_rss:.1f} MB")
+    print(f"Database:         {db.DB_PATH}")
+    return 0 if commit.missing == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,9 +10,32 @@ if [ -z "$PORT" ]; then
   PORT=10000
 fi
 
+# Run planning and commit dispatch in their own process, next to the web
+# workers. Both use the same SQLite file, so they share this container and are
+# supervised here: SIGTERM is passed on to both (the worker releases its
+# scheduler lease on the way out), and if either one exits the other is
+# stopped too, so the platform restarts the service instead of it serving
+# requests with no dispatcher behind it.
+python -m scheduler_worker &
+WORKER_PID=$!
+
 # Try to start with wsgi.py first, fall back to app.py if that fails
 if python -c "import wsgi" 2>/dev/null; then
-  exec gunicorn --bind 0.0.0.0:$PORT wsgi:app
+  APP_MODULE=wsgi:app
 else
-  exec gunicorn --bind 0.0.0.0:$PORT app:app
-fi
\ No newline at end of file
+  APP_MODULE=app:app
+fi
+gunicorn --bind 0.0.0.0:$PORT $APP_MODULE &
+WEB_PID=$!
+
+stop() {
+  kill -TERM "$WORKER_PID" "$WEB_PID" 2>/dev/null
+}
+trap stop TERM INT
+
+# Wait for either process to exit (or a signal), then take the other one down
+wait -n
+STATUS=$?
+stop
+wait
+exit $STATUS
@@ -0,0 +1,54 @@
+"""
+Tests for the scheduler lease in database.py
+"""
+import threading
+import time
+
+LEASE = "test-lease"
+
+def test_racing_holders_get_one_lease(temp_db):
+    """Two processes acquiring at the same moment can't both win"""
+    for round_index in range(20):
+        name = f"{LEASE}-{round_index}"
+        barrier = threading.Barrier(2)
+        results = {}
+
+        def contend(holder):
+            barrier.wait()
+            results[holder] = temp_db.acquire_lease(name, holder, 60)
+
+        threads = [threading.Thread(target=contend, args=(holder,)) for holder in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(results.values()) == [False, True]
+        winner = next(holder for holder, acquired in results.items() if acquired)
+        assert temp_db.get_lease(name)["holder"] == winner
+
+def test_holder_renews_while_others_wait(temp_db):
+    assert temp_db.acquire_lease(LEASE, "a", 60)
+    assert not temp_db.acquire_lease(LEASE, "b", 60)
+    assert temp_db.acquire_lease(LEASE, "a", 60)
+    assert temp_db.get_lease(LEASE)["holder"] == "a"
+
+def test_expired_lease_is_taken_over(temp_db):
+    assert temp_db.acquire_lease(LEASE, "a", 0.05)
+    time.sleep(0.1)
+
+    assert temp_db.acquire_lease(LEASE, "b", 60)
+    assert temp_db.get_lease(LEASE)["holder"] == "b"
+    # The old holder's renewal no longer counts
+    assert not temp_db.acquire_lease(LEASE, "a", 60)
+
+def test_released_lease_keeps_last_heartbeat(temp_db):
+    assert temp_db.acquire_lease(LEASE, "a", 60)
+    heartbeat = temp_db.get_lease(LEASE)["heartbeat_at"]
+
+    assert not temp_db.release_lease(LEASE, "b")
+    assert temp_db.release_lease(LEASE, "a")
+    assert temp_db.get_lease(LEASE)["heartbeat_at"] == heartbeat
+
+    # Released leases can be taken right away
+    assert temp_db.acquire_lease(LEASE, "b", 60)
@@ -0,0 +1,100 @@
+"""
+Tests for the scheduled commit outbox in database.py and scheduler.py
+"""
+import scheduler
+
+USERNAME = "outbox-user"
+NOW = 1_800_000_000
+LEASE_SECONDS = 300
+
+def add_user(temp_db):
+    """Store a user with a repository and return their id"""
+    assert temp_db.store_user_token(USERNAME, "outbox-token", "outbox-repo")
+    return temp_db.get_user_id(USERNAME)
+
+def job_rows(temp_db, user_id):
+    """(due_at, status, source) of a user's jobs"""
+    cursor = temp_db.get_connection().cursor()
+    cursor.execute('SELECT due_at, status, source FROM scheduled_jobs WHERE user_id = ? ORDER BY due_at',
+                   (user_id,))
+    return cursor.fetchall()
+
+class RecordingClient:
+    """Stands in for GitHubClient and records make_commit calls"""
+
+    calls = []
+
+    def __init__(self, token):
+        self.token = token
+
+    def make_commit(self, username, repo_name, commit_message, **kwargs):
+        RecordingClient.calls.append(kwargs)
+        return {}, True, f"{len(RecordingClient.calls):040x}"
+
+def test_claimed_job_is_held_until_its_lease_expires(temp_db):
+    add_user(temp_db)
+    temp_db.add_scheduled_job(USERNAME, NOW)
+
+    first = temp_db.claim_job(USERNAME, NOW, "worker-a", NOW, LEASE_SECONDS)
+    assert first["attempts"] == 1
+    assert temp_db.claim_job(USERNAME, NOW, "worker-b", NOW + 10, LEASE_SECONDS) is None
+
+    second = temp_db.claim_job(USERNAME, NOW, "worker-b", NOW + LEASE_SECONDS + 1, LEASE_SECONDS)
+    assert second["id"] == first["id"]
+    assert second["attempts"] == 2
+
+def test_reclaimed_job_checks_for_an_earlier_commit(temp_db, monkeypatch):
+    add_user(temp_db)
+    temp_db.add_scheduled_job(USERNAME, NOW)
+    monkeypatch.setattr(scheduler, "GitHubClient", RecordingClient)
+    monkeypatch.setattr(RecordingClient, "calls", [])
+
+    job = temp_db.claim_job(USERNAME, NOW, "worker-a", NOW, LEASE_SECONDS)
+    scheduler.make_scheduled_commit("outbox-token", USERNAME, "outbox-repo", job)
+    assert RecordingClient.calls[-1]["check_existing"] is False
+    assert RecordingClient.calls[-1]["idempotency_key"] == scheduler.commit_key(job)
+
+    # The first executor died before completing; its claim runs out
+    temp_db.add_scheduled_job(USERNAME, NOW + 60)
+    job = temp_db.claim_job(USERNAME, NOW + 60, "worker-a", NOW + 60, LEASE_SECONDS)
+    job = temp_db.claim_job(USERNAME, NOW + 60, "worker-b", NOW + 60 + LEASE_SECONDS + 1, LEASE_SECONDS)
+    scheduler.make_scheduled_commit("outbox-token", USERNAME, "outbox-repo", job)
+    assert RecordingClient.calls[-1]["check_existing"] is True
+    assert RecordingClient.calls[-1]["idempotency_key"] == scheduler.commit_key(job)
+
+    user_id = temp_db.get_user_id(USERNAME)
+    assert [status for _, status, _ in job_rows(temp_db, user_id)] == [temp_db.JOB_DONE, temp_db.JOB_DONE]
+
+def test_due_jobs_are_claimed_once(temp_db):
+    user_id = add_user(temp_db)
+    temp_db.replace_scheduled_jobs({user_id: [NOW - 10, NOW, NOW + 10]})
+
+    claimed = temp_db.claim_due_jobs("worker-a", NOW, 10, LEASE_SECONDS)
+    assert [job["due_at"] for job in claimed] == [NOW - 10, NOW]
+    assert temp_db.claim_due_jobs("worker-b", NOW, 10, LEASE_SECONDS) == []
+
+    # Expired claims come back around
+    reclaimed = temp_db.claim_due_jobs("worker-b", NOW + LEASE_SECONDS + 1, 10, LEASE_SECONDS)
+    assert sorted(job["due_at"] for job in reclaimed) == [NOW - 10, NOW, NOW + 10]
+    assert {job["attempts"] for job in reclaimed if job["due_at"] != NOW + 10} == {2}
+
+def test_replanning_keeps_claimed_and_extra_jobs(temp_db):
+    user_id = add_user(temp_db)
+    temp_db.replace_scheduled_jobs({user_id: [NOW, NOW + 100, NOW + 200]})
+
+    # One planned job is in flight, one was rate limited and moved
+    temp_db.claim_job(USERNAME, NOW, "worker-a", NOW, LEASE_SECONDS)
+    moved = temp_db.claim_job(USERNAME, NOW + 100, "worker-a", NOW, LEASE_SECONDS)
+    temp_db.release_job(moved["id"], NOW + 500)
+    # And one was added outside the plan
+    temp_db.add_scheduled_job(USERNAME, NOW + 600)
+
+    temp_db.replace_scheduled_jobs({user_id: [NOW + 300]})
+
+    assert job_rows(temp_db, user_id) == [
+        (NOW, temp_db.JOB_CLAIMED, temp_db.JOB_SOURCE_PLAN),
+        (NOW + 300, temp_db.JOB_PENDING, temp_db.JOB_SOURCE_PLAN),
+        (NOW + 500, temp_db.JOB_PENDING, temp_db.JOB_SOURCE_EXTRA),
+        (NOW + 600, temp_db.JOB_PENDING, temp_db.JOB_SOURCE_EXTRA),
+    ]
+    assert temp_db.get_extra_jobs([user_id]) == {user_id: [NOW + 500, NOW + 600]}
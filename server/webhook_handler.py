@@ -5,8 +5,16 @@ This module handles GitHub webhook events.
 """
 import hmac
 import hashlib
-from typing import Dict, Any, Optional
+import json
+import os
+from typing import Dict, Any, Optional, Tuple
 import database as db
+from repo_cache import repo_cache
+
+# Push payloads that couldn't be recorded are appended here (one JSON object
+# per line) for replay, since GitHub doesn't redeliver failed webhooks itself
+WEBHOOK_FAILED_LOG = os.environ.get("WEBHOOK_FAILED_LOG",
+                                    os.path.join(os.path.dirname(__file__), "failed_webhooks.jsonl"))
 
 class WebhookHandler:
     """Handles GitHub webhook events"""
@@ -83,6 +91,9 @@ class WebhookHandler:
 
             print(f"Repository: {repo_owner}/{repo_name}")
 
+            # Keep the cached branch head in step with the repository
+            repo_cache.update_from_push(payload)
+
             # Extract commit information
             commits = payload.get("commits", [])
             print(f"Commits in push: {len(commits)}")
@@ -92,7 +103,8 @@ class WebhookHandler:
                 print("This might be a branch creation or deletion event")
                 return True
 
-            # Process each commit
+            # Process each commit, then record the whole push in one transaction
+            to_record = []
             for i, commit in enumerate(commits):
                 commit_id = commit.get("id")
                 commit_message = commit.get("message", "").strip()
@@ -110,19 +122,15 @@ class WebhookHandler:
                     print(f"  ERROR: Missing required commit data: id={commit_id}, url={commit_url}")
                     continue
 
-                # Record in database
-                success = db.record_commit(
-                    username=repo_owner,
-                    repo_name=repo_name,
-                    commit_sha=commit_id,
-                    commit_message=commit_message or "No commit message",
-                    commit_url=commit_url
-                )
-
-                if success:
-                    print(f"  ✓ Successfully recorded in database")
-                else:
-                    print(f"  ✗ Failed to record in database")
+                to_record.append((commit_id, commit_message or "No commit message", commit_url))
+
+            # SHAs already recorded (e.g. our own scheduled commits) are skipped
+            recorded = db.record_commits_bulk(repo_owner, repo_name, to_record) if to_record else 0
+            if recorded < 0:
+                print(f"  ✗ Failed to record {len(to_record)} commits in database")
+                self.save_failed_push(payload)
+                return False
+            print(f"  ✓ Recorded {recorded} new commits ({len(to_record) - recorded} already known)")
 
             print("=== End of Push Event Processing ===\n")
             return True
@@ -145,4 +153,71 @@ class WebhookHandler:
                 print("Could not extract payload information")
 
             print("=== End of Error Report ===\n")
-            return False
\ No newline at end of file
+            return False
+
+    def save_failed_push(self, payload: Dict[str, Any], path: str = WEBHOOK_FAILED_LOG) -> bool:
+        """
+        Keep a push payload that couldn't be recorded so it can be replayed
+
+        Args:
+            payload: Webhook payload
+            path: File the payload is appended to
+
+        Returns:
+            True if the payload was saved, False otherwise
+        """
+        try:
+            with open(path, "a", encoding="utf-8") as log:
+                log.write(json.dumps(payload) + "\n")
+            print(f"  Saved push payload to {path} for replay")
+            return True
+        except Exception as e:
+            print(f"Error saving failed push payload: {str(e)}")
+            return False
+
+    def replay_failed_pushes(self, path: str = WEBHOOK_FAILED_LOG) -> Tuple[int, int]:
+        """
+        Process saved push payloads again
+
+        The log is moved aside first, so pushes failing meanwhile (including
+        during the replay) start a new log. Recording is idempotent, so
+        replaying a push twice doesn't duplicate commits.
+
+        Args:
+            path: File the payloads were appended to
+
+        Returns:
+            Tuple of (pushes recorded, pushes that failed again)
+        """
+        replaying = path + ".replaying"
+        # Resume a replay that was interrupted before starting a new one
+        if not os.path.exists(replaying):
+            if not os.path.exists(path):
+                return 0, 0
+            os.replace(path, replaying)
+
+        recorded = failed = 0
+        with open(replaying, encoding="utf-8") as log:
+            for line in log:
+                if not line.strip():
+                    continue
+                if self.handle_push_event(json.loads(line)):
+                    recorded += 1
+                else:
+                    failed += 1
+        os.remove(replaying)
+
+        print(f"Replayed {recorded + failed} saved pushes: {recorded} recorded, {failed} failed")
+        return recorded, failed
+
+if __name__ == "__main__":
+    # Maintenance commands: python webhook_handler.py replay
+    import sys
+
+    db.init_db()
+    if sys.argv[1:] == ["replay"]:
+        _, failed = WebhookHandler().replay_failed_pushes()
+        sys.exit(1 if failed else 0)
+    else:
+        print("Usage: python webhook_handler.py replay")
+        sys.exit(2)
\ No newline at end of file